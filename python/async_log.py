@@ -0,0 +1,236 @@
+"""
+async_log.py — Logging asincrono a basso overhead per il loop degli agenti.
+
+Due percorsi, entrambi con scrittura in un thread separato (QueueListener):
+
+  1. Messaggi testuali (self.log.info(...)): il root logger riceve un
+     QueueHandler non bloccante al posto dello StreamHandler sincrono di
+     logging.basicConfig. Se la coda è piena il record viene scartato.
+
+  2. Telemetria strutturata (TelemetryLog): il loop di controllo NON formatta
+     stringhe. Copia pochi numeri in un record preallocato (pool per drone)
+     e accoda solo il riferimento. Il thread di scrittura formatta il testo
+     oppure scrive il record in binario (struct RECORD_FORMAT) su file.
+
+Campionamento per drone: channel(drone_id, every=k) registra un record ogni
+k chiamate; every=0 disattiva la telemetria per quel drone.
+"""
+
+import atexit
+import logging
+import logging.handlers
+import math
+import queue
+import struct
+import sys
+from collections import deque
+
+LOG_FORMAT  = "%(asctime)s [%(name)s] %(message)s"
+LOG_DATEFMT = "%H:%M:%S"
+
+# Campi di un record di telemetria (ordine = layout binario)
+RECORD_FIELDS = ("drone", "tick", "state",
+                 "x", "y", "z", "pitch", "roll",
+                 "tgt_x", "tgt_y", "tgt_z", "vz_tgt", "dt")
+RECORD_FORMAT = "<HIB10f"          # drone u16, tick u32, state u8, 10 float32
+RECORD_SIZE   = struct.calcsize(RECORD_FORMAT)
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler che scarta il record invece di bloccare a coda piena."""
+
+    def __init__(self, q):
+        super().__init__(q)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: logging.handlers.QueueListener = None
+_handler:  _DroppingQueueHandler = None
+
+
+def setup_logging(level: int = logging.INFO, queue_size: int = 10000,
+                  stream=None) -> logging.handlers.QueueListener:
+    """
+    Equivalente asincrono di logging.basicConfig: il root logger accoda,
+    un QueueListener formatta e scrive su stream (default stderr).
+    Idempotente: chiamate successive restituiscono il listener esistente.
+    """
+    global _listener, _handler
+    if _listener is not None:
+        return _listener
+
+    sink = logging.StreamHandler(stream or sys.stderr)
+    sink.setFormatter(logging.Formatter(LOG_FORMAT, LOG_DATEFMT))
+
+    _handler = _DroppingQueueHandler(queue.Queue(queue_size))
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        root.removeHandler(h)
+    root.addHandler(_handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(_handler.queue, sink)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return _listener
+
+
+def dropped_messages() -> int:
+    """Messaggi testuali scartati per coda piena."""
+    return _handler.dropped if _handler is not None else 0
+
+
+# ---------------------------------------------------------------------------
+# Telemetria strutturata
+# ---------------------------------------------------------------------------
+
+class TelemetryChannel:
+    """
+    Sorgente di telemetria di un singolo drone (un solo thread produttore).
+
+    Il pool di record è preallocato: record() riempie una lista libera e la
+    accoda; il writer la rimette nel pool dopo averla scritta. Se il pool è
+    esaurito o la coda è piena il record viene scartato (dropped).
+    """
+
+    def __init__(self, q: queue.Queue, drone_id: int, every: int,
+                 pool_size: int):
+        self._q      = q
+        self.drone   = drone_id
+        self.every   = every
+        self._n      = 0
+        self._free   = deque([0.0] * len(RECORD_FIELDS) for _ in range(pool_size))
+        self.written = 0
+        self.dropped = 0
+
+    def record(self, tick: int, state: int,
+               x: float, y: float, z: float, pitch: float, roll: float,
+               tgt_x: float, tgt_y: float, tgt_z: float,
+               vz_tgt: float, dt: float) -> bool:
+        """Hot path: nessuna formattazione, nessun I/O. False se non registrato."""
+        if self.every <= 0:
+            return False
+        self._n += 1
+        if self._n % self.every:
+            return False
+        try:
+            rec = self._free.popleft()
+        except IndexError:
+            self.dropped += 1
+            return False
+        rec[0] = self.drone;  rec[1] = tick;   rec[2] = state
+        rec[3] = x;   rec[4] = y;   rec[5] = z
+        rec[6] = pitch;       rec[7] = roll
+        rec[8] = tgt_x;       rec[9] = tgt_y;  rec[10] = tgt_z
+        rec[11] = vz_tgt;     rec[12] = dt
+        try:
+            self._q.put_nowait((self, rec))
+        except queue.Full:
+            self._free.append(rec)
+            self.dropped += 1
+            return False
+        return True
+
+    def _release(self, rec):
+        self._free.append(rec)
+        self.written += 1
+
+
+class _TelemetryWriter(logging.Handler):
+    """
+    Handler eseguito dal QueueListener: riceve (canale, record) e li scrive
+    come testo (via sink, con lo stesso formato dei log) o in binario.
+    """
+
+    def __init__(self, state_names, sink: logging.Handler = None,
+                 binary=None):
+        super().__init__()
+        self._names  = state_names
+        self._sink   = sink
+        self._binary = binary
+        self._pack   = struct.Struct(RECORD_FORMAT).pack
+
+    def handle(self, item):
+        channel, rec = item
+        try:
+            if self._binary is not None:
+                self._binary.write(self._pack(*rec))
+            else:
+                self._emit_text(rec)
+        finally:
+            channel._release(rec)
+        return True
+
+    def _emit_text(self, r):
+        msg = (f"[{self._names[r[2]]}] "
+               f"pos=({r[3]:.2f},{r[4]:.2f},{r[5]:.2f}) "
+               f"pitch={math.degrees(r[6]):.1f}° "
+               f"roll={math.degrees(r[7]):.1f}° | "
+               f"tgt=({r[8]:.1f},{r[9]:.1f},{r[10]:.1f}) "
+               f"vz_tgt={r[11]:.2f} "
+               f"dt={r[12]*1000:.1f}ms")
+        self._sink.handle(logging.makeLogRecord(
+            {"name": f"D{r[0]}", "levelno": logging.INFO,
+             "levelname": "INFO", "msg": msg}))
+
+
+class TelemetryLog:
+    """
+    Coda di telemetria condivisa da tutti gli agenti + thread di scrittura.
+
+        tlm = TelemetryLog(STATE_NAMES, binary_path=None)
+        tlm.start()
+        ch = tlm.channel(drone_id, every=1)
+        ch.record(tick, state_idx, x, y, z, ...)   # nel loop di controllo
+        tlm.stop()                                 # svuota la coda e chiude
+
+    binary_path=None → testo su stderr con il formato dei log;
+    altrimenti record binari RECORD_FORMAT appesi al file.
+    """
+
+    def __init__(self, state_names, queue_size: int = 4096,
+                 pool_size: int = 256, binary_path: str = None, stream=None):
+        self._q         = queue.Queue(queue_size)
+        self._pool_size = pool_size
+        self._channels: dict[int, TelemetryChannel] = {}
+        self._file      = open(binary_path, "ab") if binary_path else None
+        sink = None
+        if self._file is None:
+            sink = logging.StreamHandler(stream or sys.stderr)
+            sink.setFormatter(logging.Formatter(LOG_FORMAT, LOG_DATEFMT))
+        self._listener = logging.handlers.QueueListener(
+            self._q, _TelemetryWriter(state_names, sink, self._file))
+
+    def channel(self, drone_id: int, every: int = 1) -> TelemetryChannel:
+        ch = TelemetryChannel(self._q, drone_id, every, self._pool_size)
+        self._channels[drone_id] = ch
+        return ch
+
+    def start(self):
+        self._listener.start()
+
+    def stop(self):
+        self._listener.stop()
+        if self._file is not None:
+            self._file.close()
+
+    def stats(self) -> dict[int, tuple[int, int]]:
+        """{drone_id: (scritti, scartati)}"""
+        return {i: (ch.written, ch.dropped) for i, ch in self._channels.items()}
+
+
+def read_binary(path: str):
+    """Itera i record di un file binario di telemetria come dict."""
+    unpack = struct.Struct(RECORD_FORMAT).unpack
+    with open(path, "rb") as fh:
+        while True:
+            chunk = fh.read(RECORD_SIZE)
+            if len(chunk) < RECORD_SIZE:
+                return
+            yield dict(zip(RECORD_FIELDS, unpack(chunk)))
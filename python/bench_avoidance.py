@@ -0,0 +1,239 @@
+"""
+bench_avoidance.py — Costo e efficacia dell'evitamento collisioni
+(collision_avoidance.CollisionAvoidance).
+
+Costo: N droni fermi o in moto casuale su un'area quadrata a densità
+costante (--spacing m tra droni in media). Ogni drone ha la propria
+istanza, come DroneAgent:
+
+  update_peers : a SWARM_RATE_HZ (ammortizzato sui tick del controllo)
+  solve        : a ogni tick (ricerca vicini + vincoli + programma lineare)
+  grid / brute : sola ricerca dei vicini, con la griglia e senza
+                 (distanze verso tutti i peer)
+
+  µs/drone/tick = solve + update_peers · SWARM_RATE_HZ / PHYSICS_RATE_HZ
+
+Efficacia: N droni su una circonferenza che si scambiano di posto
+(tutti i percorsi si incrociano al centro). Due modelli:
+
+  punto : punti materiali con risposta in velocità del primo ordine
+          (--tau) e velocità desiderata dall'anello P di posizione
+          (kp 0.5, sat 3 m/s come MultirotorController)
+  quad  : anello chiuso come DroneAgent, MultirotorController +
+          quad_sim.QuadrotorModel a 60 Hz, override di velocità da
+          preferred_velocity() (come _avoid_collisions)
+
+Riporta la distanza minima tra due droni senza e con evitamento, da
+confrontare con 2·AGENT_RADIUS. Non è un limite garantito: ORCA suppone
+che la velocità scelta sia raggiunta subito e che le velocità dei peer
+siano note; con il ritardo di risposta del drone, le velocità stimate a
+SWARM_RATE_HZ e i vincoli infattibili al centro dell'incrocio (fallback
+a violazione minima) la separazione può scendere sotto, e SEP_MARGIN
+serve a compensarlo.
+
+Uso:
+    python bench_avoidance.py --sizes 50 200 --json out.json
+"""
+
+import argparse
+import json
+import math
+import time
+
+import numpy as np
+
+from collision_avoidance import CollisionAvoidance, MAX_SPEED, NEIGHBOR_DIST, AGENT_RADIUS
+from multirotor_controller import MultirotorController
+from quad_sim import QuadrotorModel
+
+PHYSICS_RATE_HZ = 60.0
+SWARM_RATE_HZ   = 10.0
+ALTITUDE        = 8.0
+KP_POS          = 0.5
+
+
+def _swarm(n: int, spacing: float, rng):
+    side = spacing * math.sqrt(n)
+    pos = np.column_stack((rng.uniform(0, side, n), np.full(n, ALTITUDE),
+                           rng.uniform(0, side, n)))
+    vel = rng.uniform(-MAX_SPEED, MAX_SPEED, (n, 2))
+    return pos, vel
+
+
+def _brute(pos, i):
+    d = pos[:, [0, 2]] - pos[i, [0, 2]]
+    dist2 = np.einsum('ij,ij->i', d, d)
+    dist2[i] = np.inf
+    return np.flatnonzero(dist2 < NEIGHBOR_DIST * NEIGHBOR_DIST)
+
+
+def bench_cost(n: int, spacing: float, ticks: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    pos, vel = _swarm(n, spacing, rng)
+    ids = np.arange(n)
+    status = np.full(n, 2.0)
+    avoiders = [CollisionAvoidance(n, i) for i in range(n)]
+
+    # Due viste a 0.1 s di distanza: velocità dei peer stimate
+    t_upd = 0.0
+    for a in avoiders:
+        a.update_peers(ids[ids != a.id], pos[ids != a.id], status[ids != a.id], t_upd)
+    pos[:, [0, 2]] += vel * 0.1
+    t_upd = 0.1
+    t0 = time.perf_counter()
+    for a in avoiders:
+        a.update_peers(ids[ids != a.id], pos[ids != a.id], status[ids != a.id], t_upd)
+    update_us = (time.perf_counter() - t0) / n * 1e6
+
+    prefs = rng.uniform(-MAX_SPEED, MAX_SPEED, (n, 2)).tolist()
+    own   = pos.tolist()
+    vels  = vel.tolist()
+    t0 = time.perf_counter()
+    for k in range(ticks):
+        t = t_upd + k / PHYSICS_RATE_HZ
+        for i, a in enumerate(avoiders):
+            a.solve(own[i], vels[i], prefs[i], t)
+    solve_us = (time.perf_counter() - t0) / (n * ticks) * 1e6
+
+    t0 = time.perf_counter()
+    for k in range(ticks):
+        for i, a in enumerate(avoiders):
+            a._grid.query(own[i][0], own[i][2])
+    grid_us = (time.perf_counter() - t0) / (n * ticks) * 1e6
+
+    t0 = time.perf_counter()
+    for k in range(ticks):
+        for i in range(n):
+            _brute(pos, i)
+    brute_us = (time.perf_counter() - t0) / (n * ticks) * 1e6
+
+    neighbors = [len(_brute(pos, i)) for i in range(n)]
+    return {
+        "n":                  n,
+        "mean_neighbors":     float(np.mean(neighbors)),
+        "update_peers_us":    update_us,
+        "solve_us":           solve_us,
+        "grid_search_us":     grid_us,
+        "brute_search_us":    brute_us,
+        "per_drone_tick_us":  solve_us + update_us * SWARM_RATE_HZ / PHYSICS_RATE_HZ,
+        "adjusted":           sum(a.adjusted for a in avoiders) / max(1, sum(a.solves for a in avoiders)),
+    }
+
+
+def _quad_step(c: MultirotorController, q: QuadrotorModel, dt: float):
+    p, v, r, w = q.pos, q.vel, q.rot, q.ang
+    f = c.evaluate(dt, z=p[1], vz=v[1], x=p[0], vx=v[0], y=p[2], vy=v[2],
+                   roll=r[2], roll_rate=w[2], pitch=r[0], pitch_rate=w[0])
+    q.step(dt, *f)
+
+
+def simulate_crossing(n: int, radius: float, tau: float, duration: float,
+                      avoid: bool, model: str = "point") -> dict:
+    """Scambio antipodale su una circonferenza; distanza minima e tempo di arrivo."""
+    ang  = 2 * math.pi * np.arange(n) / n
+    pos  = np.column_stack((radius * np.cos(ang), np.full(n, ALTITUDE), radius * np.sin(ang)))
+    goal = -pos[:, [0, 2]]
+    vel  = np.zeros((n, 2))
+    dt   = 1.0 / PHYSICS_RATE_HZ
+    quads = ctrls = None
+    if model == "quad":
+        quads = [QuadrotorModel(pos=tuple(p)) for p in pos.tolist()]
+        ctrls = [MultirotorController() for _ in range(n)]
+        for c, q, g in zip(ctrls, quads, goal.tolist()):
+            c.set_target(x=q.pos[0], y=q.pos[2], z=ALTITUDE)
+            for _ in range(int(2.0 / dt)):           # hover assestato prima della partenza
+                _quad_step(c, q, dt)
+            c.set_target(x=g[0], y=g[1])
+    every = int(PHYSICS_RATE_HZ / SWARM_RATE_HZ)
+    ids  = np.arange(n)
+    status = np.full(n, 1.0)
+    avoiders = [CollisionAvoidance(n, i) for i in range(n)] if avoid else []
+
+    min_dist = np.inf
+    arrived  = None
+    steps = int(duration / dt)
+    for k in range(steps):
+        t = k * dt
+        if avoid and k % every == 0:
+            for a in avoiders:
+                m = ids != a.id
+                a.update_peers(ids[m], pos[m], status[m], t)
+        err  = goal - pos[:, [0, 2]]
+        if model == "quad":
+            for i, (c, q) in enumerate(zip(ctrls, quads)):
+                if avoid:
+                    v = avoiders[i].solve(tuple(q.pos), vel[i].tolist(),
+                                          c.preferred_velocity(q.pos[0], q.pos[2]), t)
+                    if v is None:
+                        c.clear_velocity_override()
+                    else:
+                        c.set_velocity_override(*v)
+                _quad_step(c, q, dt)
+                pos[i] = q.pos
+                vel[i] = (q.vel[0], q.vel[2])
+        else:
+            pref = np.clip(KP_POS * err, -MAX_SPEED, MAX_SPEED)
+            cmd  = pref.copy()
+            if avoid:
+                for i, a in enumerate(avoiders):
+                    v = a.solve(pos[i].tolist(), vel[i].tolist(), pref[i].tolist(), t)
+                    if v is not None:
+                        cmd[i] = v
+            vel += (cmd - vel) * (dt / tau)
+            pos[:, [0, 2]] += vel * dt
+
+        d = pos[:, None, [0, 2]] - pos[None, :, [0, 2]]
+        dist = np.sqrt(np.einsum('ijk,ijk->ij', d, d))
+        np.fill_diagonal(dist, np.inf)
+        min_dist = min(min_dist, float(dist.min()))
+        if arrived is None and np.all(np.hypot(*err.T) < 1.0):
+            arrived = t
+    return {"n": n, "model": model, "avoid": avoid, "min_dist": min_dist, "arrival_s": arrived}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark evitamento collisioni (ORCA)")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[50, 200])
+    ap.add_argument("--spacing", type=float, default=6.0,
+                    help="[m] distanza media tra droni (densità)")
+    ap.add_argument("--ticks", type=int, default=20, help="tick di solve per drone")
+    ap.add_argument("--cross", type=int, nargs="+", default=[8, 24],
+                    help="droni nella prova di incrocio")
+    ap.add_argument("--tau", type=float, default=0.5,
+                    help="[s] costante di tempo della risposta in velocità (modello punto)")
+    ap.add_argument("--models", nargs="+", default=["point", "quad"],
+                    choices=["point", "quad"], help="modelli del drone nella prova di incrocio")
+    ap.add_argument("--json", help="salva i risultati in questo file")
+    args = ap.parse_args()
+
+    cost = []
+    print(f"{'N':>4s} {'vicini':>6s} | {'update':>8s} {'solve':>8s} | {'grid':>6s} "
+          f"{'brute':>6s} | {'µs/drone/tick':>13s} {'corretti':>8s}")
+    for n in args.sizes:
+        r = bench_cost(n, args.spacing, args.ticks)
+        cost.append(r)
+        print(f"{n:4d} {r['mean_neighbors']:6.1f} | {r['update_peers_us']:8.1f} "
+              f"{r['solve_us']:8.1f} | {r['grid_search_us']:6.1f} "
+              f"{r['brute_search_us']:6.1f} | "
+              f"{r['per_drone_tick_us']:13.1f} {100 * r['adjusted']:7.1f}%")
+
+    crossing = []
+    print(f"\n{'N':>4s} {'modello':>7s} {'evit.':>5s} | {'dist. min [m]':>13s} {'arrivo [s]':>10s}"
+          f"   (2·AGENT_RADIUS = {2 * AGENT_RADIUS:.1f} m)")
+    for n in args.cross:
+        for model in args.models:
+            for avoid in (False, True):
+                r = simulate_crossing(n, radius=max(15.0, 1.5 * n), tau=args.tau,
+                                      duration=60.0, avoid=avoid, model=model)
+                crossing.append(r)
+                arr = f"{r['arrival_s']:10.1f}" if r["arrival_s"] is not None else f"{'—':>10s}"
+                print(f"{n:4d} {model:>7s} {'sì' if avoid else 'no':>5s} | "
+                      f"{r['min_dist']:13.2f} {arr}")
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump({"cost": cost, "crossing": crossing}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
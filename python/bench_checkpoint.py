@@ -0,0 +1,224 @@
+"""
+bench_checkpoint.py — Costo dei checkpoint e ripartenza a caldo di un agente
+(checkpoint.CheckpointStore, DroneAgent con checkpoint=...).
+
+Costo (micro-benchmark, senza rete):
+  capture  : snapshot del controller + Checkpoint + pack + save(), cioè il
+             lavoro del task "checkpoint" nel thread dell'agente [µs]
+  write    : scrittura atomica di un file dal thread dello store [µs]
+  load     : lettura del file + verifica CRC + unpack [µs]
+  restore  : MultirotorController.restore() [µs]
+  swarm    : N agenti a CHECKPOINT_RATE_HZ → file scritti al secondo e
+             carico del writer (frazione di un core)
+
+Ripartenza (--restart, tempo reale): broker + headless_world.HeadlessWorld
++ N DroneAgent con CheckpointStore. A --kill-at secondi l'agente 0 viene
+fermato (senza checkpoint finale, come un crash) e dopo --gap secondi se ne
+avvia uno nuovo, a caldo (stesso store) e a freddo (nessun checkpoint).
+Riporta per il drone 0 dopo la ripartenza:
+  resume_ms  : dall'avvio del nuovo agente al primo tick elaborato
+  state      : stato FSM al primo tick elaborato
+  alt_sag    : massimo scostamento di quota nei 5 s successivi [m]
+  wp         : waypoint prima dell'arresto e 5 s dopo la ripartenza
+  to_explore : secondi fino al ritorno in EXPLORING
+
+Uso:
+    python bench_checkpoint.py --sizes 5 50 200
+    python bench_checkpoint.py --restart --drones 3 --json out.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from checkpoint import Checkpoint, CheckpointStore, CHECKPOINT_SIZE
+from multirotor_controller import MultirotorController
+
+HOST         = '127.0.0.1'
+SETTLE_AFTER = 5.0      # [s] finestra di osservazione dopo la ripartenza
+
+
+def _timeit(fn, reps: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        fn()
+    return (time.perf_counter() - t0) / reps * 1e6
+
+
+def bench_cost(n: int, reps: int, rate_hz: float) -> dict:
+    ctrl = MultirotorController()
+    ctrl.evaluate(1 / 60, 7.9, 0.1, 1.0, 0.2, 2.0, 0.3, 0.01, 0.0, 0.02, 0.0)
+    with tempfile.TemporaryDirectory() as d:
+        store = CheckpointStore(d)           # writer non avviato: solo il costo di save()
+        seq = [0]
+
+        def capture():
+            seq[0] += 1
+            store.save(Checkpoint(seq[0] % n, n, seq[0], time.time(), 3, 7, 2.0,
+                                  [10.0, 0.0, -55.0], 1.5, 0.0, ctrl.snapshot()).pack())
+
+        capture_us = _timeit(capture, reps)
+        data = Checkpoint(0, n, 1, time.time(), 3, 7, None, None, 0.0, 0.0,
+                          ctrl.snapshot()).pack()
+        write_us = _timeit(lambda: store._write(0, data), max(1, reps // 20))
+        load_us  = _timeit(lambda: store.load(0), reps // 4)
+        cp = store.load(0)
+        restore_us = _timeit(lambda: ctrl.restore(cp.ctrl), reps)
+
+    writes_per_s = n * rate_hz
+    return {
+        "n":            n,
+        "record_bytes": CHECKPOINT_SIZE,
+        "capture_us":   capture_us,
+        "write_us":     write_us,
+        "load_us":      load_us,
+        "restore_us":   restore_us,
+        "writes_per_s": writes_per_s,
+        "writer_load":  writes_per_s * write_us * 1e-6,
+        "agent_load":   rate_hz * capture_us * 1e-6,     # frazione di core per agente
+    }
+
+
+# ---------------------------------------------------------------------------
+# Ripartenza in tempo reale
+# ---------------------------------------------------------------------------
+
+def _start_agent(agent):
+    t = threading.Thread(target=agent.run, name=f"Drone-{agent.id}", daemon=True)
+    t.start()
+    return t
+
+
+def run_restart(n: int, warm: bool, kill_at: float, gap: float, seed: int = 0) -> dict:
+    from async_log import TelemetryLog
+    from broker import Broker
+    from drone_agent import DroneAgent, State, STATE_NAMES, TAKEOFF_ALT
+    from headless_world import HeadlessWorld
+    logging.getLogger().setLevel(logging.WARNING)   # dopo setup_logging di drone_agent
+
+    broker = Broker(HOST, 0)
+    broker.start()
+    world = HeadlessWorld(broker, n, seed=seed)
+    tlm   = TelemetryLog(STATE_NAMES, binary_path=os.devnull)
+    tlm.start()
+    tmp   = tempfile.TemporaryDirectory()
+    store = CheckpointStore(tmp.name)
+    store.start()
+
+    barrier = threading.Barrier(n)
+    agents  = [DroneAgent(i, n, telemetry=tlm, port=broker.port, start_barrier=barrier,
+                          checkpoint=store) for i in range(n)]
+    for a in agents:
+        a.setup()
+    threads = [_start_agent(a) for a in agents]
+    world.start()
+
+    while world.sim_time < kill_at:
+        time.sleep(0.05)
+    old = agents[0]
+    old.stop()                               # niente checkpoint finale: come un crash
+    threads[0].join(timeout=1.0)
+    state_before, wp_before = old.state, old._wp_idx
+    time.sleep(gap)
+
+    t_start, wall_start = time.monotonic(), time.time()
+    new = DroneAgent(0, n, telemetry=tlm, port=broker.port,
+                     checkpoint=store if warm else None)
+    agents[0] = new
+    threads[0] = _start_agent(new)
+
+    q = world.quads[0]
+    first_state = None
+    t_explore = None
+    sag = 0.0
+    t_end = t_start + SETTLE_AFTER
+    while time.monotonic() < t_end or (t_explore is None and time.monotonic() < t_end + 15.0):
+        now = time.monotonic()
+        if first_state is None and new.t_first_tick is not None:
+            first_state = new.state
+        if new.state == State.EXPLORING and t_explore is None:
+            t_explore = now
+        if now < t_end:
+            sag = max(sag, abs(q.pos[1] - TAKEOFF_ALT))
+        time.sleep(0.005)
+    wp_after = new._wp_idx
+
+    for a in agents:
+        a.stop()
+    for t in threads:
+        t.join(timeout=1.0)
+    world.stop()
+    world.join(timeout=1.0)
+    store.stop()
+    tlm.stop()
+    broker.stop()
+    tmp.cleanup()
+
+    return {
+        "n":            n,
+        "warm":         warm,
+        "resumed_seq":  new.resumed.seq if new.resumed is not None else None,
+        "ckpt_age_s":   wall_start - new.resumed.time if new.resumed is not None else None,
+        "resume_ms":    1000.0 * (new.t_first_tick - t_start) if new.t_first_tick else None,
+        "state_before": state_before,
+        "state":        first_state,
+        "alt_sag":      sag,
+        "wp_before":    wp_before,
+        "wp_after":     wp_after,
+        "to_explore_s": t_explore - t_start if t_explore else None,
+        "crashed":      world.crashed,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark checkpoint e ripartenza a caldo")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[5, 50, 200])
+    ap.add_argument("--reps", type=int, default=20000)
+    ap.add_argument("--rate", type=float, default=None,
+                    help="[Hz] checkpoint per agente (default CHECKPOINT_RATE_HZ)")
+    ap.add_argument("--restart", action="store_true", help="prova di ripartenza in tempo reale")
+    ap.add_argument("--drones", type=int, default=3)
+    ap.add_argument("--kill-at", type=float, default=25.0, help="[s] simulati")
+    ap.add_argument("--gap", type=float, default=0.5, help="[s] tra arresto e riavvio")
+    ap.add_argument("--json", help="salva i risultati in questo file")
+    args = ap.parse_args()
+
+    from drone_agent import CHECKPOINT_RATE_HZ
+    rate = args.rate or CHECKPOINT_RATE_HZ
+
+    cost = []
+    print(f"{'N':>4s} | {'capture':>8s} {'write':>8s} {'load':>8s} {'restore':>8s} [µs] | "
+          f"{'file/s':>7s} {'writer':>7s}")
+    for n in args.sizes:
+        r = bench_cost(n, args.reps, rate)
+        cost.append(r)
+        print(f"{n:4d} | {r['capture_us']:8.2f} {r['write_us']:8.1f} {r['load_us']:8.1f} "
+              f"{r['restore_us']:8.2f}      | {r['writes_per_s']:7.0f} "
+              f"{100 * r['writer_load']:6.2f}%")
+    print(f"record: {CHECKPOINT_SIZE} byte, {rate:g} Hz per agente")
+
+    restart = []
+    if args.restart:
+        print(f"\n{'avvio':>6s} | {'ckpt':>5s} {'ripresa':>8s} {'stato':>11s} | "
+              f"{'cedimento':>9s} {'wp prima/dopo':>13s} {'→EXPLORING':>10s}")
+        for warm in (True, False):
+            r = run_restart(args.drones, warm, args.kill_at, args.gap)
+            restart.append(r)
+            seq = f"#{r['resumed_seq']}" if r["resumed_seq"] is not None else "—"
+            resume = f"{r['resume_ms']:6.1f}ms" if r["resume_ms"] is not None else f"{'—':>8s}"
+            expl = f"{r['to_explore_s']:9.1f}s" if r["to_explore_s"] is not None else f"{'—':>10s}"
+            print(f"{'caldo' if warm else 'freddo':>6s} | {seq:>5s} {resume} "
+                  f"{str(r['state']):>11s} | {r['alt_sag']:8.2f}m "
+                  f"{r['wp_before']:>6d}/{r['wp_after']:<6d} {expl}")
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump({"rate_hz": rate, "cost": cost, "restart": restart}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+bench_clusters.py — Traffico in ingresso per agente e latenza di decisione
+in funzione di N, con e senza aggregazione a cluster (swarm_clusters.py).
+
+Ogni prova in tempo reale, nello stesso processo: broker.Broker +
+headless_world.HeadlessWorld + N DroneAgent (come fault_scenarios). Dopo
+il decollo il mondo accende un incendio ogni --fire-every secondi in
+posizioni casuali dell'area.
+
+Metriche per prova (n, cluster_size; 0 = tutti i peer):
+  topics        : topic di swarm sottoscritti per agente (peer + riassunti)
+  swarm_rx_s    : pacchetti di swarm ricevuti al secondo per agente
+                  (classe best-effort: stato dei peer e riassunti, compresi
+                  quelli accorpati o scartati)
+  total_rx_s    : tutti i pacchetti ricevuti al secondo per agente
+                  (compresi sensori e tick del proprio drone, 60 Hz)
+  decision      : dall'annuncio dell'incendio al primo agente che lo prende
+                  in carico [ms], media e massimo
+  responders    : agenti che hanno preso in carico ciascun incendio (ideale 1)
+  unanswered    : incendi che nessuno ha preso in carico
+
+--topics-only stampa solo il conteggio dei topic (anche per N grandi,
+senza eseguire nulla).
+
+Uso:
+    python bench_clusters.py --sizes 8 16 32 --cluster 0 8 --json out.json
+    python bench_clusters.py --topics-only --sizes 50 200 500 --cluster 0 8 16
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+from swarm_clusters import n_clusters, visible_clusters, cluster_of, members, SUMMARY_FIELDS
+
+HOST         = '127.0.0.1'
+PEER_TOPICS  = 7          # status, sx, sy, sz, fire_x, fire_y, fire_z
+FIRE_START   = 15.0       # [s] simulati: dopo decollo e hover
+POLL         = 0.002      # [s] campionamento degli stati degli agenti
+
+
+def swarm_topics(n: int, cluster_size: int, drone_id: int = None) -> int:
+    """Topic di swarm sottoscritti da un agente (il primo di un cluster centrale)."""
+    from drone_agent import CLUSTER_SUMMARY_REACH
+    if cluster_size <= 0:
+        return PEER_TOPICS * (n - 1)
+    if drone_id is None:
+        drone_id = cluster_size * (n_clusters(n, cluster_size) // 2)
+    c = cluster_of(drone_id, cluster_size)
+    peers = len(members(c, n, cluster_size)) - 1
+    neighbors = len(visible_clusters(c, n, cluster_size, CLUSTER_SUMMARY_REACH)) - 1
+    return PEER_TOPICS * peers + len(SUMMARY_FIELDS) * neighbors
+
+
+def _swarm_rx(agent) -> int:
+    """Pacchetti best-effort ricevuti (applicati + accorpati + scartati per età)."""
+    from dds import QOS_BEST_EFFORT
+    st = agent.dds.qos_stats()[QOS_BEST_EFFORT]
+    return st["received"] + st["coalesced"] + st["dropped"]
+
+
+def run(n: int, cluster_size: int, duration: float, fire_every: float, seed: int = 0) -> dict:
+    from async_log import TelemetryLog
+    from broker import Broker
+    from drone_agent import DroneAgent, STATE_NAMES, AREA_SIZE
+    from headless_world import HeadlessWorld, FIRE_MARGIN
+    logging.getLogger().setLevel(logging.WARNING)   # dopo setup_logging di drone_agent
+
+    rng  = random.Random(seed)
+    half = AREA_SIZE / 2 - FIRE_MARGIN
+    n_fires = max(1, int((duration - FIRE_START) / fire_every))
+    fires = [(FIRE_START + k * fire_every, (rng.uniform(-half, half), 0.0, rng.uniform(-half, half)))
+             for k in range(n_fires)]
+
+    broker = Broker(HOST, 0)
+    broker.start()
+    world = HeadlessWorld(broker, n, fires=fires, area_size=AREA_SIZE, seed=seed)
+    tlm   = TelemetryLog(STATE_NAMES, binary_path=os.devnull)
+    tlm.start()
+    barrier = threading.Barrier(n)
+    agents  = [DroneAgent(i, n, telemetry=tlm, port=broker.port, start_barrier=barrier,
+                          cluster_size=cluster_size) for i in range(n)]
+    for a in agents:
+        a.setup()
+    threads = [threading.Thread(target=a.run, name=f"Drone-{a.id}", daemon=True)
+               for a in agents]
+    for t in threads:
+        t.start()
+    world.start()
+
+    # Traffico misurato dal primo incendio in poi (swarm in volo)
+    while world.sim_time < FIRE_START:
+        time.sleep(0.05)
+    rx0 = [(a.dds.rx_broker, _swarm_rx(a)) for a in agents]
+    t0  = time.monotonic()
+    taken: dict[float, float] = {}              # fire_id → primo istante di presa in carico
+    responders: dict[float, set] = {}
+    t_end = t0 + duration - FIRE_START
+    while time.monotonic() < t_end:
+        now = time.monotonic()
+        for a in agents:
+            fid = a.fire_id
+            if fid is not None:
+                taken.setdefault(fid, now)
+                responders.setdefault(fid, set()).add(a.id)
+        time.sleep(POLL)
+    elapsed = time.monotonic() - t0
+    rx = [(a.dds.rx_broker - r[0], _swarm_rx(a) - r[1]) for a, r in zip(agents, rx0)]
+
+    for a in agents:
+        a.stop()
+    for t in threads:
+        t.join(timeout=1.0)
+    world.stop()
+    world.join(timeout=1.0)
+    broker.stop()
+    tlm.stop()
+
+    latency = [1000.0 * (taken[fid] - f["t_spawn"]) for fid, f in world.fires.items()
+               if fid in taken]
+    spawned = len(world.fires)
+    return {
+        "n":             n,
+        "cluster_size":  cluster_size,
+        "topics":        swarm_topics(n, cluster_size),
+        "swarm_rx_s":    sum(r[1] for r in rx) / n / elapsed,
+        "total_rx_s":    sum(r[0] for r in rx) / n / elapsed,
+        "fires":         spawned,
+        "decision_ms":   sum(latency) / len(latency) if latency else None,
+        "decision_max_ms": max(latency) if latency else None,
+        "responders":    (sum(len(responders[f]) for f in taken) / len(taken)) if taken else None,
+        "unanswered":    spawned - len(latency),
+        "realtime":      world.sim_time / (time.monotonic() - world.t0) if world.t0 else None,
+    }
+
+
+def _fmt(v, spec: str, width: int) -> str:
+    return f"{v:{width}{spec}}" if v is not None else f"{'—':>{width}s}"
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark aggregazione a cluster dello stato swarm")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[8, 16, 32])
+    ap.add_argument("--cluster", type=int, nargs="+", default=[0, 8],
+                    help="droni per cluster (0 = tutti i peer)")
+    ap.add_argument("--duration", type=float, default=75.0, help="[s] reali per prova")
+    ap.add_argument("--fire-every", type=float, default=10.0, help="[s] simulati tra incendi")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--topics-only", action="store_true")
+    ap.add_argument("--json", help="salva i risultati in questo file")
+    args = ap.parse_args()
+
+    results = []
+    if args.topics_only:
+        print(f"{'N':>5s} " + " ".join(f"{f'cluster {c}':>10s}" for c in args.cluster))
+        for n in args.sizes:
+            row = [swarm_topics(n, c) for c in args.cluster]
+            results.append({"n": n, "topics": dict(zip(args.cluster, row))})
+            print(f"{n:5d} " + " ".join(f"{t:10d}" for t in row))
+    else:
+        print(f"{'N':>4s} {'cluster':>7s} | {'topic':>5s} {'swarm rx/s':>10s} {'tot rx/s':>8s} | "
+              f"{'fuochi':>6s} {'decisione':>9s} {'max':>7s} {'risp.':>5s} {'senza':>5s} | {'RT':>4s}")
+        for n in args.sizes:
+            for c in args.cluster:
+                r = run(n, c, args.duration, args.fire_every, args.seed)
+                results.append(r)
+                print(f"{n:4d} {c if c else '—':>7} | {r['topics']:5d} {r['swarm_rx_s']:10.1f} "
+                      f"{r['total_rx_s']:8.1f} | {r['fires']:6d} "
+                      f"{_fmt(r['decision_ms'], '.0f', 7)}ms {_fmt(r['decision_max_ms'], '.0f', 5)}ms "
+                      f"{_fmt(r['responders'], '.2f', 5)} {r['unanswered']:5d} | "
+                      f"{_fmt(r['realtime'], '.2f', 4)}")
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump({"duration": args.duration, "fire_every": args.fire_every,
+                       "results": results}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+bench_multicast.py — Fan-out dei topic di swarm: broker unicast vs multicast.
+
+Per ogni N vengono simulati N agenti (client DDS veri, in un processo) che
+pubblicano i 7 topic di swarm (status, sx..sz, fire_x..z) a --rate Hz e
+sottoscrivono quelli di tutti i peer, come DroneAgent:
+
+  broker    : tutto passa dal broker (broker.py, processo separato), che
+              inoltra ogni pacchetto agli N−1 subscriber → O(N²) sendto
+  multicast : sx..sz solo al gruppo, status/fire_* al gruppo + broker
+              (come con SWARM_MULTICAST; il broker li riceve per l'HUD ma
+              non ha subscriber remoti da servire)
+
+Misure:
+  broker_cpu   : secondi di CPU del processo broker / durata della prova
+  clients_cpu  : idem per il processo degli agenti
+  broker_tx/s  : pacchetti inviati dal broker al secondo
+  delivery     : aggiornamenti ricevuti / attesi (N·(N−1)·7 per giro)
+
+Uso:
+    python bench_multicast.py --sizes 5 10 20 40 --rate 10 --duration 3
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import time
+
+from broker import Broker
+from dds import DDS, PATH_MULTICAST, PATH_BOTH
+
+HOST         = '127.0.0.1'
+MCAST_ADDR   = '239.255.44.44'
+SWARM_TOPICS = ("status", "sx", "sy", "sz", "fire_x", "fire_y", "fire_z")
+
+
+def _cpu() -> float:
+    t = os.times()
+    return t.user + t.system
+
+
+def _broker_proc(port: int, ready, go, done, result):
+    broker = Broker(HOST, port)
+    broker.start()
+    ready.set()
+    go.wait()                                # agenti sottoscritti: inizio misura
+    cpu0, rx0, tx0 = _cpu(), broker.rx_packets, broker.tx_packets
+    done.wait()
+    result.put({"cpu": _cpu() - cpu0,
+                "rx":  broker.rx_packets - rx0,
+                "tx":  broker.tx_packets - tx0})
+    broker.stop()
+
+
+def _clients_proc(n: int, port: int, mcast_port: int, multicast: bool,
+                  rate: float, duration: float, go, done, result):
+    group  = (MCAST_ADDR, mcast_port) if multicast else None
+    agents = [DDS(HOST, port, multicast=group) for _ in range(n)]
+    for i, dds in enumerate(agents):
+        dds.start()
+        own   = [f"drone_{i}/{k}" for k in SWARM_TOPICS]
+        peers = [f"drone_{j}/{k}" for j in range(n) if j != i for k in SWARM_TOPICS]
+        dds.subscribe(peers, snapshot=False, multicast=multicast)
+        dds.set_publish_path(own[1:4], PATH_MULTICAST)
+        dds.set_publish_path([own[0]] + own[4:], PATH_BOTH)
+    time.sleep(0.5)                          # sottoscrizioni registrate
+
+    go.set()
+    cpu0   = _cpu()
+    rounds = 0
+    period = 1.0 / rate
+    t0     = time.monotonic()
+    next_t = t0
+    while time.monotonic() - t0 < duration:
+        rounds += 1
+        for i, dds in enumerate(agents):
+            for k in SWARM_TOPICS:
+                dds.publish(f"drone_{i}/{k}", float(rounds))
+        next_t += period
+        pause = next_t - time.monotonic()
+        if pause > 0:
+            time.sleep(pause)
+    elapsed = time.monotonic() - t0
+    time.sleep(0.3)                          # coda in volo
+    cpu = _cpu() - cpu0
+    done.set()
+
+    received = 0
+    for i, dds in enumerate(agents):
+        for j in range(n):
+            if j != i:
+                received += sum(dds.seq(f"drone_{j}/{k}") for k in SWARM_TOPICS)
+        dds.stop()
+    result.put({
+        "rounds":   rounds,
+        "elapsed":  elapsed,
+        "cpu":      cpu,
+        "received": received,
+        "expected": rounds * n * (n - 1) * len(SWARM_TOPICS),
+        "multicast_enabled": all(a.multicast_enabled for a in agents) if multicast else False,
+    })
+
+
+def run(n: int, multicast: bool, port: int, rate: float, duration: float) -> dict:
+    ready, go, done = mp.Event(), mp.Event(), mp.Event()
+    b_result, c_result = mp.Queue(), mp.Queue()
+    broker = mp.Process(target=_broker_proc, args=(port, ready, go, done, b_result))
+    broker.start()
+    ready.wait()
+
+    clients = mp.Process(target=_clients_proc,
+                         args=(n, port, port + 1, multicast, rate, duration,
+                               go, done, c_result))
+    clients.start()
+    c = c_result.get(timeout=duration + 60)
+    b = b_result.get(timeout=10)
+    clients.join(timeout=5)
+    broker.join(timeout=5)
+
+    elapsed = c["elapsed"]
+    return {
+        "n":             n,
+        "mode":          "multicast" if multicast else "broker",
+        "multicast_enabled": c["multicast_enabled"],
+        "broker_cpu":    b["cpu"] / elapsed,
+        "clients_cpu":   c["cpu"] / elapsed,
+        "broker_rx_per_s": b["rx"] / elapsed,
+        "broker_tx_per_s": b["tx"] / elapsed,
+        "delivery":      c["received"] / c["expected"] if c["expected"] else 1.0,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark fan-out swarm: broker vs multicast")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[5, 10, 20, 40])
+    ap.add_argument("--rate", type=float, default=10.0, help="[Hz] pubblicazione per agente")
+    ap.add_argument("--duration", type=float, default=3.0, help="[s] per prova")
+    ap.add_argument("--port", type=int, default=46444)
+    ap.add_argument("--json", help="salva i risultati in questo file")
+    args = ap.parse_args()
+
+    results = []
+    print(f"{'N':>4s} {'modo':>10s} | {'CPU broker':>10s} {'CPU agenti':>10s} | "
+          f"{'rx/s':>8s} {'tx/s':>9s} | {'consegna':>8s}")
+    for n in args.sizes:
+        for multicast in (False, True):
+            r = run(n, multicast, args.port, args.rate, args.duration)
+            results.append(r)
+            mode = r["mode"] if not multicast or r["multicast_enabled"] else "mc-off"
+            print(f"{n:4d} {mode:>10s} | {100 * r['broker_cpu']:9.1f}% "
+                  f"{100 * r['clients_cpu']:9.1f}% | {r['broker_rx_per_s']:8.0f} "
+                  f"{r['broker_tx_per_s']:9.0f} | {100 * r['delivery']:7.1f}%")
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump({"cpus": os.cpu_count(), "rate": args.rate,
+                       "results": results}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
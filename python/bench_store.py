@@ -0,0 +1,187 @@
+"""
+bench_store.py — Memoria e costo per pacchetto dell'archivio dei topic DDS.
+
+Confronta, per N droni, i topic sottoscritti da un agente
+(14 propri + 7 per ogni peer + 5 world/*):
+
+  per_topic : un oggetto con Lock + Condition per topic e notify_all a ogni
+              pacchetto (schema precedente, riprodotto qui come riferimento)
+  array     : _VariableStore di dds.py (array tipizzati, Condition solo per
+              i topic attesi) tramite il vero DDS._on_publish
+
+Misure:
+  memoria  : byte allocati (tracemalloc) per l'archivio di un agente e
+             stima per lo swarm (N agenti)
+  costo    : ns per pacchetto PUBLISH decodificato e applicato, con un
+             thread in attesa su tick (come il loop dell'agente)
+
+Uso:
+    python bench_store.py --sizes 5 50 200 --packets 200000 --json out.json
+"""
+
+import argparse
+import json
+import struct
+import threading
+import time
+import tracemalloc
+
+from dds import DDS, DDS_TYPE_FLOAT, DDS_TYPE_INT
+from broker import build_publish_packet
+
+
+# ---------------------------------------------------------------------------
+# Riferimento: un Lock + Condition per topic
+# ---------------------------------------------------------------------------
+
+class _PerTopicVariable:
+    def __init__(self):
+        self._lock      = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self.value      = None
+        self.seq        = 0
+
+    def notify(self, val):
+        with self._condition:
+            self.value = val
+            self.seq  += 1
+            self._condition.notify_all()
+
+
+class _PerTopicStore:
+    def __init__(self, names):
+        self.variables = {name: _PerTopicVariable() for name in names}
+
+    def on_publish(self, data: bytes):
+        dtype  = data[1]
+        n_len  = data[2]
+        name   = data[3: 3 + n_len].decode('utf-8')
+        val_start = 3 + n_len
+        if dtype == DDS_TYPE_FLOAT:
+            value = struct.unpack('<f', data[val_start: val_start + 4])[0]
+        elif dtype == DDS_TYPE_INT:
+            value = struct.unpack('<i', data[val_start: val_start + 4])[0]
+        else:
+            return
+        var = self.variables.get(name)
+        if var:
+            var.notify(value)
+
+
+# ---------------------------------------------------------------------------
+# Topic di un agente (come DroneAgent._setup_dds)
+# ---------------------------------------------------------------------------
+
+def agent_topics(n: int, drone_id: int = 0) -> list[str]:
+    p = f"drone_{drone_id}"
+    names = [f"{p}/{k}" for k in ("X", "Y", "Z", "VX", "VY", "VZ", "TX", "TY",
+                                   "TZ", "WX", "WY", "WZ", "tick", "connected")]
+    for i in range(n):
+        if i != drone_id:
+            names += [f"drone_{i}/{k}" for k in
+                      ("status", "sx", "sy", "sz", "fire_x", "fire_y", "fire_z")]
+    names += ["world/fire_new", "world/fire_x", "world/fire_y", "world/fire_z",
+              "world/fire_resolved"]
+    return names
+
+
+def _measure_alloc(build) -> tuple[int, object]:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    obj = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, obj
+
+
+def _time_packets(apply, packets: list[bytes], n_packets: int) -> float:
+    """ns medi per pacchetto (giri sull'elenco fino a n_packets)."""
+    reps = max(1, n_packets // len(packets))
+    t0 = time.perf_counter_ns()
+    for _ in range(reps):
+        for pkt in packets:
+            apply(pkt)
+    return (time.perf_counter_ns() - t0) / (reps * len(packets))
+
+
+def _waiter(wait_fn, stop: threading.Event):
+    while not stop.is_set():
+        wait_fn()
+
+
+def bench_size(n: int, n_packets: int) -> dict:
+    names   = agent_topics(n)
+    packets = [build_publish_packet(name, DDS_TYPE_FLOAT, 1.5) for name in names]
+    tick    = "drone_0/tick"
+
+    # --- per_topic ---------------------------------------------------------
+    mem_old, old = _measure_alloc(lambda: _PerTopicStore(names))
+    stop = threading.Event()
+    tick_var = old.variables[tick]
+
+    def wait_old():
+        with tick_var._condition:
+            seq = tick_var.seq
+            tick_var._condition.wait_for(lambda: tick_var.seq != seq, 0.05)
+
+    th = threading.Thread(target=_waiter, args=(wait_old, stop), daemon=True)
+    th.start()
+    ns_old = _time_packets(old.on_publish, packets, n_packets)
+    stop.set()
+    th.join()
+
+    # --- array (dds.DDS) ---------------------------------------------------
+    dds = DDS('127.0.0.1', 9)               # nessun thread, solo il socket
+    mem_new, _ = _measure_alloc(lambda: dds.subscribe(names))
+    stop = threading.Event()
+
+    def wait_new():
+        dds.wait_newer(tick, dds.seq(tick), 0.05)
+
+    th = threading.Thread(target=_waiter, args=(wait_new, stop), daemon=True)
+    th.start()
+    ns_new = _time_packets(dds._on_publish, packets, n_packets)
+    stop.set()
+    th.join()
+    dds._sock.close()
+
+    return {
+        "topics_per_agent":    len(names),
+        "per_topic_bytes":     mem_old,
+        "array_bytes":         mem_new,
+        "per_topic_swarm_mb":  mem_old * n / 1e6,
+        "array_swarm_mb":      mem_new * n / 1e6,
+        "per_topic_ns_packet": ns_old,
+        "array_ns_packet":     ns_new,
+        "conditions_allocated": dds._store.n_waited(),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark archivio topic DDS")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[5, 50, 200])
+    ap.add_argument("--packets", type=int, default=200000,
+                    help="pacchetti per misura del costo")
+    ap.add_argument("--json", help="salva i risultati in questo file")
+    args = ap.parse_args()
+
+    results = {}
+    print(f"{'N':>4s} {'topic':>6s} | {'mem/agente':>21s} | {'mem swarm [MB]':>17s} | "
+          f"{'ns/pacchetto':>15s}")
+    print(f"{'':>4s} {'':>6s} | {'per_topic':>10s} {'array':>10s} | "
+          f"{'per_topic':>8s} {'array':>8s} | {'per_topic':>7s} {'array':>7s}")
+    for n in args.sizes:
+        r = bench_size(n, args.packets)
+        results[n] = r
+        print(f"{n:4d} {r['topics_per_agent']:6d} | "
+              f"{r['per_topic_bytes']:10d} {r['array_bytes']:10d} | "
+              f"{r['per_topic_swarm_mb']:8.2f} {r['array_swarm_mb']:8.2f} | "
+              f"{r['per_topic_ns_packet']:7.0f} {r['array_ns_packet']:7.0f}")
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
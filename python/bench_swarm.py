@@ -0,0 +1,280 @@
+"""
+bench_swarm.py — Scalabilità dello stack completo: N droni × frequenza di
+incendi, senza Godot.
+
+Ogni prova usa due processi, come simulatore e agenti reali:
+
+  mondo   : broker.Broker + headless_world.HeadlessWorld (fisica quad_sim
+            a 60 Hz in tempo reale, incendi di Poisson a --fire-rates
+            incendi per minuto simulato)
+  agenti  : N DroneAgent veri (thread, dds.DDS via UDP, MultirotorController),
+            avviati come main.py (sottoscrizioni in blocco + barriera)
+
+La misura parte quando tutti gli agenti sono pronti (primo tick elaborato,
+dopo connessione e barriera) e dura --duration secondi reali.
+
+Metriche per prova (n, fire_rate):
+  ticks_per_s      : tick elaborati al secondo per agente (ideale 60)
+  deadline_miss    : frazione di frame in volo in cui il mondo ha applicato
+                     forze non aggiornate (controllo in ritardo sul tick),
+                     nella finestra misurata
+  deferred_per_s   : task a bassa frequenza rinviati per sforamento di
+                     FRAME_BUDGET, al secondo per agente
+  forced_per_s     : task eseguiti oltre il budget dopo MAX_DEFER rinvii
+                     (scheduler.py), al secondo per agente
+  broker_rx/tx_per_s : pacchetti al secondo ricevuti/inviati dal broker
+  cpu_per_agent    : secondi di CPU del processo agenti / durata / N
+  world_cpu        : idem per il processo mondo + broker (non diviso)
+  rss_per_agent_kb : memoria residente del processo agenti / N
+  realtime         : tempo simulato / tempo reale del mondo
+  fires_per_min    : incendi spenti per minuto simulato (servono prove ben
+                     più lunghe di decollo + volo + SUPPRESS_TIME, ~60 s)
+  setup_s          : sottoscrizioni di tutti gli agenti
+  ready_s          : dall'inizio del setup al primo tick di tutti gli agenti
+                     (None se oltre READY_TIMEOUT)
+
+Risultati in JSON (--json) con commit git e parametri; --compare confronta
+con un file precedente e riporta le variazioni per le prove in comune.
+
+Uso:
+    python bench_swarm.py --sizes 5 20 50 --fire-rates 0 4 --json out.json
+    python bench_swarm.py --sizes 5 50 200 500 --duration 20 --compare base.json
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing as mp
+import os
+import platform
+import subprocess
+import threading
+import time
+
+HOST          = '127.0.0.1'
+READY_TIMEOUT = 120.0      # [s] attesa massima del primo tick di tutti gli agenti
+
+# Metriche confrontate da --compare: chiave → True se più alto è meglio
+COMPARED = {
+    "ticks_per_s":      True,
+    "deadline_miss":    False,
+    "cpu_per_agent":    False,
+    "rss_per_agent_kb": False,
+    "broker_tx_per_s":  False,     # meno traffico a parità di risultato è meglio
+    "fires_per_min":    True,
+}
+
+
+def _cpu() -> float:
+    t = os.times()
+    return t.user + t.system
+
+
+def _rss_kb() -> float:
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024.0
+    except (OSError, ValueError):
+        import resource
+        return float(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+def _world_proc(n: int, fire_rate: float, seed: int, port_q, go, done, result):
+    from broker import Broker
+    from headless_world import HeadlessWorld
+
+    broker = Broker(HOST, 0)
+    broker.start()
+    port_q.put(broker.port)
+    world = HeadlessWorld(broker, n, fire_rate=fire_rate, seed=seed)
+    world.start()                            # connected/tick: gli agenti si agganciano
+    go.wait()
+    cpu0, rx0, tx0 = _cpu(), broker.rx_packets, broker.tx_packets
+    t0, sim0 = time.monotonic(), world.sim_time
+    resolved0 = world.fires_resolved()
+    # Frame con forze non aggiornate e errori di quota: solo nella finestra
+    # misurata, come gli altri contatori (niente setup e decollo)
+    stale0, flight0, err0 = sum(world.stale), sum(world.flight_frames), len(world.alt_err)
+    done.wait()
+    elapsed = time.monotonic() - t0
+    sim = world.sim_time - sim0
+    err = world.alt_err[err0:]
+    flight = sum(world.flight_frames) - flight0
+    result.put({
+        "world_cpu":       (_cpu() - cpu0) / elapsed,
+        "broker_rx_per_s": (broker.rx_packets - rx0) / elapsed,
+        "broker_tx_per_s": (broker.tx_packets - tx0) / elapsed,
+        "realtime":        sim / elapsed,
+        "sim_time":        sim,
+        "deadline_miss":   (sum(world.stale) - stale0) / flight if flight else None,
+        "in_flight":       sum(world.in_flight),
+        "fires_spawned":   len(world.fires),
+        "fires_resolved":  world.fires_resolved() - resolved0,
+        "fires_per_min":   (world.fires_resolved() - resolved0) / (sim / 60.0) if sim else 0.0,
+        "alt_rms":         (sum(e * e for e in err) / len(err)) ** 0.5 if err else None,
+        "crashed":         world.crashed,
+    })
+    world.stop()
+    broker.stop()
+
+
+def _agents_proc(n: int, port: int, duration: float, go, done, result):
+    from async_log import TelemetryLog
+    from drone_agent import DroneAgent, STATE_NAMES
+    logging.getLogger().setLevel(logging.WARNING)   # dopo setup_logging di drone_agent
+
+    rss0 = _rss_kb()
+    tlm  = TelemetryLog(STATE_NAMES, binary_path=os.devnull)
+    tlm.start()
+    t_setup = time.monotonic()
+    barrier = threading.Barrier(n)
+    agents  = [DroneAgent(i, n, telemetry=tlm, port=port, start_barrier=barrier)
+               for i in range(n)]
+    for a in agents:
+        a.setup()
+    setup_s = time.monotonic() - t_setup
+    threads = [threading.Thread(target=a.run, name=f"Drone-{a.id}", daemon=True)
+               for a in agents]
+    for t in threads:
+        t.start()
+
+    def processed(a):
+        return a.dds.seq(f"drone_{a.id}/tick") - a.ticks_skipped
+
+    def deferred(a):
+        return sum(st["deferred"] for st in a.sched.stats().values())
+
+    def forced(a):
+        return sum(st["forced"] for st in a.sched.stats().values())
+
+    # Finestra misurata solo con tutti gli agenti pronti (primo tick elaborato,
+    # come report_startup di main.py): connessione e barriera ne restano fuori
+    t_ready = time.monotonic()
+    while not all(a.t_first_tick for a in agents) and \
+            time.monotonic() - t_ready < READY_TIMEOUT:
+        time.sleep(0.05)
+    ready = all(a.t_first_tick for a in agents)
+    if not ready:
+        logging.warning("bench_swarm: agenti non pronti dopo %.0fs, misura comunque",
+                        READY_TIMEOUT)
+    ready_s = time.monotonic() - t_setup
+
+    go.set()
+    cpu0 = _cpu()
+    t0   = time.monotonic()
+    base = [(processed(a), deferred(a), forced(a)) for a in agents]
+    time.sleep(duration)
+    elapsed = time.monotonic() - t0
+    ticks = [processed(a) - b[0] for a, b in zip(agents, base)]
+    defer = [deferred(a) - b[1] for a, b in zip(agents, base)]
+    force = [forced(a) - b[2] for a, b in zip(agents, base)]
+    cpu   = _cpu() - cpu0
+    rss   = _rss_kb()
+    done.set()
+
+    for a in agents:
+        a.stop()
+    for t in threads:
+        t.join(timeout=1.0)
+    tlm.stop()
+    result.put({
+        "setup_s":          setup_s,
+        "ready_s":          ready_s if ready else None,
+        "ticks_per_s":      sum(ticks) / n / elapsed,
+        "ticks_per_s_min":  min(ticks) / elapsed,
+        "deferred_per_s":   sum(defer) / n / elapsed,
+        "forced_per_s":     sum(force) / n / elapsed,
+        "failsafe":         sum(a.failsafe_count for a in agents),
+        "cpu_per_agent":    cpu / elapsed / n,
+        "rss_per_agent_kb": (rss - rss0) / n,
+        "rss_total_mb":     rss / 1024.0,
+    })
+
+
+def run(n: int, fire_rate: float, duration: float, seed: int = 0) -> dict:
+    port_q, w_result, a_result = mp.Queue(), mp.Queue(), mp.Queue()
+    go, done = mp.Event(), mp.Event()
+    world = mp.Process(target=_world_proc,
+                       args=(n, fire_rate, seed, port_q, go, done, w_result))
+    world.start()
+    port = port_q.get(timeout=30)
+
+    agents = mp.Process(target=_agents_proc, args=(n, port, duration, go, done, a_result))
+    agents.start()
+    a = a_result.get(timeout=duration + 600)
+    w = w_result.get(timeout=30)
+    agents.join(timeout=10)
+    world.join(timeout=10)
+    return {"n": n, "fire_rate": fire_rate, "duration": duration, **a, **w}
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True, timeout=5,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def compare(results: list[dict], baseline_path: str):
+    """Variazioni percentuali rispetto a un JSON precedente (prove con stessi n e fire_rate)."""
+    with open(baseline_path) as fh:
+        base = json.load(fh)
+    old = {(r["n"], r["fire_rate"]): r for r in base["results"]}
+    print(f"\nConfronto con {baseline_path} (commit {base.get('commit') or '?'}):")
+    for r in results:
+        o = old.get((r["n"], r["fire_rate"]))
+        if o is None:
+            continue
+        parts = []
+        for key, higher_better in COMPARED.items():
+            a, b = o.get(key), r.get(key)
+            if a is None or b is None:
+                continue
+            delta = (b - a) / abs(a) * 100.0 if a else 0.0
+            worse = delta < 0 if higher_better else delta > 0
+            flag = "!" if worse and abs(delta) > 10.0 else " "
+            parts.append(f"{key} {delta:+6.1f}%{flag}")
+        print(f"  N={r['n']:4d} fuochi/min={r['fire_rate']:g}: " + "  ".join(parts))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark di scalabilità dello swarm (headless)")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[5, 20, 50])
+    ap.add_argument("--fire-rates", type=float, nargs="+", default=[0.0, 4.0],
+                    help="incendi per minuto simulato")
+    ap.add_argument("--duration", type=float, default=60.0, help="[s] reali per prova")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json", help="salva i risultati in questo file")
+    ap.add_argument("--compare", help="JSON di riferimento (stesso formato di --json)")
+    args = ap.parse_args()
+
+    results = []
+    print(f"{'N':>4s} {'fuochi':>6s} | {'tick/s':>6s} {'miss':>6s} {'rinvii/s':>8s} | "
+          f"{'rx/s':>8s} {'tx/s':>9s} | {'CPU/ag':>7s} {'CPU mondo':>9s} {'KB/ag':>7s} | "
+          f"{'RT':>5s} {'spenti/min':>10s} | {'setup':>6s}")
+    for n in args.sizes:
+        for rate in args.fire_rates:
+            r = run(n, rate, args.duration, args.seed)
+            results.append(r)
+            miss = r["deadline_miss"]
+            miss_s = f"{100 * miss:5.1f}%" if miss is not None else f"{'—':>6s}"
+            print(f"{n:4d} {rate:6g} | {r['ticks_per_s']:6.1f} {miss_s} "
+                  f"{r['deferred_per_s']:8.2f} | {r['broker_rx_per_s']:8.0f} "
+                  f"{r['broker_tx_per_s']:9.0f} | {100 * r['cpu_per_agent']:6.2f}% "
+                  f"{100 * r['world_cpu']:8.1f}% {r['rss_per_agent_kb']:7.0f} | "
+                  f"{r['realtime']:5.2f} {r['fires_per_min']:10.2f} | {r['setup_s']:5.1f}s")
+
+    if args.compare:
+        compare(results, args.compare)
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump({"commit": _git_commit(), "timestamp": time.time(),
+                       "cpus": os.cpu_count(), "python": platform.python_version(),
+                       "duration": args.duration, "seed": args.seed,
+                       "results": results}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
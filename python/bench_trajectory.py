@@ -0,0 +1,214 @@
+"""
+bench_trajectory.py — Target a gradino contro traiettorie a minimo jerk
+(trajectory.py + feedforward di MultirotorController.set_reference).
+
+Anello chiuso senza rete, in tempo simulato: MultirotorController e
+quad_sim.QuadrotorModel a 60 Hz con gli assi di DroneAgent, partenza in
+hover a TAKEOFF_ALT dopo 3 s di assestamento (integrale di quota a regime).
+
+  transit : spostamento da fermo di --distances metri (deviazione verso un
+            incendio). arrivo = primo ingresso entro FIRE_RADIUS, fermo =
+            entro 0.5 m e sotto 0.3 m/s; overshoot oltre il target lungo
+            il percorso, inclinazione e velocità massime
+  sweep   : un giro del settore 0 di --sector-drones (CoveragePlanner):
+            gradino = waypoint successivo entro WAYPOINT_RADIUS come
+            _do_exploring, traiettoria = piano chiuso del settore; tempo per
+            passare entro WAYPOINT_RADIUS da tutti i waypoint in ordine
+  costo   : Follower.reference + set_reference a ogni tick [µs], piano del
+            settore calcolato e dalla cache [ms]
+
+Uso:
+    python bench_trajectory.py --distances 10 30 80 150 --json out.json
+"""
+
+import argparse
+import json
+import math
+import time
+
+from coverage_planner import CoveragePlanner
+from drone_agent import TAKEOFF_ALT, WAYPOINT_RADIUS, FIRE_RADIUS
+from multirotor_controller import MultirotorController
+from quad_sim import QuadrotorModel
+from trajectory import Follower, Plan, connect, plan_path, MAX_SPEED, MAX_ACC
+
+DT              = 1.0 / 60.0
+SETTLE_POS      = 0.5      # [m]
+SETTLE_SPEED    = 0.3      # [m/s]
+
+
+def _hovering():
+    q = QuadrotorModel(pos=(0.0, TAKEOFF_ALT, 0.0))
+    c = MultirotorController()
+    c.set_target(x=0.0, y=0.0, z=TAKEOFF_ALT)
+    for _ in range(int(3.0 / DT)):
+        _step(c, q)
+    return c, q
+
+
+def _step(c: MultirotorController, q: QuadrotorModel):
+    p, v, r, w = q.pos, q.vel, q.rot, q.ang
+    f = c.evaluate(DT, z=p[1], vz=v[1], x=p[0], vx=v[0], y=p[2], vy=v[2],
+                   roll=r[2], roll_rate=w[2], pitch=r[0], pitch_rate=w[0])
+    q.step(DT, *f)
+
+
+def transit(distance: float, heading_deg: float, traj: bool, timeout: float = 200.0) -> dict:
+    c, q = _hovering()
+    h = math.radians(heading_deg)
+    goal = (distance * math.cos(h), distance * math.sin(h))
+    follow = None
+    if traj:
+        follow = Follower()
+        follow.start(0.0, connect((q.pos[0], q.pos[2]), (q.vel[0], q.vel[2]), (0.0, 0.0), goal))
+    else:
+        c.set_target(x=goal[0], y=goal[1])
+
+    t = 0.0
+    t_arrive = t_settle = None
+    overshoot = tilt = speed = alt_err = 0.0
+    while t < timeout and t_settle is None:
+        if follow is not None:
+            c.set_reference(*follow.reference(t))
+        _step(c, q)
+        t += DT
+        x, z = q.pos[0], q.pos[2]
+        along = (x * goal[0] + z * goal[1]) / distance
+        overshoot = max(overshoot, along - distance)
+        tilt  = max(tilt, math.hypot(q.rot[0], q.rot[2]))
+        v     = math.hypot(q.vel[0], q.vel[2])
+        speed = max(speed, v)
+        alt_err = max(alt_err, abs(q.pos[1] - TAKEOFF_ALT))
+        d = math.hypot(x - goal[0], z - goal[1])
+        if t_arrive is None and d < FIRE_RADIUS:
+            t_arrive = t
+        if d < SETTLE_POS and v < SETTLE_SPEED:
+            t_settle = t
+    return {"distance": distance, "traj": traj, "arrive_s": t_arrive, "settle_s": t_settle,
+            "overshoot_m": overshoot, "max_tilt_deg": math.degrees(tilt),
+            "max_speed": speed, "max_alt_err": alt_err}
+
+
+def sweep(n_drones: int, traj: bool, timeout: float = 1500.0) -> dict:
+    wps = CoveragePlanner.get_sector(0, n_drones, area_size=150.0, altitude=TAKEOFF_ALT)
+    c, q = _hovering()
+    q.pos[0], q.pos[2] = wps[0]
+    c.set_target(x=wps[0][0], y=wps[0][1])
+    for _ in range(int(2.0 / DT)):
+        _step(c, q)
+
+    follow = None
+    if traj:
+        plan = plan_path(wps, closed=True)
+        follow = Follower()
+        follow.start(0.0, connect((q.pos[0], q.pos[2]), (0.0, 0.0), (0.0, 0.0),
+                                  plan.points[1], plan.via[1], tag=1), plan, 1)
+    else:
+        c.set_target(x=wps[1][0], y=wps[1][1])
+
+    t, nxt, done = 0.0, 1, None
+    tilt = cross = 0.0
+    while t < timeout and done is None:
+        if follow is not None:
+            c.set_reference(*follow.reference(t))
+        _step(c, q)
+        t += DT
+        tilt = max(tilt, math.hypot(q.rot[0], q.rot[2]))
+        a, b = wps[nxt - 1], wps[nxt % len(wps)]
+        cross = max(cross, _cross_track((q.pos[0], q.pos[2]), a, b))
+        if math.hypot(q.pos[0] - b[0], q.pos[2] - b[1]) < WAYPOINT_RADIUS:
+            if nxt == len(wps):
+                done = t
+            nxt += 1
+            if follow is None:
+                w = wps[nxt % len(wps)]
+                c.set_target(x=w[0], y=w[1])
+    length = sum(math.dist(wps[i], wps[(i + 1) % len(wps)]) for i in range(len(wps)))
+    return {"n_drones": n_drones, "traj": traj, "waypoints": len(wps), "length_m": length,
+            "lap_s": done, "mean_speed": length / done if done else None,
+            "max_tilt_deg": math.degrees(tilt), "max_cross_track_m": cross}
+
+
+def _cross_track(p, a, b) -> float:
+    ux, uy = b[0] - a[0], b[1] - a[1]
+    L = math.hypot(ux, uy)
+    if L < 1e-9:
+        return math.dist(p, a)
+    return abs((p[0] - a[0]) * uy - (p[1] - a[1]) * ux) / L
+
+
+def cost(n_drones: int, reps: int) -> dict:
+    wps = CoveragePlanner.get_sector(0, n_drones, area_size=150.0, altitude=TAKEOFF_ALT)
+    t0 = time.perf_counter()
+    plan = Plan(wps, True, MAX_SPEED, MAX_ACC)
+    build_ms = (time.perf_counter() - t0) * 1e3
+    plan_path(wps, closed=True)
+    t0 = time.perf_counter()
+    for _ in range(1000):
+        plan_path(wps, closed=True)
+    cached_ms = (time.perf_counter() - t0)
+
+    c = MultirotorController()
+    f = Follower()
+    f.start(0.0, connect((0.0, 0.0), (0.0, 0.0), (0.0, 0.0), plan.points[0]), plan, 0)
+    t0 = time.perf_counter()
+    for k in range(reps):
+        c.set_reference(*f.reference(k * DT))
+    tick_us = (time.perf_counter() - t0) / reps * 1e6
+    return {"segments": len(plan.segments), "plan_duration_s": plan.duration,
+            "build_ms": build_ms, "cached_ms": cached_ms, "tick_us": tick_us}
+
+
+def _fmt(v, spec: str, width: int) -> str:
+    return f"{v:{width}{spec}}" if v is not None else f"{'—':>{width}s}"
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark target a gradino vs traiettorie")
+    ap.add_argument("--distances", type=float, nargs="+", default=[10.0, 30.0, 80.0, 150.0])
+    ap.add_argument("--heading", type=float, default=30.0, help="[°] direzione del transito")
+    ap.add_argument("--sector-drones", type=int, nargs="+", default=[5, 20])
+    ap.add_argument("--reps", type=int, default=100000)
+    ap.add_argument("--json", help="salva i risultati in questo file")
+    args = ap.parse_args()
+
+    transits = []
+    print(f"{'dist':>5s} {'modo':>8s} | {'arrivo':>7s} {'fermo':>7s} | {'overshoot':>9s} "
+          f"{'incl.max':>8s} {'v max':>6s} {'quota':>6s}")
+    for d in args.distances:
+        for traj in (False, True):
+            r = transit(d, args.heading, traj)
+            transits.append(r)
+            print(f"{d:5.0f} {'traiett.' if traj else 'gradino':>8s} | "
+                  f"{_fmt(r['arrive_s'], '.1f', 6)}s {_fmt(r['settle_s'], '.1f', 6)}s | "
+                  f"{r['overshoot_m']:8.2f}m {r['max_tilt_deg']:7.1f}° "
+                  f"{r['max_speed']:6.2f} {r['max_alt_err']:5.2f}m")
+
+    sweeps = []
+    print(f"\n{'N':>4s} {'modo':>8s} | {'wp':>3s} {'giro':>7s} {'v media':>7s} | "
+          f"{'incl.max':>8s} {'fuori rotta':>11s}")
+    for n in args.sector_drones:
+        for traj in (False, True):
+            r = sweep(n, traj)
+            sweeps.append(r)
+            print(f"{n:4d} {'traiett.' if traj else 'gradino':>8s} | {r['waypoints']:3d} "
+                  f"{_fmt(r['lap_s'], '.0f', 6)}s {_fmt(r['mean_speed'], '.2f', 7)} | "
+                  f"{r['max_tilt_deg']:7.1f}° {r['max_cross_track_m']:10.2f}m")
+
+    costs = []
+    print(f"\n{'N':>4s} | {'segmenti':>8s} {'piano':>8s} {'cache':>8s} | {'µs/tick':>7s}")
+    for n in args.sector_drones:
+        r = cost(n, args.reps)
+        r["n_drones"] = n
+        costs.append(r)
+        print(f"{n:4d} | {r['segments']:8d} {r['build_ms']:6.1f}ms {1000 * r['cached_ms']:6.2f}µs | "
+              f"{r['tick_us']:7.2f}")
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump({"max_speed": MAX_SPEED, "max_acc": MAX_ACC, "transit": transits,
+                       "sweep": sweeps, "cost": costs}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+bench_transport.py — Latenza e throughput DDS: UDP (via broker) vs memoria
+condivisa (dds_shm).
+
+Ogni prova usa processi separati, come agenti e simulatore reali:
+
+  latenza    : ping-pong tra due processi. A pubblica bench/ping = k,
+               B attende il ping (wait_newer) e ripubblica bench/pong = k,
+               A attende il pong. Si riporta il round-trip (p50/p99/max).
+               UDP: A → broker → B → broker → A;  SHM: A ↔ tabella ↔ B.
+  throughput : A pubblica bench/stream il più velocemente possibile per
+               --duration secondi; B conta gli aggiornamenti che vede.
+               UDP: pacchetti consegnati/persi;  SHM: scritture/s e
+               aggiornamenti distinti osservati dal lettore (ultimo valore).
+
+Uso:
+    python bench_transport.py --iterations 5000 --duration 2 --json out.json
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import statistics
+import time
+
+from dds import DDS, TRANSPORT_UDP, TRANSPORT_SHM
+from broker import Broker
+from dds_shm import unlink_table
+
+HOST = '127.0.0.1'
+
+
+def _client(transport: str, port: int, topics: list[str]) -> DDS:
+    dds = DDS(HOST, port, transport=transport)
+    dds.start()
+    dds.subscribe(topics)
+    return dds
+
+
+def _broker_proc(port: int, ready, stop):
+    broker = Broker('127.0.0.1', port)
+    broker.start()
+    ready.set()
+    stop.wait()
+    broker.stop()
+
+
+def _echo_proc(transport: str, port: int, n: int, ready):
+    dds = _client(transport, port, ['bench/ping'])
+    time.sleep(0.2)                    # sottoscrizione registrata dal broker
+    ready.set()
+    seq = dds.seq('bench/ping')
+    for _ in range(n):
+        res = dds.wait_newer('bench/ping', seq, timeout=2.0)
+        if res is None:
+            break
+        value, seq, _ = res
+        dds.publish('bench/pong', value)
+    dds.stop()
+
+
+def _sink_proc(transport: str, port: int, duration: float, ready, result):
+    dds = _client(transport, port, ['bench/stream'])
+    time.sleep(0.2)
+    ready.set()
+    seen, seq = 0, dds.seq('bench/stream')
+    deadline = time.monotonic() + duration + 1.0
+    while time.monotonic() < deadline:
+        res = dds.wait_newer('bench/stream', seq, timeout=0.2)
+        if res is None:
+            if seen:
+                break
+            continue
+        _, seq, _ = res
+        seen += 1
+    result.put({"updates_seen": seen, "last_seq": seq})
+    dds.stop()
+
+
+def bench_latency(transport: str, port: int, n: int) -> dict:
+    ready = mp.Event()
+    echo  = mp.Process(target=_echo_proc, args=(transport, port, n, ready))
+    echo.start()
+    ready.wait()
+    dds = _client(transport, port, ['bench/pong'])
+    time.sleep(0.2)
+    rtts, lost = [], 0
+    seq = dds.seq('bench/pong')
+    for k in range(1, n + 1):
+        t0 = time.perf_counter()
+        dds.publish('bench/ping', k)
+        res = dds.wait_newer('bench/pong', seq, timeout=0.5)
+        if res is None:
+            lost += 1
+            continue
+        _, seq, _ = res
+        rtts.append(time.perf_counter() - t0)
+    dds.stop()
+    echo.join(timeout=3.0)
+    if echo.is_alive():
+        echo.terminate()
+    rtts.sort()
+    us = [1e6 * r for r in rtts] or [float('nan')]
+    return {
+        "samples": len(rtts),
+        "lost":    lost,
+        "rtt_p50_us": statistics.median(us),
+        "rtt_p99_us": us[min(len(us) - 1, int(0.99 * len(us)))],
+        "rtt_max_us": us[-1],
+        "one_way_p50_us": statistics.median(us) / 2.0,
+    }
+
+
+def bench_throughput(transport: str, port: int, duration: float) -> dict:
+    ready  = mp.Event()
+    result = mp.Queue()
+    sink   = mp.Process(target=_sink_proc,
+                        args=(transport, port, duration, ready, result))
+    sink.start()
+    ready.wait()
+    dds = _client(transport, port, [])
+    sent = 0
+    t0 = time.perf_counter()
+    end = t0 + duration
+    while time.perf_counter() < end:
+        dds.publish('bench/stream', float(sent))
+        sent += 1
+    elapsed = time.perf_counter() - t0
+    res = result.get(timeout=duration + 5.0)
+    sink.join(timeout=3.0)
+    dds.stop()
+    return {
+        "published":          sent,
+        "publish_per_s":      sent / elapsed,
+        "updates_seen":       res["updates_seen"],
+        "seen_per_s":         res["updates_seen"] / elapsed,
+        "delivered_fraction": res["last_seq"] / sent if sent else 0.0,
+    }
+
+
+def run(transport: str, port: int, iterations: int, duration: float) -> dict:
+    stop = mp.Event()
+    broker = None
+    if transport == TRANSPORT_UDP:
+        ready  = mp.Event()
+        broker = mp.Process(target=_broker_proc, args=(port, ready, stop))
+        broker.start()
+        ready.wait()
+    else:
+        unlink_table(port)
+    try:
+        return {
+            "latency":    bench_latency(transport, port, iterations),
+            "throughput": bench_throughput(transport, port, duration),
+        }
+    finally:
+        stop.set()
+        if broker is not None:
+            broker.join(timeout=3.0)
+        else:
+            unlink_table(port)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark trasporto DDS: UDP vs SHM")
+    ap.add_argument("--iterations", type=int, default=2000, help="ping-pong per trasporto")
+    ap.add_argument("--duration", type=float, default=2.0, help="[s] prova di throughput")
+    ap.add_argument("--port", type=int, default=45444)
+    ap.add_argument("--json", help="salva i risultati in questo file")
+    args = ap.parse_args()
+
+    results = {"cpus": os.cpu_count()}
+    for transport in (TRANSPORT_UDP, TRANSPORT_SHM):
+        r = run(transport, args.port, args.iterations, args.duration)
+        results[transport] = r
+        lat, thr = r["latency"], r["throughput"]
+        print(f"{transport.upper():4s} RTT p50={lat['rtt_p50_us']:8.1f}us "
+              f"p99={lat['rtt_p99_us']:8.1f}us  persi={lat['lost']:4d} | "
+              f"publish {thr['publish_per_s']:10.0f}/s  "
+              f"visti {thr['seen_per_s']:10.0f}/s  "
+              f"consegnati {100 * thr['delivered_fraction']:5.1f}%")
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+broker.py — Broker DDS in Python, equivalente headless di dds.gd.
+
+Stesso protocollo binario e stessa logica di smistamento del broker Godot
+(autoloads/dds.gd), per far girare agenti, simulatori e benchmark senza la
+scena Godot:
+
+  - un solo socket UDP in ascolto; i peer sono identificati da "ip:port"
+  - SUBSCRIBE registra il peer come subscriber dei topic indicati
+  - SUBSCRIBE_SNAPSHOT fa lo stesso e rimanda al peer l'ultimo valore dei
+    topic già pubblicati (pacchetti SNAPSHOT, uno per topic)
+  - PUBLISH aggiorna il valore e lo inoltra a tutti i subscriber
+  - KEEP_ALIVE (e ogni altro pacchetto) azzera il TTL del peer;
+    dopo TIME_TO_LIVE secondi di silenzio il peer viene rimosso
+
+API locale (l'equivalente di DDS.publish/read usati dagli script GDScript):
+    broker = Broker(port=4444)
+    broker.start()
+    broker.publish('drone_0/tick', 1.0)
+    f1 = broker.read('drone_0/f1')
+
+Uso da riga di comando:
+    python broker.py --port 4444
+"""
+
+import argparse
+import select
+import socket
+import struct
+import threading
+import time
+
+from dds import (COMMAND_KEEP_ALIVE, COMMAND_SUBSCRIBE, COMMAND_PUBLISH,
+                 COMMAND_SUBSCRIBE_SNAPSHOT, COMMAND_SNAPSHOT,
+                 DDS_TYPE_UNKNOWN, DDS_TYPE_INT, DDS_TYPE_FLOAT)
+
+TIME_TO_LIVE = 3.0      # secondi — identico a dds.gd
+RECV_BUFFER  = 4 << 20  # byte — SO_RCVBUF richiesto per assorbire i burst
+
+
+class _Variable:
+    __slots__ = ("dtype", "value", "subscribers")
+
+    def __init__(self, dtype: int = DDS_TYPE_UNKNOWN, value: float = 0.0):
+        self.dtype       = dtype
+        self.value       = value
+        self.subscribers: list[tuple] = []
+
+
+class Broker(threading.Thread):
+    """Broker UDP headless (un thread). Vedi docstring del modulo."""
+
+    def __init__(self, host: str = '0.0.0.0', port: int = 4444):
+        super().__init__(daemon=True, name=f"Broker-{port}")
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECV_BUFFER)
+        except OSError:
+            pass
+        self._sock.bind((host, port))
+        self.port = self._sock.getsockname()[1]
+
+        self._variables: dict[str, _Variable] = {}
+        self._peers: dict[tuple, float] = {}     # addr → ultimo pacchetto
+        self._lock    = threading.Lock()
+        self._running = False
+
+        # Contatori per i benchmark
+        self.rx_packets       = 0
+        self.tx_packets       = 0
+        self.snapshot_packets = 0
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self):
+        self._running = True
+        super().start()
+
+    def stop(self):
+        self._running = False
+
+    def run(self):
+        last_sweep = time.monotonic()
+        while self._running:
+            ready, _, _ = select.select([self._sock], [], [], 0.1)
+            if ready:
+                # Svuota tutto ciò che è disponibile (come _process in dds.gd)
+                while True:
+                    try:
+                        data, addr = self._sock.recvfrom(65535, socket.MSG_DONTWAIT)
+                    except (BlockingIOError, InterruptedError):
+                        break
+                    self._on_packet(data, addr)
+
+            now = time.monotonic()
+            if now - last_sweep >= 0.5:
+                self._expire_peers(now)
+                last_sweep = now
+        self._sock.close()
+
+    # ------------------------------------------------------------------
+    # Gestione comandi
+    # ------------------------------------------------------------------
+
+    def _on_packet(self, data: bytes, addr: tuple):
+        self.rx_packets += 1
+        with self._lock:
+            self._peers[addr] = time.monotonic()
+        if not data:
+            return
+        cmd = data[0]
+        if cmd == COMMAND_KEEP_ALIVE:
+            return
+        if cmd == COMMAND_SUBSCRIBE:
+            self._handle_subscribe(addr, data)
+        elif cmd == COMMAND_SUBSCRIBE_SNAPSHOT:
+            self._handle_subscribe(addr, data, snapshot=True)
+        elif cmd == COMMAND_PUBLISH:
+            self._handle_publish(data)
+
+    def _handle_subscribe(self, addr: tuple, data: bytes, snapshot: bool = False):
+        """
+        Formato: [0x81|0x83, n_vars, len, name_bytes, len, name_bytes, ...]
+        Con snapshot rimanda l'ultimo valore dei topic con tipo noto
+        (DDS_TYPE_UNKNOWN = sottoscritto ma mai pubblicato: nessun pacchetto).
+        """
+        n, idx = data[1], 2
+        replay = []
+        with self._lock:
+            for _ in range(n):
+                nlen = data[idx]
+                name = data[idx + 1: idx + 1 + nlen].decode('utf-8')
+                idx += 1 + nlen
+                var = self._variables.get(name)
+                if var is None:
+                    var = self._variables[name] = _Variable()
+                if addr not in var.subscribers:
+                    var.subscribers.append(addr)
+                if snapshot and var.dtype != DDS_TYPE_UNKNOWN:
+                    replay.append((name, var.dtype, var.value))
+        for name, dtype, value in replay:
+            try:
+                self._sock.sendto(
+                    build_publish_packet(name, dtype, value, COMMAND_SNAPSHOT), addr)
+                self.snapshot_packets += 1
+            except OSError:
+                pass
+
+    def _handle_publish(self, data: bytes):
+        """Formato: [0x82, type, name_len, name_bytes, value_4bytes]"""
+        dtype = data[1]
+        nlen  = data[2]
+        name  = data[3: 3 + nlen].decode('utf-8')
+        off   = 3 + nlen
+        if dtype == DDS_TYPE_FLOAT:
+            value = struct.unpack_from('<f', data, off)[0]
+        elif dtype == DDS_TYPE_INT:
+            value = float(struct.unpack_from('<i', data, off)[0])
+        else:
+            value = 0.0
+        self._store_and_broadcast(name, dtype, value)
+
+    def _store_and_broadcast(self, name: str, dtype: int, value: float):
+        with self._lock:
+            var = self._variables.get(name)
+            if var is None:
+                var = self._variables[name] = _Variable()
+            var.dtype = dtype
+            var.value = value
+            subscribers = list(var.subscribers)
+        if not subscribers:
+            return
+        pkt = build_publish_packet(name, dtype, value)
+        for addr in subscribers:
+            try:
+                self._sock.sendto(pkt, addr)
+                self.tx_packets += 1
+            except OSError:
+                pass
+
+    def _expire_peers(self, now: float):
+        with self._lock:
+            expired = [a for a, t in self._peers.items() if now - t > TIME_TO_LIVE]
+            for addr in expired:
+                del self._peers[addr]
+                for var in self._variables.values():
+                    if addr in var.subscribers:
+                        var.subscribers.remove(addr)
+
+    # ------------------------------------------------------------------
+    # API locale (come DDS.publish/read in GDScript)
+    # ------------------------------------------------------------------
+
+    def publish(self, name: str, value: float, dtype: int = DDS_TYPE_FLOAT):
+        self._store_and_broadcast(name, dtype, float(value))
+
+    def read(self, name: str) -> float:
+        with self._lock:
+            var = self._variables.get(name)
+            return var.value if var is not None else 0.0
+
+    def clear(self, name: str):
+        with self._lock:
+            var = self._variables.get(name)
+            if var is not None:
+                var.value = 0.0
+
+    def n_peers(self) -> int:
+        with self._lock:
+            return len(self._peers)
+
+
+def build_publish_packet(name: str, dtype: int, value: float,
+                         command: int = COMMAND_PUBLISH) -> bytes:
+    """Pacchetto PUBLISH (o SNAPSHOT) come _build_publish_packet di dds.gd."""
+    encoded = name.encode('utf-8')
+    head = bytes([command, dtype, len(encoded)]) + encoded
+    if dtype == DDS_TYPE_INT:
+        return head + struct.pack('<i', int(value))
+    return head + struct.pack('<f', value)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Broker DDS headless (come dds.gd)")
+    ap.add_argument("--host", default="0.0.0.0")
+    ap.add_argument("--port", type=int, default=4444)
+    args = ap.parse_args()
+
+    broker = Broker(args.host, args.port)
+    broker.start()
+    print(f"DDS broker: in ascolto sulla porta {broker.port}")
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        broker.stop()
+
+
+if __name__ == "__main__":
+    main()
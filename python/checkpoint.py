@@ -0,0 +1,213 @@
+"""
+checkpoint.py — Checkpoint binari dello stato di un agente e ripartenza a caldo.
+
+Un agente che muore o viene rideployato ripartirebbe da IDLE → TAKEOFF con
+integrali azzerati, _wp_idx perso e nessun ricordo del fuoco assegnato.
+Il checkpoint contiene lo stato che non si ricostruisce dai sensori:
+
+  FSM        : stato, indice waypoint, fuoco (id + posizione), tempo di
+               soppressione accumulato, tempo già trascorso in HOVERING
+  controller : MultirotorController.snapshot() (target, integrale del PI
+               di quota, memoria dei PID di rate)
+
+Formato: un record CHECKPOINT_FORMAT (little endian, double per i valori
+del controller: l'integrale si ripristina esatto) seguito dal CRC32 dei byte
+precedenti. Un file per drone (drone_{id}.ckpt), sostituito atomicamente
+(file temporaneo + os.replace): chi legge trova il checkpoint precedente
+o quello nuovo, mai uno scritto a metà.
+
+Fuori dal percorso critico: l'agente impacchetta il record (pochi µs, nel
+task a bassa frequenza) e lo consegna a CheckpointStore.save(), che lo mette
+in uno slot per drone (l'ultimo vince) senza I/O; un thread di scrittura
+svuota gli slot su disco.
+
+    store = CheckpointStore("/tmp/swarm_ckpt")
+    store.start()
+    store.save(Checkpoint(...).pack())      # nel loop dell'agente
+    cp = store.load(drone_id)               # alla ripartenza (None se assente/corrotto)
+    store.stop()                            # scrive gli slot rimasti
+"""
+
+import math
+import os
+import struct
+import threading
+import time
+import zlib
+
+from multirotor_controller import SNAPSHOT_LEN
+
+CHECKPOINT_MAGIC  = b"SWCK"
+CHECKPOINT_FORMAT = f"<4sHHIdBHd3ddd{SNAPSHOT_LEN}d"
+CHECKPOINT_SIZE   = struct.calcsize(CHECKPOINT_FORMAT) + 4     # + CRC32
+
+_STRUCT = struct.Struct(CHECKPOINT_FORMAT)
+_CRC    = struct.Struct("<I")
+
+
+class Checkpoint:
+    """
+    Stato di un agente in un istante. fire_id/target_fire None = nessun
+    fuoco (NaN nel record); time è l'istante di cattura (time.time(), per
+    l'età del checkpoint anche tra processi diversi).
+    """
+
+    __slots__ = ("drone", "n_drones", "seq", "time", "state", "wp_idx",
+                 "fire_id", "target_fire", "suppress_t", "hover_elapsed", "ctrl")
+
+    def __init__(self, drone: int, n_drones: int, seq: int, t: float, state: int,
+                 wp_idx: int, fire_id, target_fire, suppress_t: float,
+                 hover_elapsed: float, ctrl: tuple):
+        self.drone         = drone
+        self.n_drones      = n_drones
+        self.seq           = seq
+        self.time          = t
+        self.state         = state           # indice in drone_agent.STATE_NAMES
+        self.wp_idx        = wp_idx
+        self.fire_id       = fire_id
+        self.target_fire   = target_fire
+        self.suppress_t    = suppress_t
+        self.hover_elapsed = hover_elapsed
+        self.ctrl          = ctrl
+
+    def pack(self) -> bytes:
+        fire = self.target_fire if self.target_fire is not None else (math.nan,) * 3
+        body = _STRUCT.pack(CHECKPOINT_MAGIC, self.drone, self.n_drones,
+                            self.seq & 0xFFFFFFFF, self.time, self.state, self.wp_idx,
+                            math.nan if self.fire_id is None else self.fire_id,
+                            *fire, self.suppress_t, self.hover_elapsed, *self.ctrl)
+        return body + _CRC.pack(zlib.crc32(body))
+
+    @classmethod
+    def unpack(cls, data: bytes):
+        """Checkpoint dai byte di pack(); None se troncato, corrotto o di altro formato."""
+        if len(data) != CHECKPOINT_SIZE:
+            return None
+        body = data[:-4]
+        if _CRC.unpack(data[-4:])[0] != zlib.crc32(body):
+            return None
+        v = _STRUCT.unpack(body)
+        if v[0] != CHECKPOINT_MAGIC:
+            return None
+        fire = v[8:11]
+        return cls(v[1], v[2], v[3], v[4], v[5], v[6],
+                   None if math.isnan(v[7]) else v[7],
+                   None if math.isnan(fire[0]) else list(fire),
+                   v[11], v[12], v[13:13 + SNAPSHOT_LEN])
+
+    def age(self) -> float:
+        return time.time() - self.time
+
+
+class CheckpointStore(threading.Thread):
+    """
+    Archivio dei checkpoint su directory, con scrittura in un thread separato.
+    Vedi docstring del modulo.
+
+    fsync=True forza il checkpoint su disco prima della rinomina (sopravvive
+    anche a un crash dell'host, al costo di una sync per scrittura).
+    """
+
+    def __init__(self, directory: str, fsync: bool = False):
+        super().__init__(daemon=True, name="CheckpointStore")
+        self.directory = directory
+        self.fsync     = fsync
+        os.makedirs(directory, exist_ok=True)
+        self._slots: dict[int, bytes] = {}
+        self._cond    = threading.Condition()
+        self._running = False
+        self._busy    = False
+
+        self.saved     = 0        # record consegnati da save()
+        self.written   = 0        # file scritti
+        self.coalesced = 0        # record sostituiti da uno più recente prima della scrittura
+        self.errors    = 0
+
+    def path(self, drone_id: int) -> str:
+        return os.path.join(self.directory, f"drone_{drone_id}.ckpt")
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self):
+        self._running = True
+        super().start()
+
+    def stop(self):
+        """Ferma il writer dopo aver scritto i checkpoint in attesa."""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self.is_alive():
+            self.join()
+
+    def run(self):
+        while True:
+            with self._cond:
+                while not self._slots and self._running:
+                    self._cond.wait()
+                if not self._slots:
+                    return
+                slots, self._slots = self._slots, {}
+                self._busy = True
+            for drone_id, data in slots.items():
+                self._write(drone_id, data)
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+
+    def flush(self, timeout: float = None) -> bool:
+        """Attende che gli slot in attesa siano su disco. False allo scadere del timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._slots and not self._busy,
+                                       timeout)
+
+    # ------------------------------------------------------------------
+    # Scrittura / lettura
+    # ------------------------------------------------------------------
+
+    def save(self, data: bytes):
+        """Hot path: consegna il record impacchettato (drone nei byte 4..5), nessun I/O."""
+        drone_id = data[4] | (data[5] << 8)
+        with self._cond:
+            if drone_id in self._slots:
+                self.coalesced += 1
+            self._slots[drone_id] = data
+            self.saved += 1
+            self._cond.notify()
+
+    def _write(self, drone_id: int, data: bytes):
+        path = self.path(drone_id)
+        tmp  = path + ".tmp"
+        try:
+            with open(tmp, "wb") as fh:
+                fh.write(data)
+                if self.fsync:
+                    fh.flush()
+                    os.fsync(fh.fileno())
+            os.replace(tmp, path)
+            self.written += 1
+        except OSError:
+            self.errors += 1
+
+    def load(self, drone_id: int):
+        """Ultimo checkpoint su disco del drone; None se assente o non valido."""
+        try:
+            with open(self.path(drone_id), "rb") as fh:
+                data = fh.read(CHECKPOINT_SIZE + 1)
+        except OSError:
+            return None
+        cp = Checkpoint.unpack(data)
+        if cp is None or cp.drone != drone_id:
+            return None
+        return cp
+
+    def discard(self, drone_id: int):
+        """Rimuove il checkpoint del drone (es. fine missione: ripartenza a freddo)."""
+        with self._cond:
+            self._slots.pop(drone_id, None)
+        try:
+            os.remove(self.path(drone_id))
+        except OSError:
+            pass
@@ -0,0 +1,367 @@
+"""
+collision_avoidance.py — Evitamento reciproco delle collisioni (ORCA) tra i
+droni dello swarm, nel piano orizzontale di crociera (NumPy).
+
+Si inserisce tra la FSM e il controller: la FSM fissa il target di
+posizione, il controller ne ricava la velocità desiderata (anello P di
+posizione) e questo stadio la sostituisce con la velocità più vicina che
+rispetta i vincoli ORCA rispetto ai peer vicini
+(MultirotorController.set_velocity_override).
+
+Sorgente dei peer: i topic drone_{i}/sx..sz (più status), letti dal task
+di coordinamento a SWARM_RATE_HZ. Le velocità dei peer non sono
+pubblicate: si stimano dalle variazioni di posizione (con deadband e
+heartbeat dei topic una posizione ferma per VEL_TIMEOUT = peer fermo).
+
+Costo, per drone e per tick:
+  - ricerca dei vicini su griglia a celle di lato ≥ NEIGHBOR_DIST: solo le
+    3×3 celle attorno al drone, griglia ricostruita a ogni update_peers()
+  - costruzione vettoriale dei semipiani ORCA per tutti i vicini (al più
+    MAX_NEIGHBORS, i più vicini)
+  - programma lineare 2D incrementale (van den Berg et al.) sui semipiani:
+    pochi vincoli, in Python scalare; se infattibile (swarm troppo denso)
+    minimizza la massima violazione
+
+Separazione: i vincoli usano 2·AGENT_RADIUS + SEP_MARGIN. ORCA garantisce
+2·AGENT_RADIUS solo con velocità raggiunte subito, velocità dei peer esatte
+e vincoli fattibili; il margine assorbe il ritardo di risposta del drone e
+la stima a SWARM_RATE_HZ (misure in bench_avoidance.py). Con vincoli
+infattibili (ingorghi molto densi) resta un obiettivo, non un limite.
+
+Assi: piano (x, z) di Godot = (x, y) del controller; sy è la quota, i peer
+con separazione verticale ≥ VERTICAL_SEP sono ignorati.
+
+    avoid = CollisionAvoidance(n_drones, drone_id)
+    avoid.update_peers(ids, pos, status, t)          # a SWARM_RATE_HZ
+    v = avoid.solve(pos, vel, v_pref, t)             # a ogni tick
+    # v = None: nessun vicino, vale la velocità desiderata
+"""
+
+import math
+
+import numpy as np
+
+# Geometria e orizzonti
+AGENT_RADIUS   = 1.0     # [m] raggio di ingombro con margine (per drone)
+SEP_MARGIN     = 0.75    # [m] aggiunto a 2·AGENT_RADIUS nei vincoli: copre il ritardo
+                         #     di risposta in velocità e la stima delle velocità dei peer
+TIME_HORIZON   = 3.0     # [s] orizzonte dei vincoli ORCA tra droni
+COLLISION_TIME = 0.5     # [s] tempo di risoluzione se già in collisione
+MAX_SPEED      = 3.0     # [m/s] come la saturazione di x_control / y_control
+VERTICAL_SEP   = 3.0     # [m] peer a quota diversa oltre questo valore: ignorati
+
+# Vicini
+NEIGHBOR_DIST  = 12.0    # [m] ~2 s di avvicinamento frontale a MAX_SPEED
+MAX_NEIGHBORS  = 10      # vincoli al più per i MAX_NEIGHBORS peer più vicini
+GRID_MARGIN    = 2.0     # [m] spostamento massimo dei peer tra due update_peers()
+
+# Stima della velocità dei peer dalle posizioni condivise
+VEL_TIMEOUT    = 1.0     # [s] posizione invariata oltre questo tempo → peer fermo
+MAX_EXTRAP     = 0.5     # [s] estrapolazione massima della posizione dei peer
+PEER_MAX_SPEED = 2.0 * MAX_SPEED
+
+# Codici di stato dei peer che eseguono anch'essi ORCA (si dividono a metà
+# la manovra); gli altri (decollo, hover, soppressione) sono trattati come
+# ostacoli che non reagiscono.  Vedi drone_agent.StateCode.
+REACTIVE_CODES = (1.0, 2.0, 3.0)     # EXPLORING, MOVING, RETURNING
+
+# Con vincoli attivi: rotazione verso destra della velocità desiderata
+# (tan dell'angolo), contro gli incontri frontali simmetrici; se la velocità
+# ammessa scende sotto STALL_RATIO di quella desiderata si aggira l'ostacolo
+RIGHT_BIAS     = 0.1
+STALL_RATIO    = 0.1
+
+_EPS = 1e-5
+
+
+def _det(ax, ay, bx, by):
+    return ax * by - ay * bx
+
+
+# ---------------------------------------------------------------------------
+# Griglia dei vicini
+# ---------------------------------------------------------------------------
+
+class NeighborGrid:
+    """
+    Bucket spaziale 2D: celle quadrate di lato cell. query() restituisce gli
+    indici dei punti nelle 3×3 celle attorno a (x, y): completo per ogni
+    raggio ≤ cell.
+    """
+
+    def __init__(self, cell: float):
+        self.cell   = cell
+        self._order = np.empty(0, dtype=np.int64)
+        self._cells: dict[tuple, tuple] = {}
+
+    def build(self, xy: np.ndarray):
+        """xy: (k, 2). Indici restituiti da query() riferiti alle righe di xy."""
+        keys = np.floor(xy / self.cell).astype(np.int64)
+        order = np.lexsort((keys[:, 1], keys[:, 0]))
+        keys = keys[order]
+        self._order = order
+        self._cells = {}
+        if len(order) == 0:
+            return
+        change = np.flatnonzero(np.any(keys[1:] != keys[:-1], axis=1)) + 1
+        starts = np.concatenate(([0], change))
+        ends   = np.concatenate((change, [len(order)]))
+        for s, e, kx, ky in zip(starts.tolist(), ends.tolist(),
+                                keys[starts, 0].tolist(), keys[starts, 1].tolist()):
+            self._cells[(kx, ky)] = (s, e)
+
+    def query(self, x: float, y: float) -> np.ndarray:
+        cx = math.floor(x / self.cell)
+        cy = math.floor(y / self.cell)
+        parts = []
+        for kx in (cx - 1, cx, cx + 1):
+            for ky in (cy - 1, cy, cy + 1):
+                span = self._cells.get((kx, ky))
+                if span is not None:
+                    parts.append(self._order[span[0]:span[1]])
+        if not parts:
+            return self._order[:0]
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+
+# ---------------------------------------------------------------------------
+# Programma lineare 2D sui semipiani ORCA
+# ---------------------------------------------------------------------------
+# Un vincolo è (px, py, dx, dy): punto sulla retta e direzione unitaria;
+# le velocità ammesse stanno a sinistra della direzione.
+
+def _lp1(lines, n, radius, ox, oy, direction_opt):
+    """Ottimo sulla retta n rispetto ai vincoli 0..n-1 e al cerchio radius."""
+    px, py, dx, dy = lines[n]
+    dot  = px * dx + py * dy
+    disc = dot * dot + radius * radius - (px * px + py * py)
+    if disc < 0.0:
+        return None                          # la retta non interseca il cerchio
+    sq = math.sqrt(disc)
+    t_left, t_right = -dot - sq, -dot + sq
+
+    for i in range(n):
+        qx, qy, ex, ey = lines[i]
+        denom = _det(dx, dy, ex, ey)
+        numer = _det(ex, ey, px - qx, py - qy)
+        if abs(denom) <= _EPS:
+            if numer < 0.0:
+                return None                  # rette parallele, lato opposto
+            continue
+        t = numer / denom
+        if denom >= 0.0:
+            t_right = min(t_right, t)
+        else:
+            t_left = max(t_left, t)
+        if t_left > t_right:
+            return None
+
+    if direction_opt:
+        t = t_right if ox * dx + oy * dy > 0.0 else t_left
+    else:
+        t = min(max(dx * (ox - px) + dy * (oy - py), t_left), t_right)
+    return px + t * dx, py + t * dy
+
+
+def _lp2(lines, radius, ox, oy, direction_opt):
+    """
+    Velocità più vicina a (ox, oy) nell'intersezione dei semipiani e del
+    cerchio. Ritorna (indice del primo vincolo infattibile o len(lines), v).
+    """
+    if direction_opt:
+        rx, ry = ox * radius, oy * radius
+    elif ox * ox + oy * oy > radius * radius:
+        norm = math.hypot(ox, oy)
+        rx, ry = ox / norm * radius, oy / norm * radius
+    else:
+        rx, ry = ox, oy
+
+    for i, (px, py, dx, dy) in enumerate(lines):
+        if _det(dx, dy, px - rx, py - ry) > 0.0:
+            res = _lp1(lines, i, radius, ox, oy, direction_opt)
+            if res is None:
+                return i, (rx, ry)
+            rx, ry = res
+    return len(lines), (rx, ry)
+
+
+def _lp3(lines, begin, radius, result):
+    """Vincoli infattibili: minimizza la massima violazione dei semipiani."""
+    rx, ry = result
+    distance = 0.0
+    for i in range(begin, len(lines)):
+        px, py, dx, dy = lines[i]
+        if _det(dx, dy, px - rx, py - ry) <= distance:
+            continue
+        proj = []
+        for j in range(i):
+            qx, qy, ex, ey = lines[j]
+            determinant = _det(dx, dy, ex, ey)
+            if abs(determinant) <= _EPS:
+                if dx * ex + dy * ey > 0.0:
+                    continue                 # parallele e concordi
+                sx, sy = 0.5 * (px + qx), 0.5 * (py + qy)
+            else:
+                t = _det(ex, ey, px - qx, py - qy) / determinant
+                sx, sy = px + t * dx, py + t * dy
+            nx, ny = ex - dx, ey - dy
+            norm = math.hypot(nx, ny)
+            proj.append((sx, sy, nx / norm, ny / norm))
+        fail, res = _lp2(proj, radius, -dy, dx, True)
+        if fail >= len(proj):
+            rx, ry = res
+        distance = _det(dx, dy, px - rx, py - ry)
+    return rx, ry
+
+
+# ---------------------------------------------------------------------------
+# Stadio di evitamento per un drone
+# ---------------------------------------------------------------------------
+
+class CollisionAvoidance:
+    """
+    Vista dei peer e vincoli ORCA per il drone drone_id.
+    Vedi docstring del modulo.
+    """
+
+    def __init__(self, n_drones: int, drone_id: int,
+                 radius: float = AGENT_RADIUS,
+                 time_horizon: float = TIME_HORIZON,
+                 max_speed: float = MAX_SPEED):
+        self.id           = drone_id
+        self.radius       = radius
+        self.time_horizon = time_horizon
+        self.max_speed    = max_speed
+
+        # Stato dei peer, una riga per drone (la riga drone_id resta inattiva)
+        self.pos    = np.full((n_drones, 3), np.nan)
+        self.vel    = np.zeros((n_drones, 2))
+        self.t_pos  = np.full(n_drones, np.nan)   # ultimo cambio di posizione
+        self.share  = np.ones(n_drones)           # quota di manovra a carico nostro
+        self._ids   = np.empty(0, dtype=np.int64) # peer attivi, righe della griglia
+        self._grid  = NeighborGrid(NEIGHBOR_DIST + GRID_MARGIN)
+
+        # Contatori
+        self.solves     = 0      # chiamate a solve() con almeno un vicino
+        self.adjusted   = 0      # velocità desiderata modificata
+        self.infeasible = 0      # vincoli incompatibili (fallback _lp3)
+        self.stalled    = 0      # stalli aggirati a destra
+
+    def update_peers(self, ids, pos, status, t: float):
+        """
+        Nuova vista dei peer: ids (k,), pos (k, 3) come sx, sy, sz,
+        status (k,) codici di stato. I peer assenti da ids diventano inattivi.
+        """
+        ids    = np.asarray(ids, dtype=np.int64)
+        pos    = np.asarray(pos, dtype=float).reshape(-1, 3)
+        status = np.asarray(status, dtype=float)
+
+        old   = self.pos[ids]
+        moved = np.any(pos != old, axis=1)          # NaN (primo avvistamento) → True
+        dt    = t - self.t_pos[ids]
+        fresh = moved & (dt > 0.0)                  # False anche per dt NaN
+        if np.any(fresh):
+            v = (pos[fresh][:, [0, 2]] - old[fresh][:, [0, 2]]) / dt[fresh, None]
+            speed = np.hypot(v[:, 0], v[:, 1])
+            v *= np.minimum(1.0, PEER_MAX_SPEED / np.maximum(speed, _EPS))[:, None]
+            self.vel[ids[fresh]] = v
+        first = moved & np.isnan(dt)
+        still = ~moved & (dt > VEL_TIMEOUT)
+        self.vel[ids[first | still]] = 0.0
+        self.pos[ids[moved]]   = pos[moved]
+        self.t_pos[ids[moved]] = t
+        self.share[ids] = np.where(np.isin(status, REACTIVE_CODES), 0.5, 1.0)
+
+        self._ids = ids[ids != self.id]
+        self._grid.build(self.pos[self._ids][:, [0, 2]])
+
+    def solve(self, pos, vel, v_pref, t: float):
+        """
+        Velocità orizzontale (vx, vz) più vicina a v_pref compatibile con i
+        vincoli ORCA. pos: (x, y, z) proprio, vel: (vx, vz) attuale.
+        None se nessun peer è abbastanza vicino da generare vincoli.
+        """
+        x, y, z = pos
+        rows = self._grid.query(x, z)
+        if rows.size == 0:
+            return None
+        ids = self._ids[rows]
+
+        # Posizioni dei peer estrapolate a t e relative al drone
+        lag = np.clip(t - self.t_pos[ids], 0.0, MAX_EXTRAP)[:, None]
+        p   = self.pos[ids][:, [0, 2]] + self.vel[ids] * lag
+        p[:, 0] -= x
+        p[:, 1] -= z
+        dist2 = np.einsum('ij,ij->i', p, p)
+        near  = (dist2 < NEIGHBOR_DIST * NEIGHBOR_DIST) & \
+                (np.abs(self.pos[ids, 1] - y) < VERTICAL_SEP)
+        if not np.any(near):
+            return None
+        ids, p, dist2 = ids[near], p[near], dist2[near]
+        if len(ids) > MAX_NEIGHBORS:
+            keep = np.argpartition(dist2, MAX_NEIGHBORS)[:MAX_NEIGHBORS]
+            ids, p, dist2 = ids[keep], p[keep], dist2[keep]
+
+        lines = self._orca_lines(p, dist2, np.asarray(vel, dtype=float) - self.vel[ids],
+                                 vel, self.share[ids])
+        self.solves += 1
+        # Regola della mano destra: con vincoli attivi la velocità desiderata
+        # ruota leggermente a destra, così gli incontri frontali si risolvono
+        # dallo stesso lato
+        ox, oy = v_pref
+        ox, oy = ox + RIGHT_BIAS * oy, oy - RIGHT_BIAS * ox
+        v = self._optimize(lines, ox, oy)
+        # Stallo (più droni che si bloccano a vicenda, es. incrocio al
+        # centro): si gira attorno all'ingorgo, a destra
+        if v[0] * v[0] + v[1] * v[1] < STALL_RATIO * STALL_RATIO * (ox * ox + oy * oy):
+            self.stalled += 1
+            ox, oy = oy, -ox
+            v = self._optimize(lines, ox, oy)
+        if abs(v[0] - ox) + abs(v[1] - oy) > _EPS:
+            self.adjusted += 1
+        return v
+
+    def _optimize(self, lines, ox, oy):
+        fail, v = _lp2(lines, self.max_speed, ox, oy, False)
+        if fail < len(lines):
+            self.infeasible += 1
+            v = _lp3(lines, fail, self.max_speed, v)
+        return v
+
+    def _orca_lines(self, p, dist2, v, vel, share) -> list:
+        """
+        Semipiani ORCA (px, py, dx, dy) per k vicini, in forma vettoriale.
+        p: posizioni relative (k, 2), v: velocità relative proprie − peer.
+        """
+        r      = 2.0 * self.radius + SEP_MARGIN
+        r2     = r * r
+        coll   = dist2 <= r2
+        inv_t  = np.where(coll, 1.0 / COLLISION_TIME, 1.0 / self.time_horizon)
+
+        # Centro del cono troncato → w; se già in collisione si usa il passo
+        # COLLISION_TIME al posto dell'orizzonte
+        w      = v - inv_t[:, None] * p
+        w2     = np.einsum('ij,ij->i', w, w)
+        dot1   = np.einsum('ij,ij->i', w, p)
+        circle = coll | ((dot1 < 0.0) & (dot1 * dot1 > r2 * w2))
+
+        # Proiezione sul cerchio di troncamento
+        w_len  = np.sqrt(np.maximum(w2, _EPS * _EPS))
+        unit   = w / w_len[:, None]
+        dir_c  = np.stack((unit[:, 1], -unit[:, 0]), axis=1)
+        u_c    = (r * inv_t - w_len)[:, None] * unit
+
+        # Proiezione sulle gambe del cono
+        d2     = np.maximum(dist2, _EPS)
+        leg    = np.sqrt(np.maximum(dist2 - r2, 0.0))
+        px, py = p[:, 0], p[:, 1]
+        left   = px * w[:, 1] - py * w[:, 0] > 0.0
+        dir_l  = np.where(left[:, None],
+                          np.stack((px * leg - py * r,   px * r + py * leg), axis=1),
+                          -np.stack((px * leg + py * r, -px * r + py * leg), axis=1)) / d2[:, None]
+        u_l    = np.einsum('ij,ij->i', v, dir_l)[:, None] * dir_l - v
+
+        direction = np.where(circle[:, None], dir_c, dir_l)
+        u         = np.where(circle[:, None], u_c, u_l)
+        point     = np.asarray(vel, dtype=float) + share[:, None] * u
+        return np.concatenate((point, direction), axis=1).tolist()
@@ -9,6 +9,7 @@ Differenza rispetto alla versione del prof: non dipende da lib.system.basic
 autosufficiente nel nostro progetto.
 """
 
+import math
 from typing import Optional
 
 
@@ -108,6 +109,14 @@ class PI_Controller:
         self._i.reset()
         self._in_sat = False
 
+    def snapshot(self) -> tuple:
+        """Stato interno (integrale, in_sat) come float, per i checkpoint."""
+        return (self._i.prev_output, float(self._in_sat))
+
+    def restore(self, state) -> None:
+        self._i.prev_output = state[0]
+        self._in_sat        = bool(state[1])
+
 
 class PID_Controller(PI_Controller):
     """Controllore PID (PI + termine derivativo)."""
@@ -131,4 +140,13 @@ class PID_Controller(PI_Controller):
 
     def reset(self):
         super().reset()
-        self._d.reset()
\ No newline at end of file
+        self._d.reset()
+
+    def snapshot(self) -> tuple:
+        """(integrale, in_sat, errore precedente del derivatore o NaN)."""
+        prev = self._d._prev
+        return super().snapshot() + (math.nan if prev is None else prev,)
+
+    def restore(self, state) -> None:
+        super().restore(state)
+        self._d._prev = None if math.isnan(state[2]) else state[2]
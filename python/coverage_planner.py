@@ -43,6 +43,16 @@ class CoveragePlanner:
 
         return waypoints
 
+    @staticmethod
+    def sector_of(x: float, n_drones: int, area_size: float = 150.0) -> int:
+        """
+        Indice del settore (striscia lungo X di get_sector) che contiene la
+        coordinata X; fuori dall'area, il settore di bordo più vicino.
+        """
+        sw     = area_size / n_drones
+        sector = int((x + area_size / 2.0) // sw)
+        return min(n_drones - 1, max(0, sector))
+
     @staticmethod
     def start_position(drone_id: int, n_drones: int,
                        area_size: float = 80.0) -> list:
@@ -7,20 +7,58 @@ con queste differenze/miglioramenti:
   - publish() non richiede più di specificare DDS_TYPE_*: lo deduce
     automaticamente dal tipo Python (int → DDS_TYPE_INT, altrimenti FLOAT)
   - Aggiunto keep_alive() automatico in background per evitare TTL expiry
-    (il server Godot disconnette i peer dopo 2 secondi senza keep-alive)
-
-Formato pacchetti (identico al prof):
-  SUBSCRIBE : [0x81, n_vars, len, name, len, name, ...]
-  PUBLISH   : [0x82, type, len, name, value_4bytes]
-  KEEP_ALIVE: [0x80]
+    (il server Godot disconnette i peer dopo 2 secondi senza keep-alive),
+    in un thread separato da quello di ricezione
+  - Politiche di pubblicazione per-topic (PublishPolicy): change-only,
+    deadband, intervallo minimo e heartbeat forzato, con contatori dei
+    publish soppressi
+  - subscribe() spezza liste lunghe in più pacchetti (n_vars è un byte),
+    li invia con un limite di banda condiviso tra i client del processo e
+    li ripete con i primi keep-alive (dal thread di keep-alive: l'attesa del
+    limitatore non blocca la ricezione di sensori e tick): uno swarm che parte tutto insieme
+    non satura il buffer di ricezione del broker e un pacchetto perso
+    viene recuperato entro pochi secondi
+  - Trasporto selezionabile nel costruttore: DDS(..., transport='shm') usa
+    la tabella in memoria condivisa di dds_shm.py invece di UDP (stessa API)
+  - Snapshot alla sottoscrizione: con SUBSCRIBE_SNAPSHOT il broker registra
+    le sottoscrizioni e rimanda subito l'ultimo valore noto di ogni topic
+    già pubblicato (pacchetti SNAPSHOT). Un agente avviato o riavviato in
+    ritardo è allineato dopo un round trip, senza attendere la prossima
+    pubblicazione; has_value() distingue un valore reale da "mai pubblicato"
+  - Valori in un archivio compatto (_VariableStore: array tipizzati di
+    valori e seq, una Condition solo per i topic effettivamente attesi)
+    invece di un Lock + Condition per ogni topic sottoscritto
+  - Multicast opzionale per i topic di swarm: DDS(..., multicast=group)
+    unisce il client a un gruppo UDP multicast; set_publish_path() sceglie
+    per topic se pubblicare al broker, al gruppo o a entrambi. Un pacchetto
+    al gruppo raggiunge tutti gli agenti in una sola sendto, senza passare
+    dal fan-out O(N²) del broker
+  - Classi QoS in ricezione: i topic critici (sensori, tick) arrivano su un
+    socket, quelli best-effort (chiacchiera dello swarm, multicast) su un
+    altro. Il thread di ricezione svuota sempre prima il socket critico;
+    i best-effort vengono letti a blocchi e accorpati (solo l'ultimo valore
+    per topic): un valore più vecchio di BE_MAX_AGE è scartato solo se nel
+    blocco ce n'è uno più recente, l'ultimo valore non si perde mai (topic
+    change-only, snapshot). Il ritardo di coda
+    di ogni classe è misurato dal timestamp del kernel (SO_TIMESTAMP)
+
+Formato pacchetti (0x80..0x82 identici al prof):
+  SUBSCRIBE         : [0x81, n_vars, len, name, len, name, ...]
+  PUBLISH           : [0x82, type, len, name, value_4bytes]
+  KEEP_ALIVE        : [0x80]
+  SUBSCRIBE_SNAPSHOT: [0x83, n_vars, len, name, ...]      (come SUBSCRIBE)
+  SNAPSHOT          : [0x84, type, len, name, value_4bytes] (come PUBLISH)
 """
 
 import socket
+import sys
 import threading
 import select
 import io
 import time
 import struct
+from array import array
+from collections import deque
 
 
 # ---------------------------------------------------------------------------
@@ -29,6 +67,8 @@ import struct
 COMMAND_KEEP_ALIVE = 0x80
 COMMAND_SUBSCRIBE  = 0x81
 COMMAND_PUBLISH    = 0x82
+COMMAND_SUBSCRIBE_SNAPSHOT = 0x83   # SUBSCRIBE + replay degli ultimi valori
+COMMAND_SNAPSHOT           = 0x84   # ultimo valore noto (risposta a 0x83)
 
 DDS_TYPE_UNKNOWN = 0
 DDS_TYPE_INT     = 1
@@ -36,28 +76,286 @@ DDS_TYPE_FLOAT   = 2
 
 KEEP_ALIVE_INTERVAL = 1.0   # secondi — deve essere < TIME_TO_LIVE (2s) in dds.gd
 
+MAX_SUBSCRIBE_PACKET = 1400   # byte — resta sotto la MTU, niente frammentazione IP
+SUBSCRIBE_REPEATS    = 3      # ripetizioni della sottoscrizione con i keep-alive
+SUBSCRIBE_RATE       = 2e6    # [byte/s] banda massima dei SUBSCRIBE per processo
+SUBSCRIBE_BURST      = 128e3  # [byte] burst iniziale ammesso dal limitatore
+RECV_BUFFER          = 1 << 20  # byte — SO_RCVBUF per assorbire il fan-out dello swarm
+
+_F32 = struct.Struct('<f')
+_I32 = struct.Struct('<i')
+
+MULTICAST_GROUP = ('239.255.44.44', 4445)  # gruppo (locale all'organizzazione) e porta
+MULTICAST_IFACE = '127.0.0.1'   # interfaccia del gruppo: loopback; '0.0.0.0' per la LAN
+MULTICAST_TTL   = 1             # non oltre la sottorete
+
+PATH_BROKER    = 'broker'       # unicast al broker, che inoltra ai subscriber
+PATH_MULTICAST = 'multicast'    # solo al gruppo multicast
+PATH_BOTH      = 'both'         # gruppo + broker (per chi legge dal broker, es. HUD)
+
+QOS_CRITICAL    = 'critical'      # sensori/tick: svuotati sempre per primi
+QOS_BEST_EFFORT = 'best_effort'   # swarm: accorpati o scartati se il loop è in ritardo
+BE_MAX_AGE      = 0.1             # [s] best-effort più vecchi di così: scartati se sostituiti
+BE_BATCH        = 256             # pacchetti best-effort letti prima di ricontrollare i critici
+QOS_DELAY_WINDOW = 4096           # campioni di ritardo conservati per classe
+
+# Timestamp di ricezione del kernel (struct timeval nel messaggio ancillare)
+_SO_TIMESTAMP = getattr(socket, 'SO_TIMESTAMP',
+                        29 if sys.platform.startswith('linux') else None)
+_TIMEVAL      = struct.Struct('@ll')
+_CMSG_SPACE   = socket.CMSG_SPACE(_TIMEVAL.size) if hasattr(socket, 'CMSG_SPACE') else 0
+
+TRANSPORT_UDP = 'udp'       # pacchetti verso il broker (Godot o broker.py)
+TRANSPORT_SHM = 'shm'       # tabella in memoria condivisa (dds_shm.py)
+
+
+class _VariableStore:
+    """
+    Archivio compatto dei topic sottoscritti da un client.
+
+    Ogni topic ha un indice fisso in array tipizzati paralleli (valore f64,
+    tipo u8, seq u64) invece di un oggetto con Lock + Condition proprio:
+    con ~7N topic per agente la memoria resta O(topic) in byte, non in
+    oggetti. Un numero di sequenza per topic conta gli aggiornamenti:
+    wait_newer() attende con predicato (seq > last_seq), quindi un valore
+    arrivato PRIMA della chiamata non viene perso (niente lost wakeup).
 
-class _MonitoredVariable:
-    """Variabile thread-safe con supporto wait/notify (identica al prof)."""
+    Le Condition vengono create solo per i topic su cui qualcuno attende
+    davvero (tick, connected, ...): update() su un topic senza attese non
+    acquisisce lock né chiama notify_all.
+
+    Un solo thread scrittore (il thread di ricezione del DDS); le letture
+    da altri thread sono singoli accessi ad array, atomici sotto il GIL.
+    """
+
+    __slots__ = ("index", "values", "dtypes", "seqs", "rx_times", "_conds", "_conds_lock")
 
     def __init__(self):
-        self._lock      = threading.Lock()
-        self._condition = threading.Condition(self._lock)
-        self.value      = None
+        self.index: dict[bytes, int] = {}       # nome utf-8 → posizione
+        self.values = array('d')
+        self.dtypes = bytearray()
+        self.seqs   = array('Q')
+        self.rx_times = array('d')              # ricezione kernel (time.time()), 0 = ignota
+        self._conds: dict[int, threading.Condition] = {}
+        self._conds_lock = threading.Lock()
+
+    def add(self, name: str) -> int:
+        key = name.encode('utf-8')
+        slot = self.index.get(key)
+        if slot is None:
+            slot = len(self.seqs)
+            self.values.append(0.0)
+            self.dtypes.append(DDS_TYPE_UNKNOWN)
+            self.seqs.append(0)
+            self.rx_times.append(0.0)
+            self.index[key] = slot
+        return slot
+
+    def slot(self, name: str):
+        return self.index.get(name.encode('utf-8'))
+
+    def get(self, slot: int):
+        if not self.seqs[slot]:
+            return None
+        value = self.values[slot]
+        return int(value) if self.dtypes[slot] == DDS_TYPE_INT else value
+
+    def update(self, slot: int, dtype: int, value: float, t_rx: float = 0.0):
+        # Valore prima di seq: chi legge seq e poi il valore non vede mai
+        # un valore più vecchio del seq letto.
+        self.values[slot]   = value
+        self.dtypes[slot]   = dtype
+        self.rx_times[slot] = t_rx
+        self.seqs[slot]  += 1
+        cond = self._conds.get(slot)
+        if cond is not None:
+            with cond:
+                cond.notify_all()
+
+    def _condition(self, slot: int) -> threading.Condition:
+        cond = self._conds.get(slot)
+        if cond is None:
+            with self._conds_lock:
+                cond = self._conds.setdefault(slot, threading.Condition())
+        return cond
+
+    def wait_newer(self, slot: int, last_seq: int, timeout: float = None):
+        """(valore, seq) appena seq > last_seq; None se scade il timeout."""
+        seqs = self.seqs
+        if seqs[slot] <= last_seq:
+            cond = self._condition(slot)
+            with cond:
+                if not cond.wait_for(lambda: seqs[slot] > last_seq, timeout):
+                    return None
+        seq = seqs[slot]
+        return self.get(slot), seq
+
+    def n_waited(self) -> int:
+        """Topic con almeno un'attesa (quindi con una Condition allocata)."""
+        return len(self._conds)
+
+
+class _TokenBucket:
+    """Limitatore di banda thread-safe (condiviso da tutti i DDS del processo)."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate    = rate
+        self.burst   = burst
+        self._tokens = burst
+        self._last   = time.monotonic()
+        self._lock   = threading.Lock()
+
+    def consume(self, amount: float):
+        """Blocca finché non ci sono amount gettoni disponibili."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst,
+                               self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= amount
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
 
-    def get(self):
+_subscribe_bucket = _TokenBucket(SUBSCRIBE_RATE, SUBSCRIBE_BURST)
+
+
+class _QosStats:
+    """Contatori e ritardi di coda (ricezione kernel → applicazione) di una classe."""
+
+    __slots__ = ("received", "coalesced", "dropped", "delays", "max_delay", "_lock")
+
+    def __init__(self):
+        self.received  = 0
+        self.coalesced = 0      # sostituiti da un valore più recente nello stesso blocco
+        self.dropped   = 0      # sostituiti e più vecchi di BE_MAX_AGE
+        self.delays    = deque(maxlen=QOS_DELAY_WINDOW)
+        self.max_delay = 0.0
+        self._lock     = threading.Lock()   # delays: letto da summary() in un altro thread
+
+    def record(self, delay: float):
+        self.received += 1
         with self._lock:
-            return self.value
+            self.delays.append(delay)
+        if delay > self.max_delay:
+            self.max_delay = delay
 
-    def wait_value(self):
-        with self._condition:
-            self._condition.wait()
-            return self.value
+    def summary(self) -> dict:
+        with self._lock:
+            d = list(self.delays)
+        d.sort()
+        pick = (lambda q: 1e3 * d[min(len(d) - 1, int(q * len(d)))]) if d else (lambda q: 0.0)
+        return {
+            "received":  self.received,
+            "coalesced": self.coalesced,
+            "dropped":   self.dropped,
+            "delay_p50_ms": pick(0.50),
+            "delay_p99_ms": pick(0.99),
+            "delay_max_ms": 1e3 * self.max_delay,
+        }
+
+
+def _enable_timestamps(sock: socket.socket) -> bool:
+    if _SO_TIMESTAMP is None or not _CMSG_SPACE:
+        return False
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, _SO_TIMESTAMP, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _recv_timestamped(sock: socket.socket):
+    """
+    (dati, t_rx) senza bloccare, None se il socket è vuoto. t_rx è l'istante
+    di ricezione del kernel (time.time()), o l'istante della lettura se il
+    timestamp non è disponibile.
+    """
+    try:
+        data, anc, _, _ = sock.recvmsg(4096, _CMSG_SPACE, socket.MSG_DONTWAIT)
+    except (BlockingIOError, InterruptedError):
+        return None
+    for level, kind, raw in anc:
+        if level == socket.SOL_SOCKET and kind == _SO_TIMESTAMP:
+            sec, usec = _TIMEVAL.unpack_from(raw)
+            return data, sec + 1e-6 * usec
+    return data, time.time()
+
+
+def build_subscribe_packets(var_list: list[str],
+                            command: int = COMMAND_SUBSCRIBE) -> list[bytes]:
+    """
+    Pacchetti SUBSCRIBE (o SUBSCRIBE_SNAPSHOT) per var_list: al massimo
+    255 nomi (n_vars è un byte) e MAX_SUBSCRIBE_PACKET byte per pacchetto.
+    """
+    packets, names, size = [], [], 2
+    for name in var_list:
+        encoded = name.encode('utf-8')
+        if names and (len(names) == 255 or
+                      size + 1 + len(encoded) > MAX_SUBSCRIBE_PACKET):
+            packets.append(bytes([command, len(names)]) + b''.join(names))
+            names, size = [], 2
+        names.append(bytes([len(encoded)]) + encoded)
+        size += 1 + len(encoded)
+    if names or not packets:
+        packets.append(bytes([command, len(names)]) + b''.join(names))
+    return packets
+
+
+class PublishPolicy:
+    """
+    Politica di pubblicazione per un singolo topic (lato publisher).
+
+    Un publish viene SOPPRESSO (non esce sul socket) se:
+      - è passato meno di min_interval dall'ultimo invio, oppure
+      - on_change/deadband sono attivi e il valore non si è mosso oltre
+        la soglia max(deadband, rel_deadband * |ultimo valore inviato|)
+    In ogni caso, se è passato più di heartbeat dall'ultimo invio il valore
+    viene rinviato comunque (refresh per chi si collega in ritardo e per
+    i pacchetti UDP persi).
+    """
 
-    def notify(self, val):
-        with self._condition:
-            self.value = val
-            self._condition.notify_all()
+    __slots__ = ("on_change", "deadband", "rel_deadband", "min_interval",
+                 "heartbeat", "last_value", "last_t", "sent", "suppressed")
+
+    def __init__(self, on_change: bool = False, deadband: float = 0.0,
+                 rel_deadband: float = 0.0, min_interval: float = 0.0,
+                 heartbeat: float = None):
+        self.on_change    = on_change or deadband > 0.0 or rel_deadband > 0.0
+        self.deadband     = deadband
+        self.rel_deadband = rel_deadband
+        self.min_interval = min_interval
+        self.heartbeat    = heartbeat
+        self.last_value   = None
+        self.last_t       = 0.0
+        self.sent         = 0
+        self.suppressed   = 0
+
+    def should_send(self, value, now: float) -> bool:
+        """Decide se inviare value; aggiorna contatori e ultimo valore inviato."""
+        if self._accept(value, now):
+            self.last_value = value
+            self.last_t     = now
+            self.sent      += 1
+            return True
+        self.suppressed += 1
+        return False
+
+    def _accept(self, value, now: float) -> bool:
+        if self.last_value is None:
+            return True
+        age = now - self.last_t
+        if self.heartbeat is not None and age >= self.heartbeat:
+            return True
+        if age < self.min_interval:
+            return False
+        if not self.on_change:
+            return True
+        threshold = max(self.deadband, self.rel_deadband * abs(self.last_value))
+        if threshold > 0.0:
+            return abs(value - self.last_value) > threshold
+        return value != self.last_value
 
 
 class DDS(threading.Thread):
@@ -67,10 +365,38 @@ class DDS(threading.Thread):
     Uso (identico al prof):
         dds = DDS()
         dds.start()                         # avvia thread ricezione + keep-alive
-        dds.subscribe(['Z', 'VZ', 'tick'])
+        dds.subscribe(['Z', 'VZ', 'tick'])  # + snapshot degli ultimi valori
+        dds.has_value('Z')                  # False finché nessuno l'ha pubblicato
         dds.wait('tick')                    # blocca finché Godot non pubblica 'tick'
+        dds.wait_newer('tick', seq, 0.5)    # idem, senza perdere tick (vedi sotto)
         z = dds.read('Z')
         dds.publish('f1', 3.14)             # tipo dedotto automaticamente
+
+    Politiche di pubblicazione (dichiarate una volta al setup):
+        dds.set_publish_policy(['status'], on_change=True, heartbeat=1.0)
+        dds.set_publish_policy(['sx', 'sy'], deadband=0.05, heartbeat=0.5)
+        dds.publish_stats()                 # {topic: (inviati, soppressi)}
+
+    Trasporto: DDS(host, port, transport='shm') restituisce un ShmDDS
+    (dds_shm.py) per agenti e simulatore sullo stesso host.
+
+    Multicast per i topic di swarm (solo trasporto UDP):
+        dds = DDS(host, port, multicast=MULTICAST_GROUP)
+        dds.set_publish_path(['sx', 'sy', 'sz'], PATH_MULTICAST)
+        dds.set_publish_path(['status'], PATH_BOTH)
+        dds.subscribe(peer_topics, multicast=True)  # nessuna sottoscrizione al broker
+    Se il gruppo non è raggiungibile (multicast_enabled False) tutti i
+    percorsi ricadono sul broker, senza cambiare il codice chiamante.
+    I topic ricevuti in multicast non hanno snapshot: il primo valore
+    arriva con la prossima pubblicazione (o heartbeat) del publisher.
+
+    Classi QoS in ricezione (solo trasporto UDP):
+        dds.subscribe(own_topics)                            # QOS_CRITICAL
+        dds.subscribe(peer_topics, qos=QOS_BEST_EFFORT)      # socket separato
+        dds.qos_stats()     # {classe: ricevuti, accorpati, scartati, ritardi}
+    Il broker identifica i peer per ip:porta: i topic best-effort sono
+    sottoscritti dal secondo socket e arrivano lì. I pacchetti multicast
+    sono sempre best-effort.
     """
 
     # Ri-esporta le costanti per compatibilità con codice del prof
@@ -78,16 +404,89 @@ class DDS(threading.Thread):
     DDS_TYPE_INT     = DDS_TYPE_INT
     DDS_TYPE_FLOAT   = DDS_TYPE_FLOAT
 
-    def __init__(self, host: str = '127.0.0.1', port: int = 4444):
+    def __new__(cls, *args, transport: str = TRANSPORT_UDP, **kwargs):
+        if cls is DDS and transport == TRANSPORT_SHM:
+            from dds_shm import ShmDDS
+            cls = ShmDDS
+        return super().__new__(cls)
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 4444,
+                 transport: str = TRANSPORT_UDP, multicast: tuple = None):
         super().__init__(daemon=True)
         self._host      = host
         self._port      = port
-        self._variables: dict[str, _MonitoredVariable] = {}
+        self._store     = _VariableStore()
+        self._policies:  dict[str, PublishPolicy] = {}
         self._running   = False
-
+        self._sub_names: dict[str, list[str]] = {QOS_CRITICAL: [], QOS_BEST_EFFORT: []}
+        self._sub_snapshot: set[str] = set()
+        self._sub_lock  = threading.Lock()     # _sub_names/_sub_snapshot/_sub_repeats
+        self._ka_thread = None
+        self._qos = {QOS_CRITICAL: _QosStats(), QOS_BEST_EFFORT: _QosStats()}
+        self._be_sock = None
+        self._sub_repeats = 0
+        self._paths: dict[str, str] = {}
+        self._mcast       = None
+        self._mcast_group = None
+        self.rx_broker    = 0
+        self.rx_multicast = 0
+        self._open()
+        if multicast is not None and transport == TRANSPORT_UDP:
+            self._open_multicast(multicast)
+
+    def _open(self):
         self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECV_BUFFER)
+        except OSError:
+            pass
         # Bind su porta effimera per ricevere le pubblicazioni dal broker
         self._sock.bind(('', 0))
+        _enable_timestamps(self._sock)
+
+        # Secondo socket per i topic best-effort (sottoscritti da qui)
+        self._be_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            self._be_sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECV_BUFFER)
+        except OSError:
+            pass
+        self._be_sock.bind(('', 0))
+        _enable_timestamps(self._be_sock)
+
+    def _open_multicast(self, group: tuple):
+        """
+        Socket di ricezione sul gruppo (condiviso tra processi con
+        SO_REUSEADDR/SO_REUSEPORT) e socket principale configurato per
+        inviare al gruppo. In caso di errore il multicast resta disattivo.
+        """
+        addr, port = group
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if hasattr(socket, 'SO_REUSEPORT'):
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECV_BUFFER)
+            except OSError:
+                pass
+            sock.bind(('', port))
+            _enable_timestamps(sock)
+            iface = socket.inet_aton(MULTICAST_IFACE)
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP,
+                            socket.inet_aton(addr) + iface)
+            self._sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, iface)
+            self._sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+            self._sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL,
+                                  MULTICAST_TTL)
+        except OSError:
+            sock.close()
+            return
+        self._mcast       = sock
+        self._mcast_group = (addr, port)
+
+    @property
+    def multicast_enabled(self) -> bool:
+        return self._mcast is not None
 
     # ------------------------------------------------------------------
     # Overload start() per accettare host/port opzionali (come il prof)
@@ -100,6 +499,11 @@ class DDS(threading.Thread):
             self._port = remote_port
         self._running = True
         super().start()
+        # Keep-alive e ripetizione delle sottoscrizioni in un thread a parte:
+        # il limitatore dei SUBSCRIBE può dormire, la ricezione no
+        self._ka_thread = threading.Thread(target=self._keep_alive, daemon=True,
+                                           name=f"{self.name}-keepalive")
+        self._ka_thread.start()
 
     def stop(self):
         self._running = False
@@ -108,19 +512,100 @@ class DDS(threading.Thread):
     # API pubblica
     # ------------------------------------------------------------------
 
-    def subscribe(self, var_list: list[str]):
+    def subscribe(self, var_list: list[str], snapshot: bool = True,
+                  multicast: bool = False, qos: str = QOS_CRITICAL):
         """
         Informa il broker che vogliamo ricevere le variabili in var_list.
         Può essere chiamato più volte (accumula le sottoscrizioni).
+
+        Con snapshot=True il broker risponde subito con l'ultimo valore dei
+        topic già pubblicati; i topic mai pubblicati restano senza valore
+        (read() → None, has_value() → False) fino alla prima pubblicazione.
+
+        I pacchetti vengono ripetuti con i prossimi SUBSCRIBE_REPEATS keep-alive
+        (il broker ignora le sottoscrizioni duplicate); lo snapshot viene
+        richiesto di nuovo solo per i topic ancora senza valore.
+
+        Con multicast=True (e gruppo attivo) i topic arrivano dal gruppo:
+        vengono solo registrati localmente, senza SUBSCRIBE al broker, così
+        un topic pubblicato su PATH_BOTH non arriva due volte.
+
+        qos sceglie la classe di ricezione (QOS_CRITICAL o QOS_BEST_EFFORT).
         """
-        buf = io.BytesIO()
-        buf.write(bytes([COMMAND_SUBSCRIBE, len(var_list)]))
+        if qos not in self._sub_names:
+            raise ValueError(f"classe QoS sconosciuta: {qos}")
         for name in var_list:
-            encoded = name.encode('utf-8')
-            buf.write(bytes([len(encoded)]))
-            buf.write(encoded)
-            self._variables[name] = _MonitoredVariable()
-        self._sock.sendto(buf.getvalue(), (self._host, self._port))
+            self._store.add(name)
+        if multicast and self._mcast is not None:
+            return
+        command = COMMAND_SUBSCRIBE_SNAPSHOT if snapshot else COMMAND_SUBSCRIBE
+        self._send_subscribe(build_subscribe_packets(var_list, command),
+                             self._qos_sock(qos))
+        with self._sub_lock:
+            self._sub_names[qos] = self._sub_names[qos] + list(var_list)
+            if snapshot:
+                self._sub_snapshot.update(var_list)
+            self._sub_repeats = SUBSCRIBE_REPEATS
+
+    def _qos_sock(self, qos: str) -> socket.socket:
+        return self._be_sock if qos == QOS_BEST_EFFORT else self._sock
+
+    def _resubscribe(self):
+        """Ripete le sottoscrizioni; snapshot solo per chi non ha ancora valori."""
+        with self._sub_lock:
+            subs     = list(self._sub_names.items())
+            snapshot = set(self._sub_snapshot)
+        for qos, names in subs:
+            plain, pending = [], []
+            for name in names:
+                if name in snapshot and not self.has_value(name):
+                    pending.append(name)
+                else:
+                    plain.append(name)
+            sock = self._qos_sock(qos)
+            if plain:
+                self._send_subscribe(build_subscribe_packets(plain), sock)
+            if pending:
+                self._send_subscribe(build_subscribe_packets(
+                    pending, COMMAND_SUBSCRIBE_SNAPSHOT), sock)
+
+    def _send_subscribe(self, packets: list[bytes], sock: socket.socket):
+        for pkt in packets:
+            _subscribe_bucket.consume(len(pkt))
+            sock.sendto(pkt, (self._host, self._port))
+
+    def set_publish_policy(self, names: list[str], **kwargs):
+        """
+        Associa una PublishPolicy (stessi kwargs del costruttore) a ciascun
+        topic in names. Ogni topic riceve la propria istanza, con contatori
+        e ultimo valore indipendenti.
+        """
+        for name in names:
+            self._policies[name] = PublishPolicy(**kwargs)
+
+    def set_publish_path(self, names: list[str], path: str):
+        """
+        Percorso di pubblicazione per i topic in names: PATH_BROKER
+        (default), PATH_MULTICAST o PATH_BOTH. Senza gruppo multicast
+        attivo ogni percorso equivale a PATH_BROKER.
+        """
+        if path not in (PATH_BROKER, PATH_MULTICAST, PATH_BOTH):
+            raise ValueError(f"percorso di pubblicazione sconosciuto: {path}")
+        for name in names:
+            self._paths[name] = path
+
+    def qos_stats(self) -> dict[str, dict]:
+        """
+        Per classe QoS: pacchetti applicati, accorpati, scartati per età e
+        ritardo di coda (ricezione kernel → valore disponibile) p50/p99/max
+        in ms sugli ultimi QOS_DELAY_WINDOW campioni.
+        """
+        return {qos: st.summary() for qos, st in self._qos.items()}
+
+    def publish_stats(self) -> dict[str, tuple[int, int]]:
+        """Contatori per i topic con politica: {nome: (inviati, soppressi)}."""
+        return {name: (pol.sent, pol.suppressed)
+                for name, pol in self._policies.items()}
 
     def publish(self, name: str, value, dtype: int = None):
         """
@@ -128,10 +613,17 @@ class DDS(threading.Thread):
 
         dtype può essere omesso: se value è int → DDS_TYPE_INT,
         altrimenti DDS_TYPE_FLOAT.
+        Se il topic ha una PublishPolicy il pacchetto può essere soppresso.
         """
+        policy = self._policies.get(name)
+        if policy is not None and not policy.should_send(value, time.monotonic()):
+            return
+
         if dtype is None:
             dtype = DDS_TYPE_INT if isinstance(value, int) else DDS_TYPE_FLOAT
+        self._send_publish(name, dtype, value)
 
+    def _send_publish(self, name: str, dtype: int, value):
         encoded = name.encode('utf-8')
         buf = io.BytesIO()
         buf.write(bytes([COMMAND_PUBLISH, dtype, len(encoded)]))
@@ -142,63 +634,213 @@ class DDS(threading.Thread):
         else:
             buf.write(struct.pack('<f', float(value)))
 
-        self._sock.sendto(buf.getvalue(), (self._host, self._port))
+        pkt  = buf.getvalue()
+        path = self._paths.get(name, PATH_BROKER)
+        if path == PATH_BROKER or self._mcast is None:
+            self._sock.sendto(pkt, (self._host, self._port))
+            return
+        self._sock.sendto(pkt, self._mcast_group)
+        if path == PATH_BOTH:
+            self._sock.sendto(pkt, (self._host, self._port))
 
     def read(self, name: str):
         """Legge l'ultimo valore ricevuto (None se non ancora arrivato)."""
-        var = self._variables.get(name)
-        return var.get() if var else None
+        slot = self._store.slot(name)
+        return self._store.get(slot) if slot is not None else None
+
+    def wait(self, name: str, timeout: float = None):
+        """
+        Blocca finché il broker non pubblica 'name'. Restituisce il valore
+        (None se scade il timeout). Un valore arrivato prima della chiamata
+        non conta: per un loop sincronizzato usare wait_newer().
+        """
+        res = self.wait_newer(name, self.seq(name), timeout)
+        return res[0] if res is not None else None
+
+    def seq(self, name: str) -> int:
+        """Numero di aggiornamenti ricevuti per 'name' (0 = mai ricevuto)."""
+        slot = self._store.slot(name)
+        return self._store.seqs[slot] if slot is not None else 0
+
+    def rx_time(self, name: str):
+        """
+        Istante di ricezione (time.time(), timestamp del kernel se
+        disponibile) dell'ultimo valore di 'name'; None se mai ricevuto o
+        ignoto. time.time() - rx_time() è l'età del dato in questo processo.
+        """
+        slot = self._store.slot(name)
+        if slot is None or not self._store.seqs[slot]:
+            return None
+        return self._store.rx_times[slot] or None
+
+    def has_value(self, name: str) -> bool:
+        """
+        True se per 'name' è arrivato almeno un valore (pubblicazione o
+        snapshot). Distingue un valore reale da un default di read() or 0.0.
+        """
+        return self.seq(name) > 0
 
-    def wait(self, name: str):
-        """Blocca finché il broker non pubblica 'name'. Restituisce il valore."""
-        var = self._variables.get(name)
-        return var.wait_value() if var else None
+    def wait_newer(self, name: str, last_seq: int, timeout: float = None):
+        """
+        Attende un valore di 'name' più recente di last_seq.
+
+        Ritorna subito se è già arrivato. Restituisce (valore, seq, saltati),
+        dove saltati = aggiornamenti intermedi mai visti dal chiamante,
+        oppure None se scade il timeout (o il topic non è sottoscritto).
+
+            seq = dds.seq('tick')
+            while True:
+                res = dds.wait_newer('tick', seq, timeout=0.5)
+                if res is None:
+                    ...                     # broker fermo: failsafe
+                    continue
+                _, seq, skipped = res
+        """
+        slot = self._store.slot(name)
+        if slot is None:
+            return None
+        res = self._store.wait_newer(slot, last_seq, timeout)
+        if res is None:
+            return None
+        value, seq = res
+        return value, seq, max(0, seq - last_seq - 1)
 
     # ------------------------------------------------------------------
     # Thread loop
     # ------------------------------------------------------------------
 
+    def _keep_alive(self):
+        """
+        Keep-alive periodico (evita TTL expiry del broker), anche dal socket
+        best-effort se ha sottoscrizioni, e ripetizione delle sottoscrizioni.
+        """
+        next_ka = time.monotonic() + KEEP_ALIVE_INTERVAL
+        while self._running:
+            pause = next_ka - time.monotonic()
+            if pause > 0:
+                time.sleep(min(pause, 0.1))
+                continue
+            next_ka += KEEP_ALIVE_INTERVAL
+            with self._sub_lock:
+                has_be = bool(self._sub_names[QOS_BEST_EFFORT])
+                repeat = self._sub_repeats > 0
+                if repeat:
+                    self._sub_repeats -= 1
+            try:
+                self._sock.sendto(bytes([COMMAND_KEEP_ALIVE]), (self._host, self._port))
+                if has_be:
+                    self._be_sock.sendto(bytes([COMMAND_KEEP_ALIVE]),
+                                         (self._host, self._port))
+                if repeat:
+                    self._resubscribe()
+            except OSError:
+                return                      # socket chiusi da run() dopo stop()
+
     def run(self):
-        last_ka = time.monotonic()
+        be      = [sock for sock in (self._be_sock, self._mcast) if sock is not None]
+        socks   = [self._sock] + be
 
         while self._running:
-            # Keep-alive periodico (evita TTL expiry del broker)
-            now = time.monotonic()
-            if now - last_ka >= KEEP_ALIVE_INTERVAL:
-                self._sock.sendto(bytes([COMMAND_KEEP_ALIVE]),
-                                  (self._host, self._port))
-                last_ka = now
-
-            ready, _, _ = select.select([self._sock], [], [], 0.1)
+            ready, _, _ = select.select(socks, [], [], 0.1)
             if not ready:
                 continue
+            self._drain_critical()
+            be_ready = [sock for sock in be if sock in ready]
+            if be_ready:
+                self._drain_best_effort(be_ready)
 
-            data, _ = self._sock.recvfrom(4096)
+        self._sock.close()
+        self._be_sock.close()
+        if self._mcast is not None:
+            self._mcast.close()
+
+    def _drain_critical(self):
+        """Applica tutti i pacchetti già in coda sul socket critico."""
+        stats = self._qos[QOS_CRITICAL]
+        while True:
+            res = _recv_timestamped(self._sock)
+            if res is None:
+                return
+            data, t_rx = res
             if not data:
                 continue
-
+            self.rx_broker += 1
             if data[0] == COMMAND_PUBLISH:
-                self._on_publish(data)
-
-        self._sock.close()
+                self._on_publish(data, t_rx=t_rx)
+            elif data[0] == COMMAND_SNAPSHOT:
+                self._on_publish(data, snapshot=True, t_rx=t_rx)
+            else:
+                continue
+            stats.record(time.time() - t_rx)
 
-    def _on_publish(self, data: bytes):
-        """Decodifica un pacchetto PUBLISH ricevuto dal broker."""
-        dtype  = data[1]
-        n_len  = data[2]
-        name   = data[3: 3 + n_len].decode('utf-8')
-        val_start = 3 + n_len
+    def _drain_best_effort(self, socks: list):
+        """
+        Legge fino a BE_BATCH pacchetti per socket e tiene solo l'ultimo
+        valore per topic (i precedenti, se più vecchi di BE_MAX_AGE, contano
+        come scartati); prima di applicarli ripassa dal socket critico.
+        """
+        stats  = self._qos[QOS_BEST_EFFORT]
+        latest: dict[bytes, tuple] = {}
+        for sock in socks:
+            from_group = sock is self._mcast
+            for _ in range(BE_BATCH):
+                res = _recv_timestamped(sock)
+                if res is None:
+                    break
+                data, t_rx = res
+                if from_group:
+                    self.rx_multicast += 1
+                else:
+                    self.rx_broker += 1
+                if not data or data[0] not in (COMMAND_PUBLISH, COMMAND_SNAPSHOT):
+                    continue
+                if from_group and data[0] != COMMAND_PUBLISH:
+                    continue
+                key  = data[3: 3 + data[2]]
+                prev = latest.get(key)
+                if prev is not None:
+                    # Uno snapshot non sostituisce un valore live già letto
+                    if data[0] == COMMAND_SNAPSHOT and prev[0][0] == COMMAND_PUBLISH:
+                        stats.coalesced += 1
+                        continue
+                    # Il valore sostituito, se più vecchio di BE_MAX_AGE, è scartato
+                    # per età; l'ultimo di ogni topic invece si applica sempre:
+                    # status/fire_* sono change-only e un salto perso resterebbe
+                    # invisibile fino al prossimo heartbeat
+                    if time.time() - prev[1] > BE_MAX_AGE:
+                        stats.dropped += 1
+                    else:
+                        stats.coalesced += 1
+                latest[key] = (data, t_rx)
+
+        self._drain_critical()
+        for data, t_rx in latest.values():
+            self._on_publish(data, snapshot=data[0] == COMMAND_SNAPSHOT, t_rx=t_rx)
+            stats.record(time.time() - t_rx)
+
+    def _on_publish(self, data: bytes, snapshot: bool = False, t_rx: float = 0.0):
+        """
+        Decodifica un pacchetto PUBLISH (o SNAPSHOT) ricevuto dal broker;
+        t_rx è l'istante di ricezione del kernel (vedi rx_time()).
+        Uno snapshot viene applicato solo se il topic non ha ancora valori:
+        non sovrascrive un valore live arrivato prima e, se ripetuto, non
+        genera aggiornamenti (seq) fittizi.
+        """
+        n_len = data[2]
+        store = self._store
+        # Lookup sul nome in byte: niente decode utf-8 per pacchetto
+        slot  = store.index.get(data[3: 3 + n_len])
+        if slot is None or (snapshot and store.seqs[slot]):
+            return
 
+        dtype = data[1]
         if dtype == DDS_TYPE_FLOAT:
-            value = struct.unpack('<f', data[val_start: val_start + 4])[0]
+            value = _F32.unpack_from(data, 3 + n_len)[0]
         elif dtype == DDS_TYPE_INT:
-            value = struct.unpack('<i', data[val_start: val_start + 4])[0]
+            value = _I32.unpack_from(data, 3 + n_len)[0]
         else:
             return
-
-        var = self._variables.get(name)
-        if var:
-            var.notify(value)
+        store.update(slot, dtype, value, t_rx)
 
 
 # ---------------------------------------------------------------------------
@@ -0,0 +1,399 @@
+"""
+dds_shm.py — Trasporto DDS in memoria condivisa per processi sullo stesso host.
+
+Quando simulatore (o broker headless) e agenti girano sulla stessa macchina,
+il giro UDP loopback (sendto → broker → sendto → recvfrom + struct) è lavoro
+inutile. ShmDDS espone la stessa API di DDS (subscribe/read/wait/wait_newer/
+publish, politiche di pubblicazione comprese) ma legge e scrive direttamente
+una tabella in multiprocessing.shared_memory:
+
+    dds = DDS(host, port, transport='shm')     # → ShmDDS
+    dds.start()
+    dds.subscribe(['drone_0/tick', 'drone_0/X'])
+    res = dds.wait_newer('drone_0/tick', seq, timeout=0.25)
+
+Layout della tabella "swarm_dds_<port>":
+  header  (HEADER_SIZE byte) : magic u32, n_slots u32, slot_size u32
+  slot i  (SLOT_SIZE byte)   :
+    +0  seq   u32   seqlock — dispari = scrittura in corso; seq // 2 = n. update
+    +4  dtype u8
+    +5  nlen  u8    0 = slot libero
+    +8  value f64
+    +16 name  NAME_MAX byte (utf-8)
+
+Ogni topic occupa uno slot fisso (hash crc32 + probing lineare). Gli slot
+vengono assegnati una volta sola, sotto un flock su file (evento raro:
+subscribe/primo publish). Le scritture sono serializzate per slot: un lock
+per tabella condiviso da tutti i client dello stesso processo più un lock
+di record (lockf) sul byte dello slot nel file di lock, tra processi; così
+più scrittori sullo stesso topic (es. world/fire_resolved, pubblicato da
+qualunque agente) non intrecciano il seqlock. I lettori non prendono lock:
+rileggono se seq è dispari o cambia durante la lettura, al più
+READ_RETRIES volte (uno scrittore morto a metà lascia seq dispari); oltre,
+la lettura fallisce (read → None, contata in read_failures) e la
+scrittura successiva sullo slot lo riallinea.
+
+Notifica senza futex: wait/wait_newer controllano seq con backoff
+(qualche giro di spin, poi sleep(0), poi sleep crescenti fino a
+MAX_POLL_SLEEP). Nessuna syscall per chi pubblica.
+
+Lo snapshot alla sottoscrizione è implicito: lo slot conserva l'ultimo
+valore pubblicato e seq == 0 indica un topic mai pubblicato (has_value).
+
+Simulatore: Godot (dds.gd) e broker.py parlano solo UDP. ShmBridge fa da
+ponte: client UDP del broker che copia nella tabella sensori, tick,
+connected e world/fire_* appena arrivano, e rimanda al broker le forze
+f1..f4 (a BRIDGE_POLL_HZ) e i topic letti dall'HUD e da fire_zone.gd
+(a BRIDGE_HUD_HZ). main.py lo avvia con DDS_TRANSPORT = 'shm':
+
+    bridge = ShmBridge(host, port, n_drones)
+    bridge.start()
+    agents = [DroneAgent(i, n, transport='shm') ...]
+
+Il ponte aggiunge al giro fino a 1 / BRIDGE_POLL_HZ sulle forze; il
+guadagno resta il traffico tra agenti (stato swarm, riassunti), che non
+passa più dal broker.
+
+Limiti: i float restano a 64 bit (niente troncamento a float32 come nel
+protocollo UDP).
+"""
+
+import fcntl
+import os
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from multiprocessing import resource_tracker, shared_memory
+
+from dds import DDS, DDS_TYPE_INT, DDS_TYPE_FLOAT, TRANSPORT_SHM, _F32, _I32
+
+MAGIC       = 0x53444453        # "SDDS"
+HEADER_SIZE = 64
+SLOT_SIZE   = 96
+NAME_MAX    = SLOT_SIZE - 16
+N_SLOTS     = 16384             # ~1.5 MB: ampiamente sopra 14 + 7N topic per N=500
+
+SPIN_POLLS     = 50 if (os.cpu_count() or 1) > 1 else 0   # spin inutile su 1 CPU
+YIELD_POLLS    = 20             # sleep(0) prima delle sleep vere
+MIN_POLL_SLEEP = 50e-6          # [s]
+MAX_POLL_SLEEP = 1e-3           # [s]
+READ_SPINS     = 100            # riletture immediate di uno slot in scrittura
+READ_RETRIES   = 200            # riletture totali (le ultime con READ_SLEEP)
+READ_SLEEP     = 50e-6          # [s]
+
+BRIDGE_POLL_HZ = 240.0          # controllo delle forze da rimandare al broker
+BRIDGE_HUD_HZ  = 30.0           # idem per i topic letti dall'HUD
+
+# Topic del ponte (per drone, senza prefisso) — vedi drone.gd / world.gd
+SIM_TOPICS   = ("X", "Y", "Z", "VX", "VY", "VZ", "TX", "TY", "TZ",
+                "WX", "WY", "WZ", "connected", "tick")            # tick per ultimo
+FORCE_TOPICS = ("f1", "f2", "f3", "f4")
+HUD_TOPICS   = ("status", "fire_x", "fire_y", "fire_z", "tgt_x", "tgt_z")
+WORLD_DOWN   = ("world/fire_new", "world/fire_x", "world/fire_y", "world/fire_z")
+WORLD_UP     = ("world/fire_resolved",)
+
+_SEQ   = struct.Struct('<I')
+_VALUE = struct.Struct('<B3xd')  # dtype (+nlen e padding saltati), value
+
+
+def table_name(port: int) -> str:
+    return f"swarm_dds_{port}"
+
+
+def _lock_path(port: int) -> str:
+    return os.path.join(tempfile.gettempdir(), f"{table_name(port)}.lock")
+
+
+def _untrack(shm: shared_memory.SharedMemory):
+    # La tabella deve sopravvivere al processo che l'ha creata: la rimozione
+    # è esplicita (unlink_table), non a carico del resource_tracker.
+    try:
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+
+
+def open_table(port: int, n_slots: int = N_SLOTS) -> shared_memory.SharedMemory:
+    """Apre (o crea, se non esiste) la tabella condivisa per 'port'."""
+    name = table_name(port)
+    size = HEADER_SIZE + n_slots * SLOT_SIZE
+    try:
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        _untrack(shm)
+        struct.pack_into('<II', shm.buf, 4, n_slots, SLOT_SIZE)
+        _SEQ.pack_into(shm.buf, 0, MAGIC)          # magic per ultimo: tabella pronta
+        return shm
+    except FileExistsError:
+        shm = shared_memory.SharedMemory(name=name, create=False)
+        _untrack(shm)
+    deadline = time.monotonic() + 1.0
+    while _SEQ.unpack_from(shm.buf, 0)[0] != MAGIC:
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"tabella {name} non inizializzata")
+        time.sleep(1e-3)
+    return shm
+
+
+_table_locks: dict[int, threading.Lock] = {}
+_table_locks_guard = threading.Lock()
+
+
+def _table_lock(port: int) -> threading.Lock:
+    """Lock di scrittura condiviso dai client dello stesso processo."""
+    with _table_locks_guard:
+        return _table_locks.setdefault(port, threading.Lock())
+
+
+def unlink_table(port: int):
+    """Rimuove la tabella condivisa (da chiamare a fine sessione)."""
+    try:
+        shm = shared_memory.SharedMemory(name=table_name(port), create=False)
+    except FileNotFoundError:
+        return
+    shm.close()
+    shm.unlink()          # unlink() deregistra anche dal resource_tracker
+
+
+class ShmDDS(DDS):
+    """
+    Client DDS su memoria condivisa. Non avvia thread né socket: start()
+    segna solo il client come attivo. Vedi docstring del modulo.
+    """
+
+    def _open(self):
+        self._shm     = open_table(self._port)
+        self._buf     = self._shm.buf
+        self._n_slots = struct.unpack_from('<I', self._buf, 4)[0]
+        self._offsets: dict[str, int] = {}
+        self._wlock   = _table_lock(self._port)
+        self._lock_fd = os.open(_lock_path(self._port), os.O_RDWR | os.O_CREAT, 0o666)
+        self.read_failures = 0
+
+    def start(self, remote_host: str = None, remote_port: int = None):  # type: ignore[override]
+        self._running = True
+
+    def stop(self):
+        self._running = False
+
+    def close(self):
+        self._buf = None
+        self._shm.close()
+        os.close(self._lock_fd)
+
+    # ------------------------------------------------------------------
+    # Slot
+    # ------------------------------------------------------------------
+
+    def _find(self, encoded: bytes):
+        buf = self._buf
+        n   = self._n_slots
+        h   = zlib.crc32(encoded) % n
+        for probe in range(n):
+            off  = HEADER_SIZE + ((h + probe) % n) * SLOT_SIZE
+            nlen = buf[off + 5]
+            if nlen == 0:
+                return None, off            # primo slot libero sulla catena
+            if bytes(buf[off + 16: off + 16 + nlen]) == encoded:
+                return off, None
+        return None, None
+
+    def _slot(self, name: str, create: bool):
+        off = self._offsets.get(name)
+        if off is not None:
+            return off
+        encoded = name.encode('utf-8')
+        if len(encoded) > NAME_MAX:
+            raise ValueError(f"nome topic troppo lungo per la tabella: {name}")
+        off, _ = self._find(encoded)
+        if off is None and create:
+            with open(_lock_path(self._port), 'a') as fh:
+                fcntl.flock(fh, fcntl.LOCK_EX)
+                off, free = self._find(encoded)     # ricontrolla sotto lock
+                if off is None:
+                    if free is None:
+                        raise RuntimeError("tabella DDS condivisa piena")
+                    self._buf[free + 16: free + 16 + len(encoded)] = encoded
+                    self._buf[free + 5] = len(encoded)   # nlen per ultimo: claim
+                    off = free
+        if off is not None:
+            self._offsets[name] = off
+        return off
+
+    def _read_slot(self, off: int):
+        """
+        (seq_count, dtype, value) con lettura consistente (seqlock), oppure
+        None se lo slot resta in scrittura per READ_RETRIES tentativi.
+        """
+        buf = self._buf
+        for attempt in range(READ_RETRIES):
+            s1 = _SEQ.unpack_from(buf, off)[0]
+            if not s1 & 1:
+                dtype, value = _VALUE.unpack_from(buf, off + 4)
+                if _SEQ.unpack_from(buf, off)[0] == s1:
+                    return s1 >> 1, dtype, value
+            if attempt >= READ_SPINS:
+                time.sleep(READ_SLEEP)
+        self.read_failures += 1
+        return None
+
+    # ------------------------------------------------------------------
+    # API (stessa semantica di DDS)
+    # ------------------------------------------------------------------
+
+    def subscribe(self, var_list: list[str], snapshot: bool = True,
+                  multicast: bool = False, qos: str = None):
+        # La tabella contiene già l'ultimo valore: lo snapshot è implicito.
+        for name in var_list:
+            self._slot(name, create=True)
+
+    def _send_publish(self, name: str, dtype: int, value):
+        off = self._slot(name, create=True)
+        buf = self._buf
+        with self._wlock:
+            # Lock di record sul byte dello slot: esclude gli altri processi
+            fcntl.lockf(self._lock_fd, fcntl.LOCK_EX, 1, off)
+            try:
+                seq = _SEQ.unpack_from(buf, off)[0]
+                if seq & 1:                  # scrittore morto a metà: riallinea
+                    seq += 1
+                _SEQ.pack_into(buf, off, seq + 1)
+                buf[off + 4] = dtype
+                struct.pack_into('<d', buf, off + 8, float(value))
+                _SEQ.pack_into(buf, off, seq + 2)
+            finally:
+                fcntl.lockf(self._lock_fd, fcntl.LOCK_UN, 1, off)
+
+    @staticmethod
+    def _decode(dtype: int, value: float):
+        return int(value) if dtype == DDS_TYPE_INT else value
+
+    def read(self, name: str):
+        off = self._slot(name, create=False)
+        if off is None:
+            return None
+        res = self._read_slot(off)
+        if res is None or not res[0]:
+            return None
+        return self._decode(res[1], res[2])
+
+    def rx_time(self, name: str):
+        # La tabella non registra istanti di ricezione (niente transito di rete)
+        return None
+
+    def seq(self, name: str) -> int:
+        off = self._slot(name, create=False)
+        if off is None:
+            return 0
+        # Aggiornamenti completati: corretto anche con uno slot bloccato
+        return _SEQ.unpack_from(self._buf, off)[0] >> 1
+
+    def wait_newer(self, name: str, last_seq: int, timeout: float = None):
+        off = self._slot(name, create=True)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        polls = 0
+        pause = MIN_POLL_SLEEP
+        while True:
+            res = self._read_slot(off)
+            if res is not None and res[0] > last_seq:
+                seq, dtype, value = res
+                return self._decode(dtype, value), seq, max(0, seq - last_seq - 1)
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            polls += 1
+            if polls < SPIN_POLLS:
+                continue
+            if polls < SPIN_POLLS + YIELD_POLLS:
+                time.sleep(0)
+            else:
+                time.sleep(pause)
+                pause = min(MAX_POLL_SLEEP, pause * 2)
+
+    def wait(self, name: str, timeout: float = None):
+        res = self.wait_newer(name, self.seq(name), timeout)
+        return res[0] if res is not None else None
+
+
+# ---------------------------------------------------------------------------
+# Ponte verso il simulatore UDP
+# ---------------------------------------------------------------------------
+
+class ShmBridge(DDS):
+    """
+    Client UDP del broker (dds.gd o broker.py) che collega il simulatore
+    alla tabella condivisa. Vedi docstring del modulo.
+
+    Verso la tabella: i pacchetti ricevuti vengono scritti nello slot
+    direttamente dal thread di ricezione, nell'ordine di arrivo (tick dopo
+    i sensori, come li pubblica drone.gd). Verso il broker: un secondo
+    thread controlla seq degli slot e ripubblica i valori cambiati.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 4444, n_drones: int = 1,
+                 poll_hz: float = BRIDGE_POLL_HZ, hud_hz: float = BRIDGE_HUD_HZ):
+        super().__init__(host, port)
+        self.table  = DDS(host, port, transport=TRANSPORT_SHM)
+        self._down  = [f"drone_{i}/{t}" for i in range(n_drones) for t in SIM_TOPICS]
+        self._down += WORLD_DOWN
+        self._names = {name.encode('utf-8'): name for name in self._down}
+        self._force = [f"drone_{i}/{t}" for i in range(n_drones) for t in FORCE_TOPICS]
+        self._hud   = [f"drone_{i}/{t}" for i in range(n_drones) for t in HUD_TOPICS]
+        self._hud  += WORLD_UP
+        self._poll_dt     = 1.0 / poll_hz
+        self._hud_divider = max(1, round(poll_hz / hud_hz))
+        self._pump = threading.Thread(target=self._pump_up, daemon=True,
+                                      name=f"ShmBridge-{port}")
+        self.copied_down = 0
+        self.copied_up   = 0
+
+    def start(self, remote_host: str = None, remote_port: int = None):  # type: ignore[override]
+        super().start(remote_host, remote_port)
+        self.table.start()
+        self.subscribe(self._down)
+        self._pump.start()
+
+    def stop(self):
+        super().stop()
+        self.table.stop()
+
+    def _on_publish(self, data: bytes, snapshot: bool = False, t_rx: float = 0.0):
+        n_len = data[2]
+        name  = self._names.get(data[3: 3 + n_len])
+        if name is None or (snapshot and self.table.seq(name)):
+            return
+        dtype = data[1]
+        if dtype == DDS_TYPE_FLOAT:
+            value = _F32.unpack_from(data, 3 + n_len)[0]
+        elif dtype == DDS_TYPE_INT:
+            value = _I32.unpack_from(data, 3 + n_len)[0]
+        else:
+            return
+        self.table._send_publish(name, dtype, value)
+        self.copied_down += 1
+
+    def _pump_up(self):
+        table = self.table
+        last: dict[str, int] = {}
+        k = 0
+        next_t = time.monotonic()
+        while self._running:
+            names = self._force if k % self._hud_divider else self._force + self._hud
+            for name in names:
+                seq = table.seq(name)
+                if seq <= last.get(name, 0):
+                    continue
+                off = table._slot(name, create=False)
+                res = table._read_slot(off)
+                if res is None:
+                    continue
+                last[name] = res[0]
+                self._send_publish(name, res[1], res[2])
+                self.copied_up += 1
+            k += 1
+            next_t += self._poll_dt
+            pause = next_t - time.monotonic()
+            if pause > 0:
+                time.sleep(pause)
+            else:
+                next_t = time.monotonic()
@@ -17,6 +17,11 @@ Topic DDS per drone i (prefisso "drone_{i}/"):
     drone_{i}/status          : codice stato FSM (float)
     drone_{i}/sx, sy, sz      : posizione pubblicata dagli altri
     drone_{i}/fire_x,y,z      : target incendio corrente
+    (con SWARM_MULTICAST: sx..sz solo sul gruppo multicast, status e
+     fire_* sul gruppo e al broker per l'HUD di Godot)
+    cluster_{c}/...           : riassunto del cluster c (con CLUSTER_SIZE,
+                                vedi swarm_clusters.py): i topic sopra
+                                solo per i peer del proprio cluster
 
   EVENTI INCENDIO (da Godot FireManager):
     world/fire_new            : id incendio (float, 0=nessuno)
@@ -29,18 +34,21 @@ import math
 import threading
 import logging
 
-from dds import DDS, Time
+from async_log import setup_logging, TelemetryLog
+from checkpoint import Checkpoint, CheckpointStore
+from dds import (DDS, Time, TRANSPORT_UDP, MULTICAST_GROUP,
+                 PATH_MULTICAST, PATH_BOTH, QOS_BEST_EFFORT)
 from multirotor_controller import MultirotorController
 from coverage_planner import CoveragePlanner
+from scheduler import RateScheduler
+from swarm_clusters import (ClusterAggregator, cluster_of, members, visible_clusters,
+                            home_cluster, summary_topics, SUMMARY_FIELDS)
+from trajectory import Follower, connect, plan_path
 
 # ---------------------------------------------------------------------------
-# Logging
+# Logging — asincrono: il loop accoda, un thread separato scrive
 # ---------------------------------------------------------------------------
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(name)s] %(message)s",
-    datefmt="%H:%M:%S"
-)
+setup_logging(logging.INFO)
 
 # ---------------------------------------------------------------------------
 # Parametri operativi
@@ -49,9 +57,68 @@ TAKEOFF_ALT     = 8.0    # [m] quota di crociera
 WAYPOINT_RADIUS = 2.0    # [m] raggio di accettazione waypoint
 FIRE_RADIUS     = 2.5    # [m] raggio per iniziare soppressione
 SUPPRESS_TIME   = 5.0    # [s] tempo di hover per spegnere il fuoco
+AREA_SIZE       = 150.0  # [m] lato dell'area perlustrata (CoveragePlanner, world.gd)
 N_DRONES        = 5
 DDS_HOST        = '127.0.0.1'
 DDS_PORT        = 4444
+DDS_TRANSPORT   = TRANSPORT_UDP   # 'shm': stesso host, con dds_shm.ShmBridge (main.py)
+SWARM_MULTICAST = False           # topic di swarm via multicast (MULTICAST_GROUP), non via broker
+
+# Politiche di pubblicazione dello stato swarm (vedi DDS.set_publish_policy)
+STATE_HEARTBEAT = 1.0    # [s] refresh forzato di status/fire/tgt anche se invariati
+POS_DEADBAND    = 0.05   # [m] variazione minima di sx/sy/sz per ripubblicare
+POS_HEARTBEAT   = 0.5    # [s] refresh forzato della posizione condivisa
+
+# Multi-rate: il controllo gira ad ogni tick, il resto a frequenza ridotta
+PHYSICS_RATE_HZ = 60.0   # frequenza del tick di Godot
+SWARM_RATE_HZ   = 10.0   # coordinamento swarm (_update_swarm + _check_fire)
+STATUS_RATE_HZ  = 10.0   # pubblicazione stato verso gli altri agenti
+LOG_RATE_HZ     = 10.0   # log di debug del drone 0
+FRAME_BUDGET    = 0.012  # [s] oltre questo tempo dal tick i task lenti slittano
+LOG_BURST_TIME  = 5.0    # [s] log fitto dopo l'ingresso in una fase attiva
+LOG_IDLE_PERIOD = 2.0    # [s] periodo del log fuori dalla fase attiva
+
+# Watchdog sul tick di Godot
+CONNECT_TIMEOUT = 5.0    # [s] periodo del messaggio di attesa connessione
+TICK_TIMEOUT    = 0.25   # [s] senza tick oltre questo tempo → failsafe hover
+MAX_DT          = 0.1    # [s] dt oltre questo valore (es. dopo failsafe) è scartato
+STARTUP_TIMEOUT = 30.0   # [s] attesa massima alla barriera di avvio dello swarm
+
+# Stimatore di stato (state_estimator.SwarmEstimator, richiede NumPy)
+USE_ESTIMATOR   = False  # main.py crea uno stimatore condiviso dallo swarm
+ACTUATION_DELAY = 1.0 / 60.0   # [s] non misurato: drone.gd applica le forze al frame successivo
+LATENCY_ALPHA   = 0.05   # peso EWMA di età della posa e latenza tick → forze pubblicate
+
+# Evitamento collisioni tra droni (collision_avoidance, richiede NumPy):
+# corregge la velocità target XY negli stati di volo libero
+USE_AVOIDANCE   = False
+
+# Traiettorie a minimo jerk (trajectory.py) al posto dei target a gradino:
+# riferimento di posizione + feedforward di velocità/accelerazione
+USE_TRAJECTORY  = False
+TRAJ_MAX_LAG    = 10.0   # [m] riferimento più avanti di così: nuovo raccordo dalla posizione misurata
+
+# Aggregazione gerarchica dello stato swarm (swarm_clusters.py): sottoscrizione
+# completa ai soli peer del proprio cluster, riassunti per i cluster vicini.
+# Serve FIRE_CLUSTER_REACH * 2 <= CLUSTER_SUMMARY_REACH (i candidati si vedono).
+# L'evitamento collisioni vede solo i peer del proprio cluster.
+CLUSTER_SIZE          = 0     # droni per cluster (0 = disattivata: tutti i peer)
+CLUSTER_SUMMARY_REACH = 2     # cluster vicini (per indice) di cui leggere il riassunto
+FIRE_CLUSTER_REACH    = 1     # risponde solo a fuochi entro questi cluster da quello di casa
+PEER_TIMEOUT          = 3.0   # [s] peer senza aggiornamenti: fuori dall'elezione del leader
+SUMMARY_TIMEOUT       = 3.0   # [s] riassunto non aggiornato: cluster ignorato
+
+# Checkpoint dello stato (checkpoint.CheckpointStore) e ripartenza a caldo:
+# un agente riavviato riprende dall'ultimo checkpoint invece che da TAKEOFF
+CHECKPOINT_DIR     = None   # directory dei checkpoint (None = disattivati)
+CHECKPOINT_RATE_HZ = 2.0    # frequenza di cattura (task a bassa frequenza)
+CHECKPOINT_MAX_AGE = 30.0   # [s] checkpoint più vecchi: ripartenza a freddo
+RESUME_ALT_TOL     = 2.0    # [m] scarto massimo da TAKEOFF_ALT per riprendere in volo
+
+# Telemetria strutturata: drone_id → 1 record ogni k esecuzioni del task "log"
+# (drone assente = TELEMETRY_DEFAULT_EVERY, 0 = disattivata)
+TELEMETRY_EVERY         = {0: 1}
+TELEMETRY_DEFAULT_EVERY = 0
 
 # ---------------------------------------------------------------------------
 # Codici numerici degli stati (servono perché DDS trasporta solo float)
@@ -75,6 +142,23 @@ class State:
     RETURNING   = "RETURNING"
 
 FREE_STATES = {State.EXPLORING, State.RETURNING}
+AVOID_STATES = {State.EXPLORING, State.MOVING, State.RETURNING}
+
+# Indice numerico degli stati per i record di telemetria (STATE_NAMES[idx])
+STATE_NAMES = (State.IDLE, State.TAKEOFF, State.HOVERING, State.EXPLORING,
+               State.MOVING, State.SUPPRESSING, State.RETURNING)
+STATE_INDEX = {name: i for i, name in enumerate(STATE_NAMES)}
+
+_telemetry: TelemetryLog = None
+
+
+def default_telemetry() -> TelemetryLog:
+    """TelemetryLog condiviso dagli agenti che non ne ricevono uno esplicito."""
+    global _telemetry
+    if _telemetry is None:
+        _telemetry = TelemetryLog(STATE_NAMES)
+        _telemetry.start()
+    return _telemetry
 
 
 class DroneAgent:
@@ -83,13 +167,24 @@ class DroneAgent:
     Ogni istanza gira nel proprio thread (vedi main.py).
     """
 
-    def __init__(self, drone_id: int, n_drones: int = N_DRONES):
+    def __init__(self, drone_id: int, n_drones: int = N_DRONES,
+                 telemetry: TelemetryLog = None,
+                 transport: str = DDS_TRANSPORT,
+                 port: int = DDS_PORT,
+                 start_barrier: threading.Barrier = None,
+                 multicast: bool = SWARM_MULTICAST,
+                 estimator=None,
+                 avoidance: bool = USE_AVOIDANCE,
+                 checkpoint: CheckpointStore = None,
+                 trajectory: bool = USE_TRAJECTORY,
+                 cluster_size: int = CLUSTER_SIZE):
         self.id      = drone_id
         self.n       = n_drones
         self.log     = logging.getLogger(f"D{drone_id}")
         self._p      = f"drone_{drone_id}"   # prefisso topic
 
-        self.dds     = DDS(DDS_HOST, DDS_PORT)
+        self.dds     = DDS(DDS_HOST, port, transport=transport,
+                           multicast=MULTICAST_GROUP if multicast else None)
         self.ctrl    = MultirotorController()
         self.timer   = Time()
 
@@ -106,77 +201,179 @@ class DroneAgent:
         self._suppress_t    = 0.0
         self._hover_start   = 0.0
 
-        # Swarm awareness (aggiornata ogni ciclo)
+        # Stimatore condiviso (riga drone_id), età misurata della posa al tick
+        # (ricezione kernel → tick) e latenza misurata del loop (tick → forze)
+        self._est         = estimator
+        self._meas_seq    = 0
+        self.pose_age     = 0.0
+        self.loop_latency = 0.0
+
+        # Swarm awareness (aggiornata a SWARM_RATE_HZ dal task "swarm")
         self._swarm: dict[int, dict] = {}
         self._swarm_lock = threading.Lock()
 
+        # Cluster (swarm_clusters): peer sottoscritti per intero, riassunti
+        # dei cluster vicini e freschezza (seq, istante dell'ultimo cambio)
+        self._cluster = None
+        self._peers   = [i for i in range(n_drones) if i != drone_id]
+        self._cluster_view: dict[int, dict] = {}
+        self._seen: dict[str, tuple] = {}
+        if cluster_size > 0:
+            self._cluster_size = cluster_size
+            self._cluster = cluster_of(drone_id, cluster_size)
+            self._peers   = [i for i in members(self._cluster, n_drones, cluster_size)
+                             if i != drone_id]
+            self._neighbors = [c for c in visible_clusters(self._cluster, n_drones,
+                                                           cluster_size, CLUSTER_SUMMARY_REACH)
+                               if c != self._cluster]
+            self._agg = ClusterAggregator(
+                self._cluster, (StateCode.EXPLORING, StateCode.RETURNING),
+                (StateCode.MOVING, StateCode.SUPPRESSING), StateCode.MOVING, FIRE_RADIUS)
+
+        # Evitamento collisioni: vista dei peer aggiornata con lo swarm,
+        # vincoli risolti a ogni tick tra FSM e controller
+        self._avoid = None
+        if avoidance:
+            from collision_avoidance import CollisionAvoidance   # richiede NumPy
+            self._avoid = CollisionAvoidance(n_drones, drone_id)
+
         # Piano di perlustrazione
         self.waypoints = CoveragePlanner.get_sector(
-            drone_id, n_drones, area_size=150.0, altitude=TAKEOFF_ALT)
+            drone_id, n_drones, area_size=AREA_SIZE, altitude=TAKEOFF_ALT)
         self._wp_idx   = 0
 
+        # Traiettoria: piano del settore (chiuso, in cache per waypoint uguali)
+        # e inseguitore; None = target a gradino
+        self._follow = Follower() if trajectory else None
+        self._plan   = plan_path(self.waypoints, closed=True) if trajectory else None
+        # Il riferimento avanza con il tempo dei tick elaborati, non con
+        # l'orologio: fermo in failsafe, più lento se i tick rallentano
+        self._traj_t    = 0.0
+        self._traj_goal = None       # (x, y) del raccordo verso un punto; None = piano
+        self.traj_rejoins = 0        # raccordi ripartiti dalla posizione misurata
+
         # Quota di decollo per il controller
         self.ctrl.set_target(z=TAKEOFF_ALT)
 
+        # Task a bassa frequenza, sfasati per drone_id così che lo swarm
+        # non esegua il coordinamento tutto nello stesso tick
+        self._dt            = 1.0 / PHYSICS_RATE_HZ
+        self._active_since  = None
+        self._last_log      = 0.0
+        self._tlm = (telemetry or default_telemetry()).channel(
+            drone_id, TELEMETRY_EVERY.get(drone_id, TELEMETRY_DEFAULT_EVERY))
+        self._failsafe      = False
+        self.ticks_skipped  = 0      # tick arrivati ma mai elaborati
+        self.failsafe_count = 0      # ingressi in failsafe per timeout del tick
+        self.sched = RateScheduler(PHYSICS_RATE_HZ, log=self.log)
+        self.sched.add("swarm",  self._coordinate,
+                       rate_hz=SWARM_RATE_HZ,  phase=drone_id)
+        self.sched.add("status", self._publish_own_state,
+                       rate_hz=STATUS_RATE_HZ, phase=drone_id + 1)
+        self.sched.add("log",    self._log_debug,
+                       rate_hz=LOG_RATE_HZ,    phase=drone_id + 2)
+        if self._cluster is not None:
+            self.sched.add("cluster", self._publish_summary,
+                           rate_hz=SWARM_RATE_HZ, phase=drone_id + 4)
+
+        # Checkpoint periodici (impacchettati qui, scritti dal thread dello store)
+        self._ckpt     = checkpoint
+        self._ckpt_seq = 0
+        self.resumed   = None        # Checkpoint da cui è ripartito l'agente
+        if checkpoint is not None:
+            self.sched.add("checkpoint", self._save_checkpoint,
+                           rate_hz=CHECKPOINT_RATE_HZ, phase=drone_id + 3)
+
+        # Avvio coordinato dello swarm (vedi main.py)
+        self._barrier      = start_barrier
+        self._dds_ready    = False
+        self.t_created     = time.monotonic()
+        self.t_first_tick  = None    # istante del primo tick elaborato
+        self._stop         = threading.Event()
+
     # =======================================================================
     # Entry point del thread
     # =======================================================================
 
+    def setup(self):
+        """Avvia il client DDS e invia le sottoscrizioni (idempotente)."""
+        if not self._dds_ready:
+            self._setup_dds()
+            self._dds_ready = True
+
+    def stop(self):
+        """Termina il loop di run() entro TICK_TIMEOUT; run() ferma poi il client DDS."""
+        self._stop.set()
+
     def run(self):
-        self._setup_dds()
+        self.setup()
         self.timer.start()
 
         self.log.info("In attesa di Godot (variabile 'start')...")
-        self.dds.wait(f"{self._p}/connected")
+        while self.dds.wait_newer(f"{self._p}/connected", 0,
+                                  timeout=CONNECT_TIMEOUT) is None:
+            if self._stop.is_set():
+                self.dds.stop()
+                return
+            self.log.info("Godot non ancora connesso, continuo ad attendere...")
+
+        # Barriera di avvio: tutti gli agenti partono dal primo tick
+        # successivo all'ultimo agente pronto, quindi dallo stesso frame.
+        if self._barrier is not None:
+            try:
+                self._barrier.wait(timeout=STARTUP_TIMEOUT)
+            except threading.BrokenBarrierError:
+                self.log.warning("Barriera di avvio non completata, parto comunque.")
         self.log.info("Godot connesso. Inizio loop di controllo.")
-        self.state = State.TAKEOFF
-        _dbg = 0
-        _dbg_transition = 0
-
-        while True:
-            # Sincronizzazione: attendi il tick di Godot (come nel notebook del prof)
-            tick = self.dds.wait(f"{self._p}/tick")
+        if not (self._ckpt is not None and self._resume()):
+            self.state = State.TAKEOFF
+
+        tick_topic = f"{self._p}/tick"
+        tick_seq   = self.dds.seq(tick_topic)
+        while not self._stop.is_set():
+            # Sincronizzazione: attendi un tick più recente dell'ultimo elaborato.
+            # Se è già arrivato ritorna subito; se Godot si ferma → failsafe.
+            res = self.dds.wait_newer(tick_topic, tick_seq, timeout=TICK_TIMEOUT)
+            if res is None:
+                if not self._stop.is_set():
+                    self._enter_failsafe()
+                continue
+            _, tick_seq, skipped = res
+            self.ticks_skipped += skipped
+            if self._failsafe:
+                self.log.warning("Tick di nuovo disponibile. Fine failsafe.")
+                self._failsafe = False
+
+            t_tick  = time.monotonic()
+            if self.t_first_tick is None:
+                self.t_first_tick = t_tick
             delta_t = self.timer.elapsed()
-            if delta_t <= 0:
-                delta_t = 1.0 / 60.0
+            if delta_t <= 0 or delta_t > MAX_DT:
+                delta_t = 1.0 / PHYSICS_RATE_HZ
+            self._dt = delta_t
+            self._traj_t += delta_t
 
-            # 1. Leggi sensori
+            # 1. Leggi sensori (e, se attivo, stima/predizione dello stato)
             self._read_state()
+            if self._est is not None:
+                self._estimate(t_tick)
 
-            _dbg += 1
-
-            # Log ad alta frequenza subito dopo la transizione a MOVING/EXPLORING,
-            # log normale ogni 2s altrimenti — solo drone 0.
-            if self.id == 0:
-                _active = self.state in (State.MOVING, State.EXPLORING,
-                                         State.SUPPRESSING)
-                if _active and _dbg_transition == 0:
-                    _dbg_transition = _dbg          # segna inizio fase attiva
-                _in_crash_window = (_active and
-                                    _dbg - _dbg_transition < 300)  # ~5s
-                if _in_crash_window or _dbg % 120 == 0:
-                    self.log.info(
-                        f"[{self.state}] "
-                        f"pos=({self.x:.2f},{self.y:.2f},{self.z:.2f}) "
-                        f"pitch={math.degrees(self.tx):.1f}° "
-                        f"roll={math.degrees(self.ty):.1f}° | "
-                        f"tgt=({self.ctrl.x_target:.1f},{self.ctrl.y_target:.1f},"
-                        f"{self.ctrl.z_target:.1f}) "
-                        f"vz_tgt={self.ctrl.vz_target:.2f} "
-                        f"dt={delta_t*1000:.1f}ms"
-                    )
-
-            # 2. Aggiorna stato swarm
-            self._update_swarm()
-
-            # 3. FSM
+            # 2. FSM (e, se attivo, evitamento collisioni sulla velocità target)
             self._update_fsm(delta_t)
+            if self._follow is not None:
+                self._track()
+            if self._avoid is not None:
+                self._avoid_collisions(t_tick)
 
-            # 4. Controller fisico → pubblica forze
+            # 3. Controller fisico → pubblica forze (ogni tick)
             self._control_and_publish(delta_t)
+            self.loop_latency += LATENCY_ALPHA * (
+                time.monotonic() - t_tick - self.loop_latency)
+
+            # 4. Task a bassa frequenza: coordinamento swarm, stato, log
+            self.sched.step(deadline=t_tick + FRAME_BUDGET)
 
-            # 5. Pubblica il proprio stato per gli altri agenti
-            self._publish_own_state()
+        self.dds.stop()
 
     # =======================================================================
     # Setup DDS
@@ -195,13 +392,12 @@ class DroneAgent:
         ]
 
         swarm_vars = []
-        for i in range(self.n):
-            if i != self.id:
-                swarm_vars += [
-                    f"drone_{i}/status",
-                    f"drone_{i}/sx", f"drone_{i}/sy", f"drone_{i}/sz",
-                    f"drone_{i}/fire_x", f"drone_{i}/fire_y", f"drone_{i}/fire_z",
-                ]
+        for i in self._peers:
+            swarm_vars += [
+                f"drone_{i}/status",
+                f"drone_{i}/sx", f"drone_{i}/sy", f"drone_{i}/sz",
+                f"drone_{i}/fire_x", f"drone_{i}/fire_y", f"drone_{i}/fire_z",
+            ]
 
         fire_vars = [
             "world/fire_new",
@@ -209,7 +405,35 @@ class DroneAgent:
             "world/fire_resolved",
         ]
 
-        self.dds.subscribe(own_vars + swarm_vars + fire_vars)
+        # I topic dei peer sono best-effort: socket separato, svuotato dopo
+        # sensori e tick. In multicast arrivano dal gruppo: niente
+        # sottoscrizione al broker (no-op se il gruppo non è attivo).
+        self.dds.subscribe(own_vars + fire_vars)
+        self.dds.subscribe(swarm_vars, multicast=True, qos=QOS_BEST_EFFORT)
+        if self._cluster is not None:
+            # Riassunti dal broker (pubblicati solo lì); quelli del proprio
+            # cluster escono con la stessa politica dello stato
+            self.dds.subscribe([t for c in self._neighbors for t in summary_topics(c)],
+                               qos=QOS_BEST_EFFORT)
+            self.dds.set_publish_policy(summary_topics(self._cluster),
+                                        on_change=True, heartbeat=STATE_HEARTBEAT)
+
+        # Stato condiviso: esce sul socket solo quando cambia (o per heartbeat).
+        # Le forze f1..f4 restano senza politica: Godot le legge ogni frame.
+        self.dds.set_publish_policy(
+            [f"{p}/status", f"{p}/fire_x", f"{p}/fire_y", f"{p}/fire_z",
+             f"{p}/tgt_x", f"{p}/tgt_z"],
+            on_change=True, heartbeat=STATE_HEARTBEAT)
+        self.dds.set_publish_policy(
+            [f"{p}/sx", f"{p}/sy", f"{p}/sz"],
+            deadband=POS_DEADBAND, heartbeat=POS_HEARTBEAT)
+
+        # Percorsi: la posizione condivisa serve solo agli agenti (gruppo);
+        # status e fire_* anche all'HUD di Godot, che legge dal broker.
+        # tgt_x/tgt_z restano sul broker (solo HUD).
+        self.dds.set_publish_path([f"{p}/sx", f"{p}/sy", f"{p}/sz"], PATH_MULTICAST)
+        self.dds.set_publish_path(
+            [f"{p}/status", f"{p}/fire_x", f"{p}/fire_y", f"{p}/fire_z"], PATH_BOTH)
 
     # =======================================================================
     # Lettura sensori
@@ -230,10 +454,42 @@ class DroneAgent:
         self.wy = self.dds.read(f"{p}/WY") or 0.0
         self.wz = self.dds.read(f"{p}/WZ") or 0.0
 
+    def _estimate(self, t: float):
+        """
+        Fonde le misure appena lette nello stimatore (solo se Godot ha
+        pubblicato un nuovo frame: altrimenti predizione pura) e sostituisce
+        lo stato con la predizione all'istante in cui le forze agiranno:
+        età misurata della posa + latenza misurata del loop + ACTUATION_DELAY.
+        L'età parte dal timestamp di ricezione del kernel (DDS.rx_time): il
+        transito UDP prima del socket non è misurabile, i pacchetti non
+        portano l'istante d'invio. Le velocità restano le stime filtrate
+        (vedi state_estimator).
+        """
+        seq = self.dds.seq(f"{self._p}/X")
+        if seq != self._meas_seq:
+            self._meas_seq = seq
+            t_rx = self.dds.rx_time(f"{self._p}/X")
+            if t_rx is not None:
+                age = time.time() - (time.monotonic() - t) - t_rx
+                self.pose_age += LATENCY_ALPHA * (max(0.0, age) - self.pose_age)
+            self._est.update(self.id,
+                             (self.x, self.y, self.z, self.tx, self.ty, self.tz),
+                             (self.vx, self.vy, self.vz, self.wx, self.wy, self.wz), t)
+        else:
+            self._est.update(self.id, None, None, t)
+        pos, vel = self._est.predict(self.id,
+                                     self.pose_age + self.loop_latency + ACTUATION_DELAY)
+        self.x, self.y, self.z, self.tx, self.ty, self.tz = pos.tolist()
+        self.vx, self.vy, self.vz, self.wx, self.wy, self.wz = vel.tolist()
+
     def _update_swarm(self):
+        now = time.monotonic()
         with self._swarm_lock:
-            for i in range(self.n):
-                if i == self.id:
+            for i in self._peers:
+                # Peer mai visto (nessuna pubblicazione né snapshot): non è
+                # un drone fermo in (0,0,0), resta fuori dalla decisione.
+                if not self.dds.has_value(f"drone_{i}/status"):
+                    self._swarm.pop(i, None)
                     continue
                 self._swarm[i] = {
                     "status": self.dds.read(f"drone_{i}/status") or 0.0,
@@ -244,6 +500,135 @@ class DroneAgent:
                               self.dds.read(f"drone_{i}/fire_y") or 0.0,
                               self.dds.read(f"drone_{i}/fire_z") or 0.0],
                 }
+                if self._cluster is not None:
+                    self._fresh(f"drone_{i}/status", now)
+            if self._cluster is not None:
+                self._update_cluster_view(now)
+            if self._avoid is not None:
+                ids = list(self._swarm)
+                self._avoid.update_peers(
+                    ids, [self._swarm[i]["pos"] for i in ids],
+                    [self._swarm[i]["status"] for i in ids], time.monotonic())
+
+    def _fresh(self, topic: str, now: float) -> float:
+        """Secondi dall'ultimo aggiornamento osservato di topic (seq cambiata)."""
+        seq = self.dds.seq(topic)
+        prev = self._seen.get(topic)
+        if prev is None or prev[0] != seq:
+            self._seen[topic] = (seq, now)
+            return 0.0
+        return now - prev[1]
+
+    def _update_cluster_view(self, now: float):
+        """Riassunti dei cluster vicini aggiornati da meno di SUMMARY_TIMEOUT."""
+        for c in self._neighbors:
+            topics = summary_topics(c)
+            if not self.dds.has_value(topics[0]) or \
+                    self._fresh(topics[0], now) > SUMMARY_TIMEOUT:
+                self._cluster_view.pop(c, None)
+                continue
+            self._cluster_view[c] = {k: self.dds.read(t) or 0.0
+                                     for k, t in zip(SUMMARY_FIELDS, topics)}
+
+    def _is_leader(self, now: float) -> bool:
+        """Leader del cluster: id minimo tra sé e i peer aggiornati da meno di PEER_TIMEOUT."""
+        for i in self._peers:
+            if i > self.id:
+                return True
+            seen = self._seen.get(f"drone_{i}/status")
+            if seen is not None and now - seen[1] <= PEER_TIMEOUT:
+                return False
+        return True
+
+    def _publish_summary(self):
+        """Task a bassa frequenza: il leader pubblica il riassunto del cluster."""
+        now = time.monotonic()
+        if not self._is_leader(now):
+            return
+        fire_id, fire_pos = self._current_fire()
+        own = (self._status_code(), [self.x, self.y, self.z],
+               self.target_fire if self.target_fire else [0.0, 0.0, 0.0])
+        # Solo i membri aggiornati da meno di PEER_TIMEOUT: un peer caduto
+        # non resta nel conteggio dei liberi né in best_dist
+        with self._swarm_lock:
+            records = [own] + [(p["status"], p["pos"], p["fire"])
+                               for i, p in self._swarm.items()
+                               if now - self._seen.get(f"drone_{i}/status", (0, -math.inf))[1]
+                               <= PEER_TIMEOUT]
+        values = self._agg.summarize(records, fire_id, fire_pos)
+        for topic, v in zip(self._agg.topics, values):
+            self.dds.publish(topic, v)
+        self._agg.published += 1
+
+    def _avoid_collisions(self, t: float):
+        """
+        Sostituisce la velocità XY desiderata dal controller con quella
+        compatibile con i vincoli ORCA verso i peer vicini (assi Godot X/Z =
+        controller x/y). Fuori da AVOID_STATES o senza vicini: nessun override.
+        """
+        v = None
+        if self.state in AVOID_STATES:
+            v = self._avoid.solve((self.x, self.y, self.z), (self.vx, self.vz),
+                                  self.ctrl.preferred_velocity(self.x, self.z), t)
+        if v is None:
+            self.ctrl.clear_velocity_override()
+        else:
+            self.ctrl.set_velocity_override(*v)
+
+    # =======================================================================
+    # Traiettorie
+    # =======================================================================
+
+    def _track(self):
+        """
+        A ogni tick: punto della traiettoria → target e feedforward del
+        controller. Se il drone è rimasto indietro di oltre TRAJ_MAX_LAG
+        (es. trattenuto dall'evitamento collisioni) il riferimento riparte
+        con un raccordo dalla posizione misurata, invece di trascinare il
+        target lontano come un gradino.
+        """
+        if not self._follow.active:
+            return
+        t = self._traj_t
+        ref = self._follow.reference(t)
+        if self._dist2d(ref[:2], [self.x, self.z]) > TRAJ_MAX_LAG:
+            self.traj_rejoins += 1
+            if self._traj_goal is not None:
+                self._follow_to(*self._traj_goal)
+            else:
+                self._follow_plan(self._wp_idx)
+            ref = self._follow.reference(t)
+        self.ctrl.set_reference(*ref)
+
+    def _ref_state(self) -> tuple:
+        """
+        Stato di partenza di un nuovo raccordo: il riferimento corrente
+        (continuità di velocità e accelerazione) o, se non c'è o il drone è
+        rimasto indietro di oltre TRAJ_MAX_LAG, lo stato misurato.
+        """
+        if self._follow.active:
+            x, y, vx, vy, ax, ay = self._follow.reference(self._traj_t)
+            if self._dist2d([x, y], [self.x, self.z]) < TRAJ_MAX_LAG:
+                return (x, y), (vx, vy), (ax, ay)
+        return (self.x, self.z), (self.vx, self.vz), (0.0, 0.0)
+
+    def _follow_plan(self, leg: int):
+        """Raccordo fino a waypoints[leg], poi il piano del settore da lì in avanti."""
+        plan = self._plan
+        self._follow.start(self._traj_t, connect(*self._ref_state(), plan.points[leg],
+                                                 plan.via[leg], tag=leg), plan, leg)
+        self._traj_goal = None
+
+    def _follow_to(self, x: float, y: float):
+        """Raccordo fino a (x, y) del controller, con arrivo da fermo."""
+        self._follow.start(self._traj_t, connect(*self._ref_state(), (x, y)))
+        self._traj_goal = (x, y)
+
+    def _stop_trajectory(self):
+        if self._follow is not None:
+            self._follow.stop()
+            self._traj_goal = None
+            self.ctrl.clear_reference()
 
     # =======================================================================
     # FSM
@@ -256,14 +641,12 @@ class DroneAgent:
             self._do_hovering()
         elif self.state == State.EXPLORING:
             self._do_exploring()
-            self._check_fire()
         elif self.state == State.MOVING:
             self._do_moving()
         elif self.state == State.SUPPRESSING:
             self._do_suppressing(dt)
         elif self.state == State.RETURNING:
             self._do_returning()
-            self._check_fire()
 
     def _do_takeoff(self):
         # altitude_only=True in _control_and_publish gestisce tutto:
@@ -293,9 +676,29 @@ class DroneAgent:
 
     def _do_exploring(self):
         wp = self.waypoints[self._wp_idx]
-        if self._dist2d([self.x, self.z], wp) < WAYPOINT_RADIUS:
+        reached = self._dist2d([self.x, self.z], wp) < WAYPOINT_RADIUS
+        if self._follow is None:
+            if reached:
+                self._wp_idx = (self._wp_idx + 1) % len(self.waypoints)
+                self._set_next_waypoint()
+            return
+
+        # Con la traiettoria il waypoint conta come coperto solo all'arrivo
+        # del drone, come con il gradino; il piano intanto prosegue
+        if not self._follow.active or self._follow.tag is None:
+            self._follow_plan(self._wp_idx)
+        if reached:
             self._wp_idx = (self._wp_idx + 1) % len(self.waypoints)
-            self._set_next_waypoint()
+            return
+        # Riferimento già oltre il waypoint senza che il drone ci sia
+        # passato: si torna a coprirlo. ahead = tratti del piano tra il
+        # waypoint e il riferimento (n-1: riferimento ancora sul tratto
+        # precedente, il drone è arrivato prima)
+        n = len(self.waypoints)
+        ahead = (self._follow.tag - self._wp_idx) % n
+        if 1 <= ahead < n - 1 and (ahead > 1 or self._dist2d(
+                self._follow.reference(self._traj_t)[:2], wp) > TRAJ_MAX_LAG):
+            self._follow_plan(self._wp_idx)
 
     def _do_moving(self):
         if self.target_fire is None:
@@ -306,14 +709,18 @@ class DroneAgent:
         resolved_id = self.dds.read("world/fire_resolved") or 0.0
         if resolved_id == self.fire_id:
             self.log.info(f"Fuoco {self.fire_id:.0f} spento da alleati. Annullamento.")
+            self._stop_trajectory()
             self.target_fire = None
             self.fire_id = None
             self.state = State.RETURNING
             return
 
         fx, _, fz = self.target_fire
+        if self._follow is not None and not self._follow.active:
+            self._follow_to(fx, fz)                  # es. dopo la ripresa da checkpoint
         if self._dist2d([self.x, self.z], [fx, fz]) < FIRE_RADIUS:
             self.log.info(f"Sopra fuoco {self.fire_id:.0f}. Soppressione.")
+            self._stop_trajectory()
             self._suppress_t = 0.0
             self.state = State.SUPPRESSING
 
@@ -332,7 +739,10 @@ class DroneAgent:
         wp = self.waypoints[self._wp_idx]
 
         # -- AGGIUNTO: Dobbiamo dire al controller di muoversi fisicamente verso il WP
-        self.ctrl.set_target(x=wp[0], y=wp[1])
+        if self._follow is None:
+            self.ctrl.set_target(x=wp[0], y=wp[1])
+        elif not self._follow.active:
+            self._follow_plan(self._wp_idx)
 
         if self._dist2d([self.x, self.z], wp) < WAYPOINT_RADIUS * 3:
             self.state = State.EXPLORING
@@ -341,25 +751,39 @@ class DroneAgent:
     # Logica swarm distribuita
     # =======================================================================
 
-    def _check_fire(self):
+    def _coordinate(self):
+        """Task a bassa frequenza: aggiorna la vista dello swarm e valuta i fuochi."""
+        self._update_swarm()
+        if self.state in FREE_STATES:
+            self._check_fire()
+
+    def _current_fire(self) -> tuple:
+        """(id, [x, y, z]) dell'ultimo fuoco annunciato e non spento; (0.0, None) se nessuno."""
+        if not self.dds.has_value("world/fire_new"):
+            return 0.0, None
         fire_id = self.dds.read("world/fire_new") or 0.0
         resolved_id = self.dds.read("world/fire_resolved") or 0.0
         if fire_id == 0.0 or fire_id == resolved_id:
-            return
-        if fire_id == self.fire_id:
-            return
-
-        fire_pos = [
+            return 0.0, None
+        return fire_id, [
             self.dds.read("world/fire_x") or 0.0,
             self.dds.read("world/fire_y") or 0.0,
             self.dds.read("world/fire_z") or 0.0,
         ]
 
+    def _check_fire(self):
+        fire_id, fire_pos = self._current_fire()
+        if fire_pos is None or fire_id == self.fire_id:
+            return
+
         if self._should_respond(fire_id, fire_pos):
             self.log.info(f"Rispondo a fuoco {fire_id:.0f} in {fire_pos}")
             self.target_fire = fire_pos
             self.fire_id     = fire_id
-            self.ctrl.set_target(x=fire_pos[0], y=fire_pos[2])
+            if self._follow is None:
+                self.ctrl.set_target(x=fire_pos[0], y=fire_pos[2])
+            else:
+                self._follow_to(fire_pos[0], fire_pos[2])
             self.state = State.MOVING
 
     def _should_respond(self, fire_id: float, fire_pos: list) -> bool:
@@ -370,9 +794,20 @@ class DroneAgent:
           1. Devo essere libero (EXPLORING o RETURNING)
           2. Non ci devono essere già abbastanza droni diretti verso questo fuoco
           3. Non ci devono essere droni liberi più vicini di me
+
+        Con i cluster: solo per fuochi entro FIRE_CLUSTER_REACH dal cluster
+        di casa; il proprio cluster si valuta peer per peer, i cluster
+        candidati dal riassunto. None (nessuna decisione, si riprova al
+        prossimo coordinamento) se un riassunto non si riferisce ancora a
+        questo fuoco.
         """
         if self.state not in FREE_STATES:
             return False
+        home = None
+        if self._cluster is not None:
+            home = home_cluster(fire_pos[0], self.n, self._cluster_size, AREA_SIZE)
+            if abs(home - self._cluster) > FIRE_CLUSTER_REACH:
+                return False
 
         my_pos  = [self.x, self.y, self.z]
         my_dist = self._dist3d(my_pos, fire_pos)
@@ -392,6 +827,16 @@ class DroneAgent:
                     if self._dist3d(info["pos"], fire_pos) < my_dist - 0.5:
                         closer_free += 1
 
+        if home is not None:
+            for c, summary in self._cluster_view.items():
+                if abs(c - home) > FIRE_CLUSTER_REACH:
+                    continue
+                if summary["fire_id"] != fire_id:
+                    return None
+                already_responding += int(summary["responding"])
+                if summary["best_dist"] < my_dist - 0.5:
+                    closer_free += 1
+
         needed = 1
         if already_responding >= needed:
             return False
@@ -431,9 +876,25 @@ class DroneAgent:
         self.dds.publish(f"{p}/f3", f3)
         self.dds.publish(f"{p}/f4", f4)
 
-    def _publish_own_state(self):
+    def _enter_failsafe(self):
+        """
+        Nessun tick entro TICK_TIMEOUT: stato non più aggiornato, quindi niente
+        controllo in retroazione. Pubblica spinta uniforme di hover (assetto
+        livellato) finché i tick non riprendono; i target restano invariati.
+        """
+        if not self._failsafe:
+            self._failsafe = True
+            self.failsafe_count += 1
+            self.log.warning(f"Nessun tick da {TICK_TIMEOUT:.2f}s. Failsafe hover.")
+        f = self.ctrl.hover_ff
         p = self._p
-        sc = {
+        self.dds.publish(f"{p}/f1", f)
+        self.dds.publish(f"{p}/f2", f)
+        self.dds.publish(f"{p}/f3", f)
+        self.dds.publish(f"{p}/f4", f)
+
+    def _status_code(self) -> float:
+        return {
             State.IDLE:        StateCode.IDLE,
             State.TAKEOFF:     StateCode.TAKEOFF,
             State.HOVERING:    StateCode.HOVERING,
@@ -442,7 +903,10 @@ class DroneAgent:
             State.SUPPRESSING: StateCode.SUPPRESSING,
             State.RETURNING:   StateCode.RETURNING,
         }.get(self.state, 0.0)
-        self.dds.publish(f"{p}/status", sc)
+
+    def _publish_own_state(self):
+        p = self._p
+        self.dds.publish(f"{p}/status", self._status_code())
         self.dds.publish(f"{p}/sx", self.x)
         self.dds.publish(f"{p}/sy", self.y)
         self.dds.publish(f"{p}/sz", self.z)
@@ -456,6 +920,88 @@ class DroneAgent:
         self.dds.publish(f"{p}/tgt_x", self.ctrl.x_target)
         self.dds.publish(f"{p}/tgt_z", self.ctrl.y_target)
 
+    # =======================================================================
+    # Checkpoint e ripartenza a caldo
+    # =======================================================================
+
+    def _save_checkpoint(self):
+        """Task a bassa frequenza: cattura e impacchetta lo stato, nessun I/O."""
+        if self.state == State.IDLE:
+            return
+        hover = time.monotonic() - self._hover_start if self.state == State.HOVERING else 0.0
+        self._ckpt_seq += 1
+        self._ckpt.save(Checkpoint(
+            self.id, self.n, self._ckpt_seq, time.time(), STATE_INDEX[self.state],
+            self._wp_idx, self.fire_id, self.target_fire, self._suppress_t,
+            hover, self.ctrl.snapshot()).pack())
+
+    def _resume(self) -> bool:
+        """
+        Riprende dall'ultimo checkpoint, prima del primo tick: il primo tick
+        elaborato esegue già la FSM e il controller ripristinati. Ripartenza a
+        freddo (False) se il checkpoint manca, è vecchio, è di uno swarm di
+        dimensione diversa, precede il volo, o se il drone non è in quota
+        (simulatore riavviato anche lui).
+        """
+        cp = self._ckpt.load(self.id)
+        if cp is None:
+            return False
+        state = STATE_NAMES[cp.state] if cp.state < len(STATE_NAMES) else None
+        if cp.age() > CHECKPOINT_MAX_AGE or cp.n_drones != self.n or \
+                state in (None, State.IDLE, State.TAKEOFF):
+            self.log.info(f"Checkpoint #{cp.seq} non utilizzabile "
+                          f"({state}, {cp.age():.1f}s). Ripartenza da TAKEOFF.")
+            return False
+        self._read_state()
+        if abs(self.y - TAKEOFF_ALT) > RESUME_ALT_TOL:
+            self.log.info(f"Checkpoint #{cp.seq} scartato: quota {self.y:.1f} m. "
+                          "Ripartenza da TAKEOFF.")
+            return False
+
+        self.ctrl.restore(cp.ctrl)
+        self.state        = state
+        self._wp_idx      = cp.wp_idx % len(self.waypoints)
+        self.fire_id      = cp.fire_id
+        self.target_fire  = cp.target_fire
+        self._suppress_t  = cp.suppress_t
+        self._hover_start = time.monotonic() - cp.hover_elapsed
+        self._ckpt_seq    = cp.seq
+        if state in (State.MOVING, State.SUPPRESSING) and self.target_fire is None:
+            self.state = State.RETURNING             # fuoco perso: torna al settore
+        self.resumed = cp
+        self.log.info(f"Ripresa da checkpoint #{cp.seq} ({cp.age():.2f}s): "
+                      f"{self.state}, waypoint #{self._wp_idx}"
+                      + (f", fuoco {self.fire_id:.0f}" if self.fire_id is not None else ""))
+        return True
+
+    # =======================================================================
+    # Logging di debug
+    # =======================================================================
+
+    def _log_debug(self):
+        """
+        Telemetria fitta per LOG_BURST_TIME dopo l'ingresso in MOVING/
+        EXPLORING/SUPPRESSING, ogni LOG_IDLE_PERIOD altrimenti. Solo un record
+        numerico accodato: formattazione e I/O avvengono nel thread di scrittura.
+        """
+        if self._tlm.every <= 0:
+            return
+        now     = time.monotonic()
+        _active = self.state in (State.MOVING, State.EXPLORING,
+                                 State.SUPPRESSING)
+        if _active and self._active_since is None:
+            self._active_since = now            # segna inizio fase attiva
+        _in_crash_window = (_active and
+                            now - self._active_since < LOG_BURST_TIME)
+        if not _in_crash_window and now - self._last_log < LOG_IDLE_PERIOD:
+            return
+        self._last_log = now
+        c = self.ctrl
+        self._tlm.record(self.sched.tick, STATE_INDEX[self.state],
+                         self.x, self.y, self.z, self.tx, self.ty,
+                         c.x_target, c.y_target, c.z_target,
+                         c.vz_target, self._dt)
+
     # =======================================================================
     # Utility
     # =======================================================================
@@ -0,0 +1,298 @@
+"""
+fault_proxy.py — Proxy UDP con iniezione di guasti tra client DDS e broker.
+
+Si mette tra gli agenti e il broker (broker.py o dds.gd) sullo stesso host:
+i client puntano al proxy invece che al broker e ogni pacchetto, in
+entrambe le direzioni, passa da un profilo di degrado:
+
+  loss       : probabilità di scartare il pacchetto
+  delay      : ritardo fisso [s]
+  jitter     : ritardo aggiuntivo uniforme in [-jitter, +jitter] (mai < 0);
+               con jitter > 0 i pacchetti si riordinano naturalmente
+  reorder    : probabilità di trattenere il pacchetto reorder_delay secondi
+               in più (riordino esplicito)
+  duplicate  : probabilità di consegnare una seconda copia
+  bandwidth  : [byte/s] collegamento a banda limitata (None = illimitata);
+               la coda oltre queue_limit secondi scarta in coda (tail drop)
+
+Il profilo si sceglie per topic (nome nei pacchetti PUBLISH/SNAPSHOT) con
+pattern fnmatch, il primo che corrisponde; KEEP_ALIVE, SUBSCRIBE e i topic
+senza pattern usano il profilo di default. Ogni profilo ha un proprio
+collegamento (banda e coda) per direzione.
+
+Solo il traffico unicast client ↔ broker passa dal proxy: i pacchetti dei
+topic di swarm pubblicati sul gruppo multicast (DroneAgent con
+SWARM_MULTICAST, dds.PATH_MULTICAST/PATH_BOTH) lo aggirano e non subiscono
+alcun degrado. fault_scenarios disattiva il multicast per questo.
+
+Per ogni client il proxy apre un socket verso il broker: il broker vede un
+peer distinto per client, come senza proxy, e le risposte tornano al
+client giusto.
+
+    proxy = FaultProxy(('127.0.0.1', 4444), port=4445,
+                       profile=Impairment(loss=0.05, delay=0.01),
+                       topic_profiles=[("drone_*/tick", Impairment(jitter=0.005))])
+    proxy.start()          # i client usano la porta 4445
+
+Uso da riga di comando:
+    python fault_proxy.py --broker-port 4444 --port 4445 --loss 0.05 --delay-ms 10
+"""
+
+import argparse
+import fnmatch
+import heapq
+import random
+import select
+import socket
+import threading
+import time
+
+from dds import COMMAND_PUBLISH, COMMAND_SNAPSHOT
+
+IDLE_TIMEOUT = 10.0     # [s] client silenzioso oltre questo tempo: socket chiuso
+RECV_BUFFER  = 4 << 20  # byte — come broker.py
+
+UP   = "up"             # client → broker
+DOWN = "down"           # broker → client
+
+
+class Impairment:
+    """Profilo di degrado di un collegamento. Vedi docstring del modulo."""
+
+    def __init__(self, loss: float = 0.0, delay: float = 0.0, jitter: float = 0.0,
+                 duplicate: float = 0.0, reorder: float = 0.0,
+                 reorder_delay: float = 0.02, bandwidth: float = None,
+                 queue_limit: float = 0.1):
+        self.loss          = loss
+        self.delay         = delay
+        self.jitter        = jitter
+        self.duplicate     = duplicate
+        self.reorder       = reorder
+        self.reorder_delay = reorder_delay
+        self.bandwidth     = bandwidth
+        self.queue_limit   = queue_limit
+
+    def __repr__(self):
+        fields = ", ".join(f"{k}={v}" for k, v in vars(self).items())
+        return f"Impairment({fields})"
+
+
+class _Link:
+    """Stato del collegamento (profilo, direzione): fine dell'ultima trasmissione."""
+    __slots__ = ("free_at",)
+
+    def __init__(self):
+        self.free_at = 0.0
+
+
+class FaultProxy(threading.Thread):
+    """Proxy UDP con degrado configurabile (un thread). Vedi docstring del modulo."""
+
+    def __init__(self, broker_addr: tuple, host: str = '127.0.0.1', port: int = 0,
+                 profile: Impairment = None, topic_profiles: list = None,
+                 seed: int = None):
+        super().__init__(daemon=True, name=f"FaultProxy-{port}")
+        self.broker_addr = broker_addr
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECV_BUFFER)
+        except OSError:
+            pass
+        self._sock.bind((host, port))
+        self.port = self._sock.getsockname()[1]
+
+        self._upstream: dict[tuple, socket.socket] = {}   # client → socket verso il broker
+        self._clients:  dict[socket.socket, tuple] = {}   # socket → client
+        self._last_seen: dict[tuple, float] = {}
+        self._queue: list = []                            # heap (scadenza, n, sock, data, addr, dir)
+        self._n       = 0
+        self._rng     = random.Random(seed)
+        self._running = False
+        self.set_profile(profile, topic_profiles)
+
+        # Contatori per direzione
+        self.stats = {d: {"rx": 0, "tx": 0, "lost": 0, "queue_drops": 0,
+                          "duplicated": 0, "reordered": 0} for d in (UP, DOWN)}
+
+    def set_profile(self, profile: Impairment = None, topic_profiles: list = None):
+        """Sostituisce i profili (i pacchetti già in coda non cambiano)."""
+        self.profile        = profile or Impairment()
+        self.topic_profiles = list(topic_profiles or [])
+        self._by_topic: dict[bytes, Impairment] = {}
+        self._links: dict[tuple, _Link] = {}
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self):
+        self._running = True
+        super().start()
+
+    def stop(self):
+        self._running = False
+
+    def run(self):
+        last_sweep = time.monotonic()
+        while self._running:
+            now = time.monotonic()
+            timeout = 0.1
+            if self._queue:
+                timeout = min(timeout, max(0.0, self._queue[0][0] - now))
+            ready, _, _ = select.select([self._sock, *self._clients], [], [], timeout)
+            for sock in ready:
+                self._drain(sock)
+
+            now = time.monotonic()
+            while self._queue and self._queue[0][0] <= now:
+                _, _, sock, data, addr, direction = heapq.heappop(self._queue)
+                try:
+                    sock.sendto(data, addr)
+                    self.stats[direction]["tx"] += 1
+                except OSError:
+                    pass
+
+            if now - last_sweep >= 1.0:
+                self._expire_clients(now)
+                last_sweep = now
+
+        for sock in self._clients:
+            sock.close()
+        self._sock.close()
+
+    # ------------------------------------------------------------------
+    # Inoltro
+    # ------------------------------------------------------------------
+
+    def _drain(self, sock: socket.socket):
+        while True:
+            try:
+                data, addr = sock.recvfrom(65535, socket.MSG_DONTWAIT)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return                       # ICMP port unreachable dal peer
+            if sock is self._sock:
+                up = self._upstream.get(addr)
+                if up is None:
+                    up = self._open_upstream(addr)
+                self._last_seen[addr] = time.monotonic()
+                self._schedule(data, up, self.broker_addr, UP)
+            else:
+                self._schedule(data, self._sock, self._clients[sock], DOWN)
+
+    def _open_upstream(self, client: tuple) -> socket.socket:
+        up = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            up.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECV_BUFFER)
+        except OSError:
+            pass
+        up.bind((self._sock.getsockname()[0], 0))
+        self._upstream[client] = up
+        self._clients[up] = client
+        return up
+
+    def _expire_clients(self, now: float):
+        for client, t in list(self._last_seen.items()):
+            if now - t > IDLE_TIMEOUT:
+                up = self._upstream.pop(client)
+                del self._clients[up]
+                del self._last_seen[client]
+                up.close()
+
+    def _profile_for(self, data: bytes) -> Impairment:
+        if not self.topic_profiles or not data or \
+                data[0] not in (COMMAND_PUBLISH, COMMAND_SNAPSHOT):
+            return self.profile
+        name = data[3: 3 + data[2]]
+        prof = self._by_topic.get(name)
+        if prof is None:
+            topic = name.decode('utf-8', 'replace')
+            prof = next((p for pattern, p in self.topic_profiles
+                         if fnmatch.fnmatchcase(topic, pattern)), self.profile)
+            self._by_topic[name] = prof
+        return prof
+
+    def _schedule(self, data: bytes, sock: socket.socket, addr: tuple, direction: str):
+        st   = self.stats[direction]
+        st["rx"] += 1
+        prof = self._profile_for(data)
+        rng  = self._rng
+        if prof.loss and rng.random() < prof.loss:
+            st["lost"] += 1
+            return
+
+        now = time.monotonic()
+        due = now
+        if prof.bandwidth:
+            link = self._links.get((id(prof), direction))
+            if link is None:
+                link = self._links[(id(prof), direction)] = _Link()
+            start = max(now, link.free_at)
+            if start - now > prof.queue_limit:
+                st["queue_drops"] += 1
+                return
+            link.free_at = start + len(data) / prof.bandwidth
+            due = link.free_at
+
+        due += prof.delay
+        if prof.jitter:
+            due += rng.uniform(-prof.jitter, prof.jitter)
+        if prof.reorder and rng.random() < prof.reorder:
+            st["reordered"] += 1
+            due += prof.reorder_delay
+        self._push(max(due, now), sock, data, addr, direction)
+
+        if prof.duplicate and rng.random() < prof.duplicate:
+            st["duplicated"] += 1
+            self._push(max(due, now) + rng.uniform(0.0, 0.001), sock, data, addr, direction)
+
+    def _push(self, due: float, sock, data: bytes, addr: tuple, direction: str):
+        self._n += 1
+        heapq.heappush(self._queue, (due, self._n, sock, data, addr, direction))
+
+    def n_clients(self) -> int:
+        return len(self._upstream)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Proxy UDP con iniezione di guasti per DDS")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=4445, help="porta a cui puntano i client")
+    ap.add_argument("--broker-host", default="127.0.0.1")
+    ap.add_argument("--broker-port", type=int, default=4444)
+    ap.add_argument("--loss", type=float, default=0.0)
+    ap.add_argument("--delay-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--duplicate", type=float, default=0.0)
+    ap.add_argument("--reorder", type=float, default=0.0)
+    ap.add_argument("--bandwidth-kbps", type=float, default=None)
+    ap.add_argument("--topics", default=None,
+                    help="pattern fnmatch: degrado solo su questi topic (es. 'drone_*/tick')")
+    args = ap.parse_args()
+
+    prof = Impairment(loss=args.loss, delay=args.delay_ms / 1000.0,
+                      jitter=args.jitter_ms / 1000.0, duplicate=args.duplicate,
+                      reorder=args.reorder,
+                      bandwidth=args.bandwidth_kbps * 125.0 if args.bandwidth_kbps else None)
+    if args.topics:
+        proxy = FaultProxy((args.broker_host, args.broker_port), args.host, args.port,
+                           topic_profiles=[(args.topics, prof)])
+    else:
+        proxy = FaultProxy((args.broker_host, args.broker_port), args.host, args.port,
+                           profile=prof)
+    proxy.start()
+    print(f"Fault proxy: {args.host}:{proxy.port} → {args.broker_host}:{args.broker_port} "
+          f"({prof})")
+    try:
+        while True:
+            time.sleep(5.0)
+            up, down = proxy.stats[UP], proxy.stats[DOWN]
+            print(f"  up rx {up['rx']} persi {up['lost']} | "
+                  f"down rx {down['rx']} persi {down['lost']} code {down['queue_drops']}")
+    except KeyboardInterrupt:
+        proxy.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+fault_scenarios.py — Stabilità del controllo dello swarm in funzione del
+degrado della rete (fault_proxy).
+
+Per ogni livello di degrado si esegue uno scenario completo, in tempo reale:
+
+  mondo     : headless_world.HeadlessWorld, N QuadrotorModel a 60 Hz che,
+              come drone.gd, leggono f1..f4 e pubblicano sensori + tick sul
+              broker (nello stesso processo, come dds.gd in Godot)
+  rete      : broker.Broker ← FaultProxy ← DroneAgent (un thread ciascuno);
+              il degrado vale in entrambe le direzioni, su tutti i topic o
+              solo su quelli di --topics. Multicast disattivato
+              (multicast=False) anche con SWARM_MULTICAST: il gruppo
+              aggirerebbe il proxy
+  incendio  : uno solo, a --fire-at secondi simulati, vicino alla linea di
+              partenza
+
+Metriche (dopo il decollo, dal lato del mondo dove possibile):
+  alt_rms / alt_max : errore di quota rispetto a TAKEOFF_ALT [m]
+  stale             : frazione di frame fisici con forze non aggiornate
+                      (nessun output del controllo per quel tick)
+  tick_loss         : tick pubblicati e mai ricevuti dagli agenti
+  skipped           : tick ricevuti ma non elaborati (ticks_skipped)
+  failsafe          : ingressi in failsafe hover
+  response / resolve: secondi dall'incendio al primo drone in SUPPRESSING
+                      e a world/fire_resolved
+  crash             : un drone in volo è sceso sotto headless_world.CRASH_ALT
+
+Uso:
+    python fault_scenarios.py --sweep loss --levels 0 0.05 0.1 0.2 0.3
+    python fault_scenarios.py --sweep delay --levels 0 10 30 60 --topics 'drone_*/f?'
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+from async_log import TelemetryLog
+from broker import Broker
+from drone_agent import DroneAgent, State, STATE_NAMES
+from fault_proxy import FaultProxy, Impairment, UP, DOWN
+from headless_world import HeadlessWorld
+
+HOST     = '127.0.0.1'
+FIRE_POS = (10.0, 0.0, -55.0)     # vicino alla linea di partenza
+
+# Grandezza variata dalla sweep: campo di Impairment, unità → SI, livelli di default
+SWEEPS = {
+    "loss":      ("loss",      1.0,   (0.0, 0.05, 0.1, 0.2, 0.3)),
+    "delay":     ("delay",     1e-3,  (0.0, 5.0, 20.0, 50.0)),      # ms
+    "jitter":    ("jitter",    1e-3,  (0.0, 2.0, 5.0, 10.0)),       # ms
+    "duplicate": ("duplicate", 1.0,   (0.0, 0.1, 0.3)),
+    "reorder":   ("reorder",   1.0,   (0.0, 0.1, 0.3)),
+    "bandwidth": ("bandwidth", 125.0, (0.0, 2000.0, 1000.0, 500.0)),  # kbit/s, 0 = illimitata
+}
+
+
+def run_scenario(n: int, profile: Impairment, topics: str, duration: float,
+                 fire_at: float, seed: int = 0) -> dict:
+    broker = Broker(HOST, 0)
+    broker.start()
+    if topics:
+        proxy = FaultProxy((HOST, broker.port), HOST, 0,
+                           topic_profiles=[(topics, profile)], seed=seed)
+    else:
+        proxy = FaultProxy((HOST, broker.port), HOST, 0, profile=profile, seed=seed)
+    proxy.start()
+
+    world = HeadlessWorld(broker, n, fires=[(fire_at, FIRE_POS)])
+    tlm   = TelemetryLog(STATE_NAMES, binary_path=os.devnull)
+    tlm.start()
+    barrier = threading.Barrier(n)
+    # Niente multicast: i topic di swarm sul gruppo non passerebbero dal proxy
+    agents  = [DroneAgent(i, n, telemetry=tlm, port=proxy.port, start_barrier=barrier,
+                          multicast=False)
+               for i in range(n)]
+    for a in agents:
+        a.setup()
+    threads = [threading.Thread(target=a.run, name=f"Drone-{a.id}", daemon=True)
+               for a in agents]
+    for t in threads:
+        t.start()
+    world.start()
+
+    t_response = None
+    t_end = time.monotonic() + duration
+    while time.monotonic() < t_end:
+        if t_response is None and world.fires and \
+                any(a.state == State.SUPPRESSING for a in agents):
+            t_response = time.monotonic()
+        time.sleep(0.01)
+
+    for a in agents:
+        a.stop()
+    for t in threads:
+        t.join(timeout=1.0)
+    world.stop()
+    world.join(timeout=1.0)
+    proxy.stop()
+    broker.stop()
+    tlm.stop()
+
+    published = world.frames * n
+    received  = sum(min(a.dds.seq(f"drone_{a.id}/tick"), world.frames) for a in agents)
+    err  = world.alt_err
+    fire = next(iter(world.fires.values()), None)
+    t_fire     = fire["t_spawn"] if fire else None
+    t_resolved = fire["t_resolved"] if fire else None
+    return {
+        "alt_rms":    math.sqrt(sum(e * e for e in err) / len(err)) if err else None,
+        "alt_max":    max(abs(e) for e in err) if err else None,
+        "stale":      world.stale_fraction(),
+        "tick_loss":  1.0 - received / published if published else None,
+        "skipped":    sum(a.ticks_skipped for a in agents),
+        "failsafe":   sum(a.failsafe_count for a in agents),
+        "response_s": t_response - t_fire if t_response and t_fire else None,
+        "resolve_s":  t_resolved - t_fire if t_resolved else None,
+        "crash":      world.crashed,
+        "proxy":      {d: dict(proxy.stats[d]) for d in (UP, DOWN)},
+    }
+
+
+def _fmt(v, spec: str, width: int) -> str:
+    return f"{v:{width}{spec}}" if v is not None else f"{'—':>{width}s}"
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Scenari di degrado rete per lo swarm")
+    ap.add_argument("--sweep", choices=sorted(SWEEPS), default="loss")
+    ap.add_argument("--levels", type=float, nargs="+",
+                    help="livelli della sweep (loss/duplicate/reorder: probabilità, "
+                         "delay/jitter: ms, bandwidth: kbit/s con 0 = illimitata)")
+    ap.add_argument("--topics", default=None,
+                    help="pattern fnmatch dei topic degradati (default: tutti)")
+    ap.add_argument("--drones", type=int, default=3)
+    ap.add_argument("--duration", type=float, default=45.0, help="[s] per livello")
+    ap.add_argument("--fire-at", type=float, default=12.0, help="[s] dall'avvio del mondo")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--verbose", action="store_true", help="log degli agenti")
+    ap.add_argument("--json", help="salva i risultati in questo file")
+    args = ap.parse_args()
+
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+    field, scale, defaults = SWEEPS[args.sweep]
+    levels = args.levels if args.levels else list(defaults)
+
+    results = []
+    print("Degrado su tutto il traffico agenti ↔ broker (multicast disattivato)")
+    print(f"{args.sweep:>10s} | {'alt rms':>7s} {'alt max':>7s} | {'stale':>6s} "
+          f"{'persi':>6s} {'saltati':>7s} {'failsafe':>8s} | {'risposta':>8s} "
+          f"{'spento':>7s} | crash")
+    for level in levels:
+        value = level * scale
+        if field == "bandwidth" and not value:
+            value = None
+        r = run_scenario(args.drones, Impairment(**{field: value}), args.topics,
+                         args.duration, args.fire_at, args.seed)
+        r["level"] = level
+        results.append(r)
+        print(f"{level:10g} | {_fmt(r['alt_rms'], '.3f', 7)} {_fmt(r['alt_max'], '.3f', 7)} | "
+              f"{_fmt(100 * r['stale'] if r['stale'] is not None else None, '.1f', 5)}% "
+              f"{_fmt(100 * r['tick_loss'] if r['tick_loss'] is not None else None, '.1f', 5)}% "
+              f"{r['skipped']:7d} {r['failsafe']:8d} | {_fmt(r['response_s'], '.1f', 7)}s "
+              f"{_fmt(r['resolve_s'], '.1f', 6)}s | {'SÌ' if r['crash'] else 'no'}")
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump({"sweep": args.sweep, "topics": args.topics, "drones": args.drones,
+                       "duration": args.duration, "results": results}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,387 @@
+"""
+gain_tuner.py — Ricerca automatica dei guadagni di MultirotorController.
+
+Ogni candidato (insieme di guadagni) viene valutato con simulazioni a ciclo
+chiuso della cascata completa su QuadrotorModel (quad_sim.py), con lo stesso
+mapping assi Godot → controller di DroneAgent._control_and_publish:
+
+  takeoff   : decollo da terra a TAKEOFF_ALT (altitude_only come in TAKEOFF)
+  step      : gradino XY di STEP_DIST metri partendo in hover
+  waypoints : giro di un quadrato con commutazione a WAYPOINT_RADIUS
+
+Punteggio (più basso = meglio): overshoot, tempo di assestamento, frazione
+di tick in saturazione, errore di quota; penalità fissa se il drone cade,
+si ribalta o non completa il giro di waypoint. Le simulazioni girano in un
+ProcessPoolExecutor.
+
+Strategie di ricerca:
+  grid   : griglia regolare sui parametri scelti (--grid punti per asse)
+  random : campionamento uniforme nei limiti
+  cma    : evolution strategy (μ/μ_w, λ) a covarianza diagonale con
+           adattamento cumulativo del passo (CMA-ES separabile semplificata)
+
+Esempi:
+    python gain_tuner.py --search random --samples 2000
+    python gain_tuner.py --search grid --params xy_kp,xy_sat --grid 8
+    python gain_tuner.py --search cma --generations 30 --popsize 24 --json best.json
+"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from drone_agent import TAKEOFF_ALT, WAYPOINT_RADIUS
+from multirotor_controller import MultirotorController
+from quad_sim import QuadrotorModel
+
+DT              = 1.0 / 60.0    # tick fisico di Godot
+STEP_DIST       = 15.0          # [m] ampiezza del gradino XY
+SETTLE_BAND     = 0.3           # [m] banda di assestamento
+CRASH_SCORE     = 1e6
+
+# ---------------------------------------------------------------------------
+# Spazio dei guadagni: nome → (attributi del controller, min, max)
+# ---------------------------------------------------------------------------
+GAIN_SPACE = {
+    "z_kp":         (("z_control.kp",),                              0.5, 4.0),
+    "vz_kp":        (("vz_control.kp",),                             1.0, 10.0),
+    "vz_ki":        (("vz_control.ki",),                             0.0, 5.0),
+    "xy_kp":        (("x_control.kp", "y_control.kp"),               0.1, 1.5),
+    "xy_sat":       (("x_control.saturation", "y_control.saturation"), 1.0, 8.0),
+    "vxy_kp":       (("vx_control.kp", "vy_control.kp"),             0.1, 1.0),
+    "tilt_sat_deg": (("vx_control.saturation", "vy_control.saturation"), 5.0, 30.0),
+    "att_kp":       (("roll_control.kp", "pitch_control.kp"),        1.0, 10.0),
+    "rate_kp":      (("w_roll_control.kp", "w_pitch_control.kp"),    0.2, 2.0),
+    "rate_kd":      (("w_roll_control.kd", "w_pitch_control.kd"),    0.0, 0.2),
+    "hover_ff":     (("hover_ff",),                                  3.0, 4.2),
+}
+
+DEFAULT_PARAMS = ["xy_kp", "xy_sat", "vxy_kp", "tilt_sat_deg", "att_kp", "rate_kp"]
+
+
+def _getattr_path(obj, path: str):
+    for part in path.split("."):
+        obj = getattr(obj, part)
+    return obj
+
+
+def _setattr_path(obj, path: str, value):
+    head, _, attr = path.rpartition(".")
+    if head:
+        obj = _getattr_path(obj, head)
+    setattr(obj, attr, value)
+
+
+def default_gains() -> dict[str, float]:
+    """Guadagni attuali di MultirotorController (gradi per tilt_sat_deg)."""
+    ctrl  = MultirotorController()
+    gains = {name: _getattr_path(ctrl, paths[0])
+             for name, (paths, _, _) in GAIN_SPACE.items()}
+    gains["tilt_sat_deg"] = math.degrees(gains["tilt_sat_deg"])
+    return gains
+
+
+def build_controller(gains: dict[str, float]) -> MultirotorController:
+    ctrl = MultirotorController()
+    for name, value in gains.items():
+        if name == "tilt_sat_deg":
+            value = math.radians(value)
+        for path in GAIN_SPACE[name][0]:
+            _setattr_path(ctrl, path, value)
+    return ctrl
+
+
+# ---------------------------------------------------------------------------
+# Simulazione
+# ---------------------------------------------------------------------------
+
+class _Run:
+    """Un drone simulato + controller, con lo stesso mapping di DroneAgent."""
+
+    def __init__(self, gains, pos):
+        self.ctrl  = build_controller(gains)
+        self.quad  = QuadrotorModel(pos)
+        self.ticks = 0
+        self.sat   = 0
+        self.max_tilt = 0.0
+
+    def tick(self, altitude_only: bool = False):
+        s = self.quad.sensors()
+        c = self.ctrl
+        f = c.evaluate(
+            delta_t=DT,
+            z=s["Y"], vz=s["VY"],
+            x=s["X"], vx=s["VX"],
+            y=s["Z"], vy=s["VZ"],
+            roll=s["TZ"],  roll_rate=s["WZ"],
+            pitch=s["TX"], pitch_rate=s["WX"],
+            altitude_only=altitude_only,
+        )
+        self.quad.step(DT, *f)
+        self.ticks += 1
+        tilt_sat = c.vx_control.saturation
+        if (c.vz_control._in_sat or min(f) <= 0.0
+                or (not altitude_only and
+                    (abs(c.roll_target) >= tilt_sat or
+                     abs(c.pitch_target) >= tilt_sat))):
+            self.sat += 1
+        tx, _, tz = self.quad.rot
+        self.max_tilt = max(self.max_tilt, math.hypot(tx, tz))
+        return s
+
+    def crashed(self) -> bool:
+        y = self.quad.pos[1]
+        return self.max_tilt > math.radians(60) or not math.isfinite(y)
+
+
+def _settle_time(errors: list[float], band: float) -> float:
+    """Tempo dopo il quale |errore| resta entro band (fine simulazione se mai)."""
+    for k in range(len(errors) - 1, -1, -1):
+        if abs(errors[k]) > band:
+            return (k + 1) * DT
+    return 0.0
+
+
+def sim_takeoff(gains, duration: float = 15.0) -> dict:
+    run = _Run(gains, (0.0, 0.3, 0.0))
+    run.ctrl.set_target(z=TAKEOFF_ALT)
+    climbing = True
+    errs, peak = [], 0.0
+    for _ in range(int(duration / DT)):
+        s = run.tick(altitude_only=climbing)
+        if climbing and abs(s["Y"] - TAKEOFF_ALT) < 0.5:
+            climbing = False
+            run.ctrl.set_target(x=s["X"], y=s["Z"])
+        errs.append(s["Y"] - TAKEOFF_ALT)
+        peak = max(peak, s["Y"])
+    return {
+        "overshoot": max(0.0, peak - TAKEOFF_ALT) / TAKEOFF_ALT,
+        "settle":    _settle_time(errs, SETTLE_BAND),
+        "sat":       run.sat / run.ticks,
+        "crashed":   run.crashed() or run.quad.pos[1] < 1.0,
+    }
+
+
+def sim_step(gains, duration: float = 20.0) -> dict:
+    run = _Run(gains, (0.0, TAKEOFF_ALT, 0.0))
+    run.ctrl.set_target(x=STEP_DIST, y=0.0, z=TAKEOFF_ALT)
+    errs, peak, alt_err = [], 0.0, 0.0
+    for _ in range(int(duration / DT)):
+        s = run.tick()
+        errs.append(math.hypot(s["X"] - STEP_DIST, s["Z"]))
+        peak    = max(peak, s["X"])
+        alt_err = max(alt_err, abs(s["Y"] - TAKEOFF_ALT))
+    return {
+        "overshoot": max(0.0, peak - STEP_DIST) / STEP_DIST,
+        "settle":    _settle_time(errs, SETTLE_BAND),
+        "sat":       run.sat / run.ticks,
+        "alt_err":   alt_err,
+        "crashed":   run.crashed() or run.quad.pos[1] < 1.0,
+    }
+
+
+def sim_waypoints(gains, side: float = 20.0, duration: float = 60.0) -> dict:
+    wps = [(side, 0.0), (side, side), (0.0, side), (0.0, 0.0)]
+    run = _Run(gains, (0.0, TAKEOFF_ALT, 0.0))
+    run.ctrl.set_target(x=wps[0][0], y=wps[0][1], z=TAKEOFF_ALT)
+    idx, alt_err, t_done = 0, 0.0, duration
+    for k in range(int(duration / DT)):
+        s = run.tick()
+        alt_err = max(alt_err, abs(s["Y"] - TAKEOFF_ALT))
+        wx, wz = wps[idx]
+        if math.hypot(s["X"] - wx, s["Z"] - wz) < WAYPOINT_RADIUS:
+            idx += 1
+            if idx == len(wps):
+                t_done = (k + 1) * DT
+                break
+            run.ctrl.set_target(x=wps[idx][0], y=wps[idx][1])
+    return {
+        "lap":     t_done,
+        "sat":     run.sat / max(1, run.ticks),
+        "alt_err": alt_err,
+        "crashed": run.crashed(),
+        "completed": idx == len(wps),
+    }
+
+
+def evaluate(gains: dict[str, float]) -> dict:
+    """Esegue i tre scenari e restituisce metriche + punteggio complessivo."""
+    t0 = time.perf_counter()
+    to = sim_takeoff(gains)
+    st = sim_step(gains)
+    wp = sim_waypoints(gains)
+    failed = (to["crashed"] or st["crashed"] or wp["crashed"]
+              or not wp["completed"])
+    score = (
+        100.0 * to["overshoot"] + to["settle"]
+        + 100.0 * st["overshoot"] + st["settle"]
+        + wp["lap"] / 4.0
+        + 10.0 * (to["sat"] + st["sat"] + wp["sat"])
+        + 5.0 * max(st["alt_err"], wp["alt_err"])
+    )
+    if failed:
+        score += CRASH_SCORE
+    return {
+        "gains":   gains,
+        "score":   score,
+        "failed":  failed,
+        "takeoff": to,
+        "step":    st,
+        "waypoints": wp,
+        "sim_s":   time.perf_counter() - t0,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Strategie di ricerca (in coordinate normalizzate [0, 1] per parametro)
+# ---------------------------------------------------------------------------
+
+def _denorm(params, u, base):
+    gains = dict(base)
+    for name, ui in zip(params, u):
+        _, lo, hi = GAIN_SPACE[name]
+        gains[name] = lo + (hi - lo) * min(1.0, max(0.0, ui))
+    return gains
+
+
+def _norm(params, gains):
+    return [(gains[n] - GAIN_SPACE[n][1]) / (GAIN_SPACE[n][2] - GAIN_SPACE[n][1])
+            for n in params]
+
+
+def search_grid(pool, params, base, points: int) -> list[dict]:
+    axis = [i / (points - 1) for i in range(points)] if points > 1 else [0.5]
+    cands = [_denorm(params, u, base)
+             for u in itertools.product(axis, repeat=len(params))]
+    return list(pool.map(evaluate, cands, chunksize=8))
+
+
+def search_random(pool, params, base, samples: int, rng) -> list[dict]:
+    cands = [_denorm(params, [rng.random() for _ in params], base)
+             for _ in range(samples)]
+    return list(pool.map(evaluate, cands, chunksize=8))
+
+
+def search_cma(pool, params, base, generations: int, popsize: int,
+               sigma: float, rng) -> list[dict]:
+    n     = len(params)
+    mu    = popsize // 2
+    w     = [math.log(mu + 0.5) - math.log(i + 1) for i in range(mu)]
+    sw    = sum(w)
+    w     = [wi / sw for wi in w]
+    mueff = 1.0 / sum(wi * wi for wi in w)
+    cs    = (mueff + 2.0) / (n + mueff + 5.0)
+    ds    = 1.0 + cs + 2.0 * max(0.0, math.sqrt((mueff - 1.0) / (n + 1.0)) - 1.0)
+    cmu   = min(1.0, mueff / (n * n + mueff)) * (n + 2.0) / 3.0
+    chi_n = math.sqrt(n) * (1.0 - 1.0 / (4.0 * n) + 1.0 / (21.0 * n * n))
+
+    mean = _norm(params, base)
+    diag = [1.0] * n            # deviazioni standard per asse (covarianza diagonale)
+    ps   = [0.0] * n
+    results = []
+    for _ in range(generations):
+        zs    = [[rng.gauss(0.0, 1.0) for _ in range(n)] for _ in range(popsize)]
+        us    = [[mean[i] + sigma * diag[i] * z[i] for i in range(n)] for z in zs]
+        evals = list(pool.map(evaluate, [_denorm(params, u, base) for u in us]))
+        results += evals
+        order = sorted(range(popsize), key=lambda k: evals[k]["score"])[:mu]
+
+        zw   = [sum(w[j] * zs[k][i] for j, k in enumerate(order)) for i in range(n)]
+        mean = [min(1.0, max(0.0, mean[i] + sigma * diag[i] * zw[i]))
+                for i in range(n)]
+        ps   = [(1.0 - cs) * ps[i] + math.sqrt(cs * (2.0 - cs) * mueff) * zw[i]
+                for i in range(n)]
+        var  = [(1.0 - cmu) * diag[i] ** 2
+                + cmu * sum(w[j] * (diag[i] * zs[k][i]) ** 2
+                            for j, k in enumerate(order))
+                for i in range(n)]
+        diag  = [math.sqrt(v) for v in var]
+        norm  = math.sqrt(sum(p * p for p in ps))
+        sigma = min(0.5, sigma * math.exp(cs / ds * (norm / chi_n - 1.0)))
+    return results
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def _fmt(res: dict, params) -> str:
+    g = res["gains"]
+    return (f"{res['score']:10.2f}  "
+            + " ".join(f"{n}={g[n]:.3f}" for n in params)
+            + f" | os={100*res['step']['overshoot']:.1f}%"
+            f" ts={res['step']['settle']:.1f}s"
+            f" lap={res['waypoints']['lap']:.1f}s"
+            f" sat={100*res['step']['sat']:.0f}%"
+            + (" FAIL" if res["failed"] else ""))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--search", choices=["grid", "random", "cma"], default="random")
+    ap.add_argument("--params", default=",".join(DEFAULT_PARAMS),
+                    help=f"parametri da esplorare, tra: {','.join(GAIN_SPACE)}")
+    ap.add_argument("--grid", type=int, default=4, help="punti per asse (grid)")
+    ap.add_argument("--samples", type=int, default=500, help="candidati (random)")
+    ap.add_argument("--generations", type=int, default=20)
+    ap.add_argument("--popsize", type=int, default=16)
+    ap.add_argument("--sigma", type=float, default=0.2, help="passo iniziale (cma)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count())
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--top", type=int, default=10)
+    ap.add_argument("--json", help="salva classifica e tempi in questo file")
+    args = ap.parse_args()
+
+    params = [p for p in args.params.split(",") if p]
+    for p in params:
+        if p not in GAIN_SPACE:
+            ap.error(f"parametro sconosciuto: {p}")
+    base = default_gains()
+    rng  = random.Random(args.seed)
+
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        baseline = evaluate(base)
+        if args.search == "grid":
+            results = search_grid(pool, params, base, args.grid)
+        elif args.search == "random":
+            results = search_random(pool, params, base, args.samples, rng)
+        else:
+            results = search_cma(pool, params, base, args.generations,
+                                 args.popsize, args.sigma, rng)
+    wall = time.perf_counter() - t0
+
+    results.sort(key=lambda r: r["score"])
+    n_eval  = len(results) + 1
+    sim_cpu = sum(r["sim_s"] for r in results) + baseline["sim_s"]
+    timing = {
+        "wall_s":       wall,
+        "evaluations":  n_eval,
+        "evals_per_s":  n_eval / wall,
+        "sim_mean_ms":  1000.0 * sim_cpu / n_eval,
+        "workers":      args.workers,
+        "speedup":      sim_cpu / wall,
+    }
+
+    print(f"\nBaseline (guadagni attuali):\n  {_fmt(baseline, params)}")
+    print(f"\nMigliori {args.top} su {len(results)} ({args.search}):")
+    for r in results[:args.top]:
+        print(f"  {_fmt(r, params)}")
+    print(f"\nTempo: {wall:.1f}s, {n_eval} valutazioni "
+          f"({timing['evals_per_s']:.1f}/s, {timing['sim_mean_ms']:.0f} ms/valutazione, "
+          f"{args.workers} worker, speedup {timing['speedup']:.1f}x)")
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump({"search": args.search, "params": params,
+                       "baseline": baseline, "ranked": results[:args.top],
+                       "timing": timing}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
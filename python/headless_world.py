@@ -0,0 +1,196 @@
+"""
+headless_world.py — Sostituto headless della scena Godot: droni (quad_sim)
+e incendi sul broker Python, per benchmark e scenari senza motore grafico.
+
+Come world.gd + drone.gd + fire_zone.gd sopra dds.gd:
+
+  - N QuadrotorModel disposti come _spawn_drones di world.gd; a ogni frame
+    (PHYSICS_RATE_HZ, in tempo reale, senza recupero se in ritardo) ogni
+    drone legge f1..f4 dal broker, integra e pubblica sensori, connected e
+    infine tick
+  - incendi: in istanti prefissati (fires) e/o con un processo di Poisson
+    (fire_rate incendi al minuto simulato, posizioni casuali nell'area);
+    ogni incendio pubblica world/fire_* alla comparsa e quando un drone
+    entra nel raggio di rilevamento; quando world/fire_resolved porta il
+    suo id è spento (world/fire_new e fire_resolved azzerati localmente)
+
+Misure lato mondo:
+  frames, sim_time         : frame eseguiti e tempo simulato [s]
+  stale[i]                 : frame in volo con forze del drone i invariate
+                             (il controllo non ha risposto al tick precedente)
+  flight_frames[i]         : frame in volo (dopo il primo arrivo in quota)
+  alt_err                  : errore di quota in volo, tutti i droni [m]
+  crashed                  : un drone in volo è sceso sotto CRASH_ALT
+  fires                    : id → {pos, t_spawn, sim_spawn, t_resolved}
+
+    broker = Broker('127.0.0.1', 0); broker.start()
+    world  = HeadlessWorld(broker, n=5, fire_rate=2.0)
+    world.start()
+"""
+
+import math
+import random
+import threading
+import time
+
+from quad_sim import QuadrotorModel
+
+PHYSICS_RATE_HZ  = 60.0
+AREA_SIZE        = 150.0          # come world.gd / CoveragePlanner
+START_ALTITUDE   = 0.3            # world.gd
+TAKEOFF_ALT      = 8.0            # come drone_agent.TAKEOFF_ALT
+DETECTION_RADIUS = 5.0            # fire_zone.gd
+CRASH_ALT        = 1.0            # [m] quota minima in volo
+FIRE_MARGIN      = 10.0           # [m] incendi casuali lontani dal bordo dell'area
+
+
+class HeadlessWorld(threading.Thread):
+    """Fisica dei droni e incendi in tempo reale sul broker. Vedi docstring del modulo."""
+
+    def __init__(self, broker, n: int, fires: list = None, fire_rate: float = 0.0,
+                 fire_start: float = 10.0, area_size: float = AREA_SIZE,
+                 rate_hz: float = PHYSICS_RATE_HZ, seed: int = 0):
+        super().__init__(daemon=True, name="HeadlessWorld")
+        self.broker     = broker
+        self.n          = n
+        self.area       = area_size
+        self.dt         = 1.0 / rate_hz
+        self.fire_rate  = fire_rate               # incendi / minuto simulato
+        self.fire_start = fire_start              # [s] simulati prima del primo casuale
+        self._scheduled = sorted(fires or [])     # [(t_sim, (x, y, z)), ...]
+        self._rng       = random.Random(seed)
+        self._next_rand = self._draw_next(fire_start) if fire_rate > 0 else math.inf
+        self._running   = False
+
+        spacing = area_size / n
+        self.quads = [QuadrotorModel(pos=((i * spacing + spacing * 0.5) - area_size / 2,
+                                          START_ALTITUDE, 2.0 - area_size / 2))
+                      for i in range(n)]
+
+        self.t0            = None
+        self.frames        = 0
+        self.sim_time      = 0.0
+        self.stale         = [0] * n
+        self.flight_frames = [0] * n
+        self.in_flight     = [False] * n
+        self.alt_err: list[float] = []
+        self.crashed       = False
+        self.fires: dict[float, dict] = {}
+        self._active: list[float] = []
+        self._near: dict[float, list] = {}
+
+    def start(self):
+        self._running = True
+        super().start()
+
+    def stop(self):
+        self._running = False
+
+    # ------------------------------------------------------------------
+    # Loop fisico
+    # ------------------------------------------------------------------
+
+    def run(self):
+        b, dt = self.broker, self.dt
+        prev = [None] * self.n
+        self.t0 = next_t = time.monotonic()
+        while self._running:
+            for i, q in enumerate(self.quads):
+                p = f"drone_{i}"
+                f = (b.read(f"{p}/f1"), b.read(f"{p}/f2"),
+                     b.read(f"{p}/f3"), b.read(f"{p}/f4"))
+                if self.in_flight[i]:
+                    self.flight_frames[i] += 1
+                    if f == prev[i]:
+                        self.stale[i] += 1
+                prev[i] = f
+                q.step(dt, *f)
+                for k, v in q.sensors().items():
+                    b.publish(f"{p}/{k}", v)
+                b.publish(f"{p}/connected", 1.0)
+                b.publish(f"{p}/tick", 1.0)          # sempre per ultimo, come drone.gd
+
+                alt = q.pos[1]
+                if self.in_flight[i]:
+                    self.alt_err.append(alt - TAKEOFF_ALT)
+                    if alt < CRASH_ALT:
+                        self.crashed = True
+                elif abs(alt - TAKEOFF_ALT) < 0.5:   # come _do_takeoff dell'agente
+                    self.in_flight[i] = True
+            self.frames  += 1
+            self.sim_time = self.frames * dt
+            self._update_fires()
+
+            next_t += dt
+            pause = next_t - time.monotonic()
+            if pause > 0:
+                time.sleep(pause)
+            else:
+                next_t = time.monotonic()            # in ritardo: niente recupero a raffica
+
+    # ------------------------------------------------------------------
+    # Incendi
+    # ------------------------------------------------------------------
+
+    def _draw_next(self, after: float) -> float:
+        return after + self._rng.expovariate(self.fire_rate / 60.0)
+
+    def _random_pos(self) -> tuple:
+        half = self.area / 2 - FIRE_MARGIN
+        return (self._rng.uniform(-half, half), 0.0, self._rng.uniform(-half, half))
+
+    def _update_fires(self):
+        t = self.sim_time
+        while self._scheduled and self._scheduled[0][0] <= t:
+            self._spawn(self._scheduled.pop(0)[1])
+        while self._next_rand <= t:
+            self._spawn(self._random_pos())
+            self._next_rand = self._draw_next(self._next_rand)
+
+        if not self._active:
+            return
+        b = self.broker
+        resolved = b.read("world/fire_resolved")
+        if resolved in self._active:
+            self._active.remove(resolved)
+            self.fires[resolved]["t_resolved"] = time.monotonic()
+            self.fires[resolved]["sim_resolved"] = t
+            b.clear("world/fire_new")
+            b.clear("world/fire_resolved")
+        for fid in self._active:
+            fx, _, fz = self.fires[fid]["pos"]
+            near = self._near[fid]
+            for i, q in enumerate(self.quads):
+                inside = math.hypot(q.pos[0] - fx, q.pos[2] - fz) < DETECTION_RADIUS
+                if inside and not near[i]:
+                    self._publish_fire(fid)          # body_entered di fire_zone.gd
+                near[i] = inside
+
+    def _spawn(self, pos: tuple):
+        fid = float(len(self.fires) + 1)
+        self.fires[fid] = {"pos": pos, "t_spawn": time.monotonic(),
+                           "sim_spawn": self.sim_time, "t_resolved": None,
+                           "sim_resolved": None}
+        self._active.append(fid)
+        self._near[fid] = [False] * self.n
+        self._publish_fire(fid)
+
+    def _publish_fire(self, fid: float):
+        b = self.broker
+        x, y, z = self.fires[fid]["pos"]
+        b.publish("world/fire_new", fid)
+        b.publish("world/fire_x", x)
+        b.publish("world/fire_y", y)
+        b.publish("world/fire_z", z)
+
+    # ------------------------------------------------------------------
+    # Riepilogo
+    # ------------------------------------------------------------------
+
+    def fires_resolved(self) -> int:
+        return sum(1 for f in self.fires.values() if f["t_resolved"] is not None)
+
+    def stale_fraction(self) -> float:
+        """Frazione dei frame in volo con forze non aggiornate (tutti i droni)."""
+        total = sum(self.flight_frames)
+        return sum(self.stale) / total if total else None
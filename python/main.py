@@ -1,10 +1,25 @@
 """
 main.py — Entry point del sistema swarm.
-Avvia un thread per ciascuno dei 5 droni.
+Avvia un thread per ciascuno degli N_DRONES droni.
+
+Avvio in parallelo: tutte le sottoscrizioni vengono inviate in blocco
+(con limite di banda, vedi dds.SUBSCRIBE_RATE), poi tutti i thread partono
+insieme e si allineano su una barriera: nessun agente entra in TAKEOFF
+prima che l'intero swarm sia connesso.
+
+Con DDS_TRANSPORT = 'shm' gli agenti usano la tabella in memoria condivisa
+(dds_shm.py) e main.py avvia ShmBridge, che la collega al broker UDP della
+scena Godot (sensori e tick verso la tabella, forze e HUD verso il broker).
+
+Con CHECKPOINT_DIR (drone_agent) gli agenti salvano periodicamente il
+proprio stato e, rilanciando main.py durante una missione, riprendono dal
+punto in cui erano invece di ridecollare.
 """
 
 import threading, time, sys
-from drone_agent import DroneAgent, N_DRONES
+from dds import QOS_CRITICAL, QOS_BEST_EFFORT, TRANSPORT_SHM
+from drone_agent import (DroneAgent, N_DRONES, USE_ESTIMATOR, CHECKPOINT_DIR,
+                         DDS_HOST, DDS_PORT, DDS_TRANSPORT, default_telemetry)
 
 
 def main():
@@ -13,24 +28,116 @@ def main():
     print(f"{'='*48}")
     print("Avvio agenti... assicurati che la scena Godot sia in Play.\n")
 
-    agents  = [DroneAgent(i, N_DRONES) for i in range(N_DRONES)]
+    estimator = None
+    if USE_ESTIMATOR:
+        from state_estimator import SwarmEstimator     # richiede NumPy
+        estimator = SwarmEstimator(N_DRONES)
+
+    store = None
+    if CHECKPOINT_DIR:
+        from checkpoint import CheckpointStore
+        store = CheckpointStore(CHECKPOINT_DIR)
+        store.start()
+
+    bridge = None
+    if DDS_TRANSPORT == TRANSPORT_SHM:
+        from dds_shm import ShmBridge, unlink_table
+        unlink_table(DDS_PORT)          # niente valori rimasti da una sessione precedente
+        bridge = ShmBridge(DDS_HOST, DDS_PORT, N_DRONES)
+        bridge.start()
+
+    t0      = time.monotonic()
+    barrier = threading.Barrier(N_DRONES)
+    agents  = [DroneAgent(i, N_DRONES, start_barrier=barrier, estimator=estimator,
+                          checkpoint=store)
+               for i in range(N_DRONES)]
+    for a in agents:
+        a.setup()          # sottoscrizioni in blocco, prima di avviare i thread
     threads = [threading.Thread(target=a.run, name=f"Drone-{a.id}", daemon=True)
                for a in agents]
-
     for t in threads:
         t.start()
-        time.sleep(0.15)   # piccolo offset per non sovraccaricare il broker
 
-    print(f"{N_DRONES} agenti avviati. Ctrl+C per fermare.\n")
+    print(f"{N_DRONES} agenti avviati in {time.monotonic() - t0:.2f}s. "
+          "Ctrl+C per fermare.\n")
+    reported = False
     try:
         while True:
             time.sleep(1)
+            if not reported and all(a.t_first_tick for a in agents):
+                report_startup(agents, t0)
+                report_resume(agents)
+                reported = True
     except KeyboardInterrupt:
         print("\nArresto.")
+        sent = suppressed = 0
         for a in agents:
-            a.dds.stop()
+            a.stop()
+            for n_sent, n_supp in a.dds.publish_stats().values():
+                sent       += n_sent
+                suppressed += n_supp
+        total = sent + suppressed
+        if total:
+            print(f"Publish stato swarm: {sent} inviati, {suppressed} soppressi "
+                  f"({100.0 * suppressed / total:.1f}%)")
+        report_qos(agents)
+        report_avoidance(agents)
+        if store is not None:
+            store.stop()
+        if bridge is not None:
+            bridge.stop()
+            unlink_table(DDS_PORT)
+        tlm = default_telemetry()
+        tlm.stop()
+        dropped = sum(d for _, d in tlm.stats().values())
+        if dropped:
+            print(f"Telemetria: {dropped} record scartati (coda piena)")
         sys.exit(0)
 
 
+def report_startup(agents, t0: float):
+    """Tempo dal lancio al primo tick elaborato, per agente e complessivo."""
+    ttft = sorted((a.t_first_tick - t0, a.id) for a in agents)
+    print("Tempo al primo tick:")
+    for t, i in sorted(ttft, key=lambda x: x[1]):
+        print(f"  D{i}: {t:.3f}s")
+    print(f"  min {ttft[0][0]:.3f}s  max {ttft[-1][0]:.3f}s  "
+          f"spread {1000 * (ttft[-1][0] - ttft[0][0]):.1f}ms\n")
+
+
+def report_resume(agents):
+    """Agenti ripartiti a caldo da un checkpoint (solo se ce ne sono)."""
+    resumed = [a for a in agents if a.resumed is not None]
+    if resumed:
+        print("Ripresi da checkpoint: " + ", ".join(
+            f"D{a.id} #{a.resumed.seq}" for a in resumed) + "\n")
+
+
+def report_qos(agents):
+    """Ritardo di coda in ricezione per classe QoS (caso peggiore tra gli agenti)."""
+    for qos in (QOS_CRITICAL, QOS_BEST_EFFORT):
+        stats = [a.dds.qos_stats().get(qos) for a in agents]
+        stats = [st for st in stats if st and st["received"]]
+        if not stats:
+            continue
+        print(f"Ricezione {qos}: {sum(st['received'] for st in stats)} applicati, "
+              f"{sum(st['coalesced'] for st in stats)} accorpati, "
+              f"{sum(st['dropped'] for st in stats)} scartati | ritardo "
+              f"p50 {max(st['delay_p50_ms'] for st in stats):.2f}ms "
+              f"p99 {max(st['delay_p99_ms'] for st in stats):.2f}ms "
+              f"max {max(st['delay_max_ms'] for st in stats):.2f}ms")
+
+
+def report_avoidance(agents):
+    """Interventi dell'evitamento collisioni (solo se attivo)."""
+    avoiders = [a._avoid for a in agents if a._avoid is not None]
+    if not avoiders:
+        return
+    print(f"Evitamento collisioni: {sum(av.solves for av in avoiders)} tick con vicini, "
+          f"{sum(av.adjusted for av in avoiders)} velocità corrette, "
+          f"{sum(av.stalled for av in avoiders)} stalli aggirati, "
+          f"{sum(av.infeasible for av in avoiders)} vincoli infattibili")
+
+
 if __name__ == "__main__":
     main()
@@ -54,12 +54,20 @@ SCHEMA A BLOCCHI (dal quaderno del prof, foto 1-2)
 """
 
 import math
-from controllers import P_Controller, PI_Controller, PID_Controller
+from controllers import P_Controller, PI_Controller, PID_Controller, saturate
 
 # Stimato dai log: hover stabile → f_per_motor ≈ 3.59 N
 # Aumenta se il drone scende lentamente in hover, riduci se sale.
 HOVER_FF = 3.59
 
+# Feedforward del riferimento di traiettoria (set_reference): l'inclinazione
+# compensa accelerazione e smorzamento lineare del corpo a velocità costante
+GRAVITY = 9.8            # [m/s²] come Godot
+DRAG_FF = 0.6            # [1/s] linear_damp di drone.tscn (0.1 progetto + 0.5 nodo)
+
+# Float in snapshot(): target x/y/z, PI quota (2), PID rate roll e pitch (3+3)
+SNAPSHOT_LEN = 11
+
 
 class MultirotorController:
 
@@ -96,6 +104,14 @@ class MultirotorController:
         self.roll_target  = 0.0
         self.pitch_target = 0.0
 
+        # Velocità XY imposta dall'esterno (evitamento collisioni): se non
+        # None sostituisce l'uscita degli anelli P di posizione
+        self.velocity_override = None
+
+        # Feedforward del riferimento di traiettoria (zero = target a gradino)
+        self.v_ff = (0.0, 0.0)
+        self.a_ff = (0.0, 0.0)
+
     def evaluate(self,
                  delta_t: float,
                  z: float,  vz: float,
@@ -122,12 +138,23 @@ class MultirotorController:
 
         # POSIZIONE XY
         # Asse X (Destra/Sinistra) -> Controllato dal Roll
-        self.vx_target   = self.x_control.evaluate(delta_t, self.x_target - x)
-        self.roll_target = -self.vx_control.evaluate(delta_t, self.vx_target - vx) # <-- MENO
+        self.vx_target   = self.x_control.evaluate(delta_t, self.x_target - x) + self.v_ff[0]
 
         # Asse Y del controller (Godot Z, Avanti/Indietro) -> Controllato dal Pitch
-        self.vy_target    = self.y_control.evaluate(delta_t, self.y_target - y)
-        self.pitch_target = self.vy_control.evaluate(delta_t, self.vy_target - vy) # <-- MENO TOLTO
+        self.vy_target    = self.y_control.evaluate(delta_t, self.y_target - y) + self.v_ff[1]
+        if self.velocity_override is not None:
+            self.vx_target, self.vy_target = self.velocity_override
+            ax_ff = ay_ff = 0.0
+        else:
+            ax_ff = self.a_ff[0] + DRAG_FF * self.v_ff[0]
+            ay_ff = self.a_ff[1] + DRAG_FF * self.v_ff[1]
+        tilt_x = self.vx_control.evaluate(delta_t, self.vx_target - vx)
+        tilt_y = self.vy_control.evaluate(delta_t, self.vy_target - vy)
+        if ax_ff or ay_ff:
+            tilt_x, _ = saturate(tilt_x + math.atan(ax_ff / GRAVITY), self.vx_control.saturation)
+            tilt_y, _ = saturate(tilt_y + math.atan(ay_ff / GRAVITY), self.vy_control.saturation)
+        self.roll_target  = -tilt_x # <-- MENO
+        self.pitch_target = tilt_y  # <-- MENO TOLTO
 
         # ATTITUDE RATE
         pitch_rate_tgt = self.pitch_control.evaluate(delta_t, self.pitch_target - pitch)
@@ -159,4 +186,50 @@ class MultirotorController:
     def set_target(self, x=None, y=None, z=None):
         if x is not None: self.x_target = x
         if y is not None: self.y_target = y
-        if z is not None: self.z_target = z
\ No newline at end of file
+        if z is not None: self.z_target = z
+
+    def set_reference(self, x: float, y: float, vx: float, vy: float,
+                      ax: float, ay: float):
+        """
+        Punto di una traiettoria (trajectory.Follower): target XY più
+        velocità (sommata all'uscita degli anelli P di posizione) e
+        accelerazione (inclinazione di feedforward) di riferimento.
+        """
+        self.x_target, self.y_target = x, y
+        self.v_ff = (vx, vy)
+        self.a_ff = (ax, ay)
+
+    def clear_reference(self):
+        """Torna al target a gradino: nessun feedforward."""
+        self.v_ff = (0.0, 0.0)
+        self.a_ff = (0.0, 0.0)
+
+    def preferred_velocity(self, x: float, y: float) -> tuple:
+        """Uscita (vx_tgt, vy_tgt) degli anelli P di posizione (+ feedforward), senza override."""
+        return (self.x_control.evaluate(0.0, self.x_target - x) + self.v_ff[0],
+                self.y_control.evaluate(0.0, self.y_target - y) + self.v_ff[1])
+
+    def set_velocity_override(self, vx: float, vy: float):
+        self.velocity_override = (vx, vy)
+
+    def clear_velocity_override(self):
+        self.velocity_override = None
+
+    def snapshot(self) -> tuple:
+        """
+        Stato che non si ricostruisce da un solo frame di sensori: target e
+        memoria dei controllori con integrale/derivata (SNAPSHOT_LEN float).
+        I controllori P sono senza stato; l'override di velocità si ricalcola
+        al tick successivo.
+        """
+        return (self.x_target, self.y_target, self.z_target,
+                *self.vz_control.snapshot(),
+                *self.w_roll_control.snapshot(),
+                *self.w_pitch_control.snapshot())
+
+    def restore(self, state) -> None:
+        """Inverso di snapshot()."""
+        self.x_target, self.y_target, self.z_target = state[0:3]
+        self.vz_control.restore(state[3:5])
+        self.w_roll_control.restore(state[5:8])
+        self.w_pitch_control.restore(state[8:11])
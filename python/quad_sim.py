@@ -0,0 +1,110 @@
+"""
+quad_sim.py — Modello semplificato del drone di Godot (drone.gd) per
+simulazioni senza motore grafico.
+
+Riproduce il RigidBody3D di drone.tscn in assi Godot:
+  X → orizzontale (destra),  Y → verticale (su),  Z → orizzontale (avanti)
+  TX, TY, TZ : angoli Euler (ordine YXZ, come global_rotation)
+  WX, WY, WZ : velocità angolari [rad/s]
+
+Motori (vista dall'alto, identici a drone.gd):
+  2 --- 1      p1=( L,0, L)  p2=(-L,0, L)
+  |     |      p3=(-L,0,-L)  p4=( L,0,-L)
+  3 --- 4
+
+Ogni motore applica una forza lungo l'asse Y del corpo nel proprio punto:
+  coppia X = -L (f1 + f2 - f3 - f4)     → pitch (TX)
+  coppia Z =  L (f1 - f2 - f3 + f4)     → roll  (TZ)
+
+Semplificazioni: inerzia isotropa, Euler integrati con le velocità angolari
+(piccoli angoli), nessuna coppia di imbardata, suolo piatto a Y = 0.
+Damping come in Godot: v *= (1 - damp * dt), con damp = default progetto
+(0.1) + valore del nodo (combine).
+"""
+
+import math
+
+GRAVITY      = 9.8      # [m/s²] default Godot
+MASS         = 1.5      # [kg]   drone.tscn
+ARM_LENGTH   = 0.195    # [m]    drone.gd
+INERTIA      = 0.0625   # [kg m²] box 0.5 m di drone.tscn: m (a² + b²) / 12
+LINEAR_DAMP  = 0.6      # 0.1 progetto + 0.5 nodo
+ANGULAR_DAMP = 1.1      # 0.1 progetto + 1.0 nodo
+
+
+class QuadrotorModel:
+    """Stato e integrazione di un singolo drone (Eulero semi-implicito)."""
+
+    def __init__(self, pos=(0.0, 0.0, 0.0),
+                 mass: float = MASS, arm: float = ARM_LENGTH,
+                 inertia: float = INERTIA,
+                 linear_damp: float = LINEAR_DAMP,
+                 angular_damp: float = ANGULAR_DAMP):
+        self.mass         = mass
+        self.arm          = arm
+        self.inertia      = inertia
+        self.linear_damp  = linear_damp
+        self.angular_damp = angular_damp
+        self.reset(pos)
+
+    def reset(self, pos=(0.0, 0.0, 0.0)):
+        self.pos = list(pos)
+        self.vel = [0.0, 0.0, 0.0]
+        self.rot = [0.0, 0.0, 0.0]      # TX, TY, TZ
+        self.ang = [0.0, 0.0, 0.0]      # WX, WY, WZ
+
+    def step(self, dt: float, f1: float, f2: float, f3: float, f4: float,
+             substeps: int = 2):
+        """Avanza di dt secondi con forze motore costanti [N]."""
+        h = dt / substeps
+        for _ in range(substeps):
+            self._integrate(h, f1, f2, f3, f4)
+
+    def _integrate(self, h, f1, f2, f3, f4):
+        tx, ty, tz = self.rot
+        sx, cx = math.sin(tx), math.cos(tx)
+        sy, cy = math.sin(ty), math.cos(ty)
+        sz, cz = math.sin(tz), math.cos(tz)
+
+        # Asse Y del corpo in coordinate mondo: colonna 1 di Ry·Rx·Rz
+        ux = -sz * cy + cz * sx * sy
+        uy =  cz * cx
+        uz =  sz * sy + cz * sx * cy
+
+        thrust = f1 + f2 + f3 + f4
+        m = self.mass
+        acc = (thrust * ux / m,
+               thrust * uy / m - GRAVITY,
+               thrust * uz / m)
+
+        L   = self.arm
+        tqx = -L * (f1 + f2 - f3 - f4)
+        tqz =  L * (f1 - f2 - f3 + f4)
+
+        ld = max(0.0, 1.0 - self.linear_damp * h)
+        ad = max(0.0, 1.0 - self.angular_damp * h)
+        v, w, p, r = self.vel, self.ang, self.pos, self.rot
+        for i in range(3):
+            v[i] = (v[i] + acc[i] * h) * ld
+        w[0] = (w[0] + tqx / self.inertia * h) * ad
+        w[1] = w[1] * ad
+        w[2] = (w[2] + tqz / self.inertia * h) * ad
+        for i in range(3):
+            p[i] += v[i] * h
+            r[i] += w[i] * h
+
+        # Suolo: niente compenetrazione, il drone appoggiato resta fermo
+        if p[1] < 0.0:
+            p[1] = 0.0
+            if v[1] < 0.0:
+                v[1] = 0.0
+
+    def sensors(self) -> dict[str, float]:
+        """Valori pubblicati da drone.gd (_publish_state), senza prefisso."""
+        p, v, r, w = self.pos, self.vel, self.rot, self.ang
+        return {
+            "X":  p[0], "Y":  p[1], "Z":  p[2],
+            "VX": v[0], "VY": v[1], "VZ": v[2],
+            "TX": r[0], "TY": r[1], "TZ": r[2],
+            "WX": w[0], "WY": w[1], "WZ": w[2],
+        }
@@ -0,0 +1,120 @@
+"""
+scheduler.py — Scheduler multi-rate per il loop dell'agente.
+
+Il loop di DroneAgent è sincronizzato sul tick fisico di Godot (~60 Hz).
+Il controllo gira ad ogni tick, ma coordinamento swarm, pubblicazione dello
+stato e logging non hanno bisogno di quella frequenza: RateScheduler li
+esegue con un divisore di frequenza rispetto al tick.
+
+  divider = round(base_rate / rate_hz)   → il task gira 1 tick ogni divider
+  phase                                  → sfasamento in tick (0..divider-1)
+
+Con phase = drone_id i task dello swarm si distribuiscono su tick diversi,
+evitando che tutti gli agenti facciano lo stesso lavoro nello stesso frame.
+
+Budget di tempo opzionale: se step() riceve una deadline già superata, i task
+in scadenza vengono rimandati al tick successivo (non persi). Un task in
+attesa da max_defer tick gira comunque, anche oltre la deadline: con il
+controllo stabilmente sopra il budget coordinamento e stato non si fermano.
+Queste esecuzioni forzate sono contate in stats()["forced"] e la prima di
+ogni task viene segnalata sul logger.
+"""
+
+import time
+
+MAX_DEFER = 30          # [tick] attesa massima di un task rimandato (0.5 s a 60 Hz)
+
+
+class _Task:
+    __slots__ = ("name", "fn", "divider", "phase", "next_tick",
+                 "runs", "deferred", "forced", "waiting", "total_s", "max_s")
+
+    def __init__(self, name: str, fn, divider: int, phase: int):
+        self.name      = name
+        self.fn        = fn
+        self.divider   = divider
+        self.phase     = phase % divider
+        self.next_tick = self.phase
+        self.runs      = 0
+        self.deferred  = 0
+        self.forced    = 0
+        self.waiting   = 0       # tick consecutivi di rinvio
+        self.total_s   = 0.0
+        self.max_s     = 0.0
+
+
+class RateScheduler:
+    """
+    Esegue task periodici con divisore di frequenza rispetto al tick.
+
+    Uso:
+        sched = RateScheduler(base_rate_hz=60.0)
+        sched.add("swarm", agent._coordinate, rate_hz=10.0, phase=drone_id)
+        while True:
+            ...                 # controllo ad ogni tick
+            sched.step()        # esegue i task in scadenza
+    """
+
+    def __init__(self, base_rate_hz: float = 60.0, max_defer: int = MAX_DEFER, log=None):
+        self.base_rate = base_rate_hz
+        self.max_defer = max_defer
+        self.log       = log
+        self.tick      = 0
+        self._tasks: list[_Task] = []
+
+    def add(self, name: str, fn, rate_hz: float = None,
+            divider: int = None, phase: int = 0):
+        """
+        Registra fn (senza argomenti). Specificare rate_hz oppure divider;
+        senza nessuno dei due il task gira ad ogni tick.
+        """
+        if divider is None:
+            divider = 1 if rate_hz is None else round(self.base_rate / rate_hz)
+        self._tasks.append(_Task(name, fn, max(1, int(divider)), phase))
+
+    def step(self, deadline: float = None):
+        """
+        Esegue i task in scadenza al tick corrente e avanza il contatore.
+        deadline (time.monotonic): oltre questo istante i task rimanenti
+        vengono rimandati al tick successivo, salvo quelli già rimandati
+        per max_defer tick.
+        """
+        tick = self.tick
+        for task in self._tasks:
+            if tick < task.next_tick:
+                continue
+            t0 = time.monotonic()
+            if deadline is not None and t0 > deadline:
+                if task.waiting < self.max_defer:
+                    task.waiting  += 1
+                    task.deferred += 1
+                    continue
+                task.forced += 1
+                if task.forced == 1 and self.log is not None:
+                    self.log.warning(f"Task '{task.name}' rimandato per {task.waiting} tick: "
+                                     f"eseguito oltre il budget")
+            task.waiting = 0
+            task.fn()
+            dt = time.monotonic() - t0
+            task.runs    += 1
+            task.total_s += dt
+            if dt > task.max_s:
+                task.max_s = dt
+            # Riallinea alla griglia divider/phase (anche dopo un rinvio)
+            k = (tick - task.phase) // task.divider + 1
+            task.next_tick = task.phase + k * task.divider
+        self.tick = tick + 1
+
+    def stats(self) -> dict[str, dict]:
+        """Statistiche per task: esecuzioni, rinvii, esecuzioni forzate, tempo medio/max [ms]."""
+        return {
+            t.name: {
+                "divider":  t.divider,
+                "runs":     t.runs,
+                "deferred": t.deferred,
+                "forced":   t.forced,
+                "mean_ms":  1000.0 * t.total_s / t.runs if t.runs else 0.0,
+                "max_ms":   1000.0 * t.max_s,
+            }
+            for t in self._tasks
+        }
@@ -0,0 +1,203 @@
+"""
+state_estimator.py — Stima e predizione dello stato dei droni tra un frame
+sensori e l'altro (filtro di Kalman ad accelerazione costante, NumPy).
+
+Il controller lavora su valori già vecchi di almeno un giro UDP e, se un
+pacchetto arriva tardi o si perde, ripete valori fermi. Lo stimatore:
+
+  - fonde le misure di posa e velocità di ogni frame (X..WZ di Godot)
+  - tra un frame e l'altro (o con frame persi) prosegue per predizione
+  - fornisce lo stato predetto a t + lead, dove lead è la latenza misurata
+    del loop (ricezione tick → forze applicate da Godot)
+
+Di default la predizione anticipa posizioni e angoli, mentre velocità e
+velocità angolari restano le stime filtrate all'istante dell'ultima misura
+(vel_lead=0): in quad_sim l'accelerazione stimata oscilla a ogni frame
+(forze ricalcolate a 60 Hz) e anticipare anche le velocità, che alimentano
+gli anelli più veloci, innesca cicli limite nel controllo di quota e assetto.
+
+Modello per canale (6 canali per drone: X, Y, Z e TX, TY, TZ):
+  stato   s = [p, v, a]       (posizione/angolo, velocità, accelerazione)
+  misura  z = [p, v]          (es. X e VX, oppure TX e WX)
+  F(dt)   = [[1, dt, dt²/2], [0, 1, dt], [0, 0, 1]]
+  Q(dt)   = jerk bianco con densità q (per canale)
+
+Tutti i droni dello swarm stanno negli stessi array (n, 6, 3) e
+(n, 6, 3, 3): update_all() esegue un passo per l'intero swarm con poche
+operazioni vettoriali; update()/predict() operano sulla riga di un drone
+(gli agenti sono thread dello stesso processo e scrivono righe distinte).
+
+    est = SwarmEstimator(n_drones)
+    est.update(i, pos, vel, t)          # misure fresche al tick
+    est.update(i, None, None, t)        # frame perso: solo predizione
+    p, v = est.predict(i, lead)         # posizioni a t + lead, velocità filtrate
+"""
+
+import numpy as np
+
+N_CHANNELS = 6                     # X, Y, Z, TX, TY, TZ
+
+# Rumore di processo (densità spettrale del jerk) e di misura, per canale
+POS_JERK_PSD = 200.0               # [m²/s⁵]   traslazione: forze che cambiano ogni frame
+ROT_JERK_PSD = 2000.0              # [rad²/s⁵] assetto: dinamica molto più rapida
+POS_MEAS_VAR = (1e-4, 1e-3)        # varianza misura (posizione [m²], velocità [m²/s²])
+ROT_MEAS_VAR = (1e-5, 1e-3)        # (angolo [rad²], velocità angolare [rad²/s²])
+
+MAX_LEAD  = 0.1                    # [s] orizzonte massimo di predizione
+MAX_COAST = 0.25                   # [s] senza misure oltre questo tempo: accelerazione azzerata
+INIT_VAR  = (1.0, 1.0, 10.0)       # covarianza iniziale (p, v, a)
+
+
+def _transition(dt: np.ndarray) -> np.ndarray:
+    """F(dt) per un vettore di dt: shape dt.shape + (3, 3)."""
+    F = np.zeros(dt.shape + (3, 3))
+    F[..., 0, 0] = F[..., 1, 1] = F[..., 2, 2] = 1.0
+    F[..., 0, 1] = F[..., 1, 2] = dt
+    F[..., 0, 2] = 0.5 * dt * dt
+    return F
+
+
+def _process_noise(dt: np.ndarray, q: np.ndarray) -> np.ndarray:
+    """Q(dt) del modello a jerk bianco: shape broadcast(dt, q) + (3, 3)."""
+    dt2 = dt * dt
+    dt3 = dt2 * dt
+    dt4 = dt3 * dt
+    dt5 = dt4 * dt
+    Q = np.empty(np.broadcast(dt, q).shape + (3, 3))
+    Q[..., 0, 0] = dt5 / 20.0
+    Q[..., 0, 1] = Q[..., 1, 0] = dt4 / 8.0
+    Q[..., 0, 2] = Q[..., 2, 0] = dt3 / 6.0
+    Q[..., 1, 1] = dt3 / 3.0
+    Q[..., 1, 2] = Q[..., 2, 1] = dt2 / 2.0
+    Q[..., 2, 2] = dt
+    return Q * q[..., None, None]
+
+
+class SwarmEstimator:
+    """
+    Filtro di Kalman ad accelerazione costante per n droni × 6 canali.
+    Vedi docstring del modulo.
+    """
+
+    def __init__(self, n_drones: int,
+                 pos_q: float = POS_JERK_PSD, rot_q: float = ROT_JERK_PSD,
+                 pos_r: tuple = POS_MEAS_VAR, rot_r: tuple = ROT_MEAS_VAR):
+        self.n = n_drones
+        self.x = np.zeros((n_drones, N_CHANNELS, 3))
+        self.P = np.zeros((n_drones, N_CHANNELS, 3, 3))
+        self.P[...] = np.diag(INIT_VAR)
+        self.t_last  = np.full(n_drones, np.nan)    # ultimo passo del filtro
+        self.t_meas  = np.full(n_drones, np.nan)    # ultima misura fusa
+        self.q = np.array([pos_q] * 3 + [rot_q] * 3)
+        self.r = np.array([pos_r] * 3 + [rot_r] * 3)  # (6, 2)
+        self.updates = np.zeros(n_drones, dtype=np.int64)
+        self.coasted = np.zeros(n_drones, dtype=np.int64)
+
+    # ------------------------------------------------------------------
+    # Passo del filtro (vettoriale su qualunque insieme di righe)
+    # ------------------------------------------------------------------
+
+    def _step(self, rows, pos, vel, t, valid):
+        """
+        Predizione fino a t e correzione con (pos, vel) dove valid.
+        rows: indice o slice; pos/vel: (..., 6); t: (...,); valid: (...,) bool.
+        """
+        x, P = self.x[rows], self.P[rows]
+        t_last = self.t_last[rows]
+        first  = np.isnan(t_last)
+        dt = np.where(first, 0.0, t - np.where(first, t, t_last))
+        dt = np.clip(dt, 0.0, None)[..., None]                  # (..., 1)
+
+        # Predizione
+        F = _transition(np.broadcast_to(dt, dt.shape[:-1] + (N_CHANNELS,)))
+        x = np.einsum('...ij,...j->...i', F, x)
+        P = F @ P @ np.swapaxes(F, -1, -2) + _process_noise(dt, self.q)
+
+        # Coast lungo: accelerazione non più credibile → velocità costante
+        coast = np.where(np.isnan(self.t_meas[rows]), 0.0, t - self.t_meas[rows])
+        long_coast = (~valid) & (coast > MAX_COAST)
+        x[..., 2] = np.where(long_coast[..., None], 0.0, x[..., 2])
+
+        # Correzione con H = [[1,0,0],[0,1,0]]: S = P[:2,:2] + R (2×2 per canale)
+        if np.any(valid):
+            z = np.stack([pos, vel], axis=-1)                     # (..., 6, 2)
+            innov = z - x[..., :2]
+            S = P[..., :2, :2] + self.r[..., :, None] * np.eye(2)
+            det = S[..., 0, 0] * S[..., 1, 1] - S[..., 0, 1] * S[..., 1, 0]
+            S_inv = np.empty_like(S)
+            S_inv[..., 0, 0] =  S[..., 1, 1] / det
+            S_inv[..., 1, 1] =  S[..., 0, 0] / det
+            S_inv[..., 0, 1] = -S[..., 0, 1] / det
+            S_inv[..., 1, 0] = -S[..., 1, 0] / det
+            K = P[..., :, :2] @ S_inv                             # (..., 6, 3, 2)
+            x_upd = x + np.einsum('...ij,...j->...i', K, innov)
+            P_upd = P - K @ P[..., :2, :]
+            # Prima misura: inizializza direttamente dalle misure
+            x_upd[..., :2] = np.where(first[..., None, None], z, x_upd[..., :2])
+            x_upd[..., 2]  = np.where(first[..., None], 0.0, x_upd[..., 2])
+            m = valid[..., None, None]
+            x = np.where(m, x_upd, x)
+            P = np.where(m[..., None], P_upd, P)
+
+        self.x[rows] = x
+        self.P[rows] = P
+        self.t_last[rows] = np.where(first & ~valid, np.nan, t)
+        self.t_meas[rows] = np.where(valid, t, self.t_meas[rows])
+
+    def update(self, i: int, pos, vel, t: float):
+        """
+        Passo per il drone i al tempo t. pos/vel: 6 valori (X, Y, Z, TX, TY,
+        TZ e VX, VY, VZ, WX, WY, WZ); None = frame senza misure (solo predizione).
+        """
+        valid = pos is not None
+        if valid:
+            pos = np.asarray(pos, dtype=float)
+            vel = np.asarray(vel, dtype=float)
+            self.updates[i] += 1
+        else:
+            pos = vel = np.zeros(N_CHANNELS)
+            self.coasted[i] += 1
+        self._step(slice(i, i + 1), pos[None], vel[None],
+                   np.array([t]), np.array([valid]))
+
+    def update_all(self, pos: np.ndarray, vel: np.ndarray, t,
+                   valid: np.ndarray = None):
+        """Passo per tutto lo swarm: pos/vel (n, 6), t scalare o (n,), valid (n,)."""
+        t = np.broadcast_to(np.asarray(t, dtype=float), (self.n,))
+        if valid is None:
+            valid = np.ones(self.n, dtype=bool)
+        self.updates += valid
+        self.coasted += ~valid
+        self._step(slice(None), np.asarray(pos, float), np.asarray(vel, float),
+                   t, np.asarray(valid, bool))
+
+    # ------------------------------------------------------------------
+    # Predizione
+    # ------------------------------------------------------------------
+
+    def predict(self, i: int, lead: float, vel_lead: float = 0.0):
+        """
+        Posizioni del drone i a t_last + lead e velocità a t_last + vel_lead
+        (entrambi limitati a MAX_LEAD), senza modificare lo stato del filtro.
+        Array di 6 valori ciascuno.
+        """
+        lead     = min(max(lead, 0.0), MAX_LEAD)
+        vel_lead = min(max(vel_lead, 0.0), MAX_LEAD)
+        x = self.x[i]
+        pos = x[:, 0] + lead * x[:, 1] + 0.5 * lead * lead * x[:, 2]
+        vel = x[:, 1] + vel_lead * x[:, 2]
+        return pos, vel
+
+    def predict_all(self, lead, vel_lead=0.0):
+        """(pos, vel) per tutto lo swarm: array (n, 6); lead scalare o (n,)."""
+        lead     = np.broadcast_to(np.clip(lead, 0.0, MAX_LEAD), (self.n,))[:, None]
+        vel_lead = np.broadcast_to(np.clip(vel_lead, 0.0, MAX_LEAD), (self.n,))[:, None]
+        x = self.x
+        return (x[..., 0] + lead * x[..., 1] + 0.5 * lead * lead * x[..., 2],
+                x[..., 1] + vel_lead * x[..., 2])
+
+    def reset(self, i: int):
+        self.x[i] = 0.0
+        self.P[i] = np.diag(INIT_VAR)
+        self.t_last[i] = np.nan
+        self.t_meas[i] = np.nan
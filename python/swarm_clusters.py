@@ -0,0 +1,107 @@
+"""
+swarm_clusters.py — Aggregazione gerarchica dello stato dello swarm.
+
+Senza cluster ogni agente sottoscrive 7 topic per ciascun peer: traffico in
+ingresso O(N) per agente, O(N²) per lo swarm. Con i cluster:
+
+  cluster   : gruppi di CLUSTER_SIZE droni con id consecutivi. I settori di
+              CoveragePlanner sono strisce lungo X ordinate per id, quindi
+              un cluster copre una fascia contigua dell'area
+  membri    : sottoscrizione completa (status, sx..sz, fire_*) ai soli
+              peer del proprio cluster
+  leader    : il membro con id minimo tra quelli attivi (aggiornamenti
+              recenti) calcola e pubblica il riassunto del cluster; se cade,
+              il successivo subentra
+  riassunto : topic cluster_{c}/* (SUMMARY_FIELDS), letti dagli agenti dei
+              cluster vicini per indice (fascia adiacente)
+
+Il riassunto contiene quello che serve a DroneAgent._should_respond per il
+fuoco corrente (world/fire_new), calcolato sui membri:
+
+  n_free, n_busy : droni liberi (EXPLORING/RETURNING) e impegnati
+                   (MOVING/SUPPRESSING)
+  cx, cz         : baricentro dei droni liberi (posizione indicativa)
+  fire_id        : fuoco a cui si riferiscono i due campi seguenti (0 = nessuno)
+  best_dist      : distanza dal fuoco del drone libero più vicino
+                   (NO_DISTANCE se nessuno è libero)
+  responding     : droni già in MOVING verso quel fuoco
+
+Un fuoco è di competenza dei cluster entro FIRE_CLUSTER_REACH dal suo
+cluster di casa (la fascia che lo contiene); con una visibilità dei
+riassunti di almeno 2 · FIRE_CLUSTER_REACH tutti i candidati si vedono
+tra loro.
+"""
+
+import math
+
+from coverage_planner import CoveragePlanner
+
+SUMMARY_FIELDS = ("n_free", "n_busy", "cx", "cz", "fire_id", "best_dist", "responding")
+NO_DISTANCE    = 1e9     # best_dist senza droni liberi (float32 rappresentabile)
+
+
+def n_clusters(n_drones: int, size: int) -> int:
+    return (n_drones + size - 1) // size
+
+
+def cluster_of(drone_id: int, size: int) -> int:
+    return drone_id // size
+
+
+def members(cluster: int, n_drones: int, size: int) -> range:
+    return range(cluster * size, min(n_drones, (cluster + 1) * size))
+
+
+def visible_clusters(cluster: int, n_drones: int, size: int, reach: int) -> range:
+    """Cluster entro reach (per indice) da cluster, incluso."""
+    return range(max(0, cluster - reach), min(n_clusters(n_drones, size), cluster + reach + 1))
+
+
+def home_cluster(x: float, n_drones: int, size: int, area_size: float) -> int:
+    """Cluster la cui fascia contiene la coordinata Godot X (settori di CoveragePlanner)."""
+    return cluster_of(CoveragePlanner.sector_of(x, n_drones, area_size), size)
+
+
+def summary_topics(cluster: int) -> list[str]:
+    return [f"cluster_{cluster}/{k}" for k in SUMMARY_FIELDS]
+
+
+class ClusterAggregator:
+    """
+    Calcolo del riassunto di un cluster (eseguito dal leader).
+    I codici di stato sono quelli pubblicati in drone_{i}/status.
+    """
+
+    def __init__(self, cluster: int, free_codes, busy_codes, moving_code: float,
+                 fire_radius: float):
+        self.cluster     = cluster
+        self.topics      = summary_topics(cluster)
+        self.free_codes  = tuple(free_codes)
+        self.busy_codes  = tuple(busy_codes)
+        self.moving_code = moving_code
+        self.fire_radius = fire_radius
+        self.published   = 0
+
+    def summarize(self, records, fire_id: float = 0.0, fire_pos=None) -> tuple:
+        """
+        records: (status, [x, y, z], [fx, fy, fz]) dei membri, leader compreso.
+        Restituisce i valori nell'ordine di SUMMARY_FIELDS.
+        """
+        n_free = n_busy = responding = 0
+        sx = sz = 0.0
+        best = NO_DISTANCE
+        for status, pos, fire in records:
+            if status in self.free_codes:
+                n_free += 1
+                sx += pos[0]
+                sz += pos[2]
+                if fire_pos is not None:
+                    best = min(best, math.dist(pos, fire_pos))
+            elif status in self.busy_codes:
+                n_busy += 1
+                if fire_pos is not None and status == self.moving_code and \
+                        math.dist(fire, fire_pos) < self.fire_radius * 2:
+                    responding += 1
+        cx, cz = (sx / n_free, sz / n_free) if n_free else (0.0, 0.0)
+        return (float(n_free), float(n_busy), cx, cz,
+                fire_id if fire_pos is not None else 0.0, best, float(responding))
@@ -0,0 +1,263 @@
+"""
+trajectory.py — Riferimenti di posizione/velocità/accelerazione a minimo
+jerk per il piano orizzontale (assi controller x, y = Godot X, Z).
+
+Al posto del target a gradino (x_target che salta al waypoint successivo,
+anelli P di posizione subito in saturazione) il controller insegue un
+riferimento liscio e riceve velocità e accelerazione come feedforward
+(MultirotorController.set_reference).
+
+  QuinticSegment : polinomio di grado 5 per asse tra due stati (p, v, a)
+                   in un tempo T: il profilo a minimo jerk. La durata è la
+                   minima che rispetta max_speed e max_acc (verificata su
+                   campioni del profilo)
+  connect()      : segmenti da uno stato a un punto (raccordo dallo stato
+                   corrente: deviazione verso un incendio, rientro nel
+                   piano). Sulle distanze lunghe rampa → crociera a
+                   max_speed → rampa: un solo quintico da fermo a fermo
+                   avrebbe velocità media 0.53 · picco
+  Plan           : segmenti precalcolati attraverso una sequenza di punti,
+                   con velocità di passaggio nei punti intermedi (bisettrice
+                   della curva, ridotta da VIA_SPEED_RATIO e a zero
+                   nelle inversioni). Cache per (punti, limiti, chiuso):
+                   lo stesso piano non si ricalcola
+  Follower       : insegue una sequenza raccordo + segmenti del piano nel
+                   tempo; reference(t) avanza un cursore, quindi a ogni tick
+                   costa la valutazione di un polinomio per asse
+
+    plan = plan_path(waypoints, closed=True)
+    f = Follower()
+    f.start(t, connect(pos, vel, acc, plan.points[k], plan.via[k], tag=k), plan, k)
+    x, y, vx, vy, ax, ay = f.reference(t)      # a ogni tick
+"""
+
+import functools
+import math
+
+MAX_SPEED       = 4.0    # [m/s] velocità massima di riferimento
+MAX_ACC         = 1.5    # [m/s²] accelerazione massima di riferimento
+VIA_SPEED_RATIO = 0.5    # frazione di MAX_SPEED nel passaggio da un punto intermedio
+MIN_DURATION    = 0.5    # [s] durata minima di un segmento
+CHECK_SAMPLES   = 16     # campioni per verificare i limiti di un segmento
+FIT_GROWTH      = 1.05   # allungamento della durata a ogni verifica fallita
+PLAN_CACHE_SIZE = 256    # piani distinti tenuti in cache
+
+
+class QuinticSegment:
+    """
+    Segmento 2D: p(τ) = c0 + c1 τ + ... + c5 τ⁵ per asse, τ ∈ [0, T].
+    Oltre T il riferimento resta nello stato finale.
+    """
+
+    __slots__ = ("T", "cx", "cy", "end", "tag")
+
+    def __init__(self, p0, v0, a0, p1, v1, a1, T: float, tag=None):
+        self.T   = T
+        self.cx  = self._coeffs(p0[0], v0[0], a0[0], p1[0], v1[0], a1[0], T)
+        self.cy  = self._coeffs(p0[1], v0[1], a0[1], p1[1], v1[1], a1[1], T)
+        self.end = (p1[0], p1[1], v1[0], v1[1], a1[0], a1[1])
+        self.tag = tag
+
+    @staticmethod
+    def _coeffs(p0, v0, a0, p1, v1, a1, T):
+        T2, T3 = T * T, T * T * T
+        d = p1 - p0
+        return (p0, v0, 0.5 * a0,
+                (20 * d - (8 * v1 + 12 * v0) * T - (3 * a0 - a1) * T2) / (2 * T3),
+                (-30 * d + (14 * v1 + 16 * v0) * T + (3 * a0 - 2 * a1) * T2) / (2 * T3 * T),
+                (12 * d - 6 * (v1 + v0) * T + (a1 - a0) * T2) / (2 * T3 * T2))
+
+    def eval(self, t: float) -> tuple:
+        """(x, y, vx, vy, ax, ay) al tempo t dall'inizio del segmento."""
+        if t >= self.T:
+            return self.end
+        if t < 0.0:
+            t = 0.0
+        x0, x1, x2, x3, x4, x5 = self.cx
+        y0, y1, y2, y3, y4, y5 = self.cy
+        return (x0 + t * (x1 + t * (x2 + t * (x3 + t * (x4 + t * x5)))),
+                y0 + t * (y1 + t * (y2 + t * (y3 + t * (y4 + t * y5)))),
+                x1 + t * (2 * x2 + t * (3 * x3 + t * (4 * x4 + t * 5 * x5))),
+                y1 + t * (2 * y2 + t * (3 * y3 + t * (4 * y4 + t * 5 * y5))),
+                2 * x2 + t * (6 * x3 + t * (12 * x4 + t * 20 * x5)),
+                2 * y2 + t * (6 * y3 + t * (12 * y4 + t * 20 * y5)))
+
+    def peaks(self) -> tuple:
+        """(velocità, accelerazione) massime sui campioni di verifica."""
+        v_max = a_max = 0.0
+        for k in range(CHECK_SAMPLES + 1):
+            _, _, vx, vy, ax, ay = self.eval(self.T * k / CHECK_SAMPLES * (1 - 1e-9))
+            v_max = max(v_max, math.hypot(vx, vy))
+            a_max = max(a_max, math.hypot(ax, ay))
+        return v_max, a_max
+
+
+def fit(p0, v0, a0, p1, v1=(0.0, 0.0), a1=(0.0, 0.0),
+        max_speed: float = MAX_SPEED, max_acc: float = MAX_ACC,
+        tag=None) -> QuinticSegment:
+    """
+    Un segmento a minimo jerk da (p0, v0, a0) a (p1, v1, a1) con la durata
+    minima che rispetta i limiti: parte dai limiti inferiori (distanza a
+    max_speed, salto di velocità a max_acc) e allunga di FIT_GROWTH finché
+    i campioni li superano.
+    """
+    d  = math.hypot(p1[0] - p0[0], p1[1] - p0[1])
+    dv = math.hypot(v1[0] - v0[0], v1[1] - v0[1])
+    T  = max(MIN_DURATION, d / max_speed, dv / max_acc)
+    v_lim = max(max_speed, math.hypot(*v0)) * 1.001      # v0 già oltre il limite: ammesso
+    a_lim = max(max_acc, math.hypot(*a0)) * 1.001
+    for _ in range(100):
+        seg = QuinticSegment(p0, v0, a0, p1, v1, a1, T, tag)
+        v_pk, a_pk = seg.peaks()
+        if v_pk <= v_lim and a_pk <= a_lim:
+            break
+        T *= FIT_GROWTH
+    return seg
+
+
+def connect(p0, v0, a0, p1, v1=(0.0, 0.0), a1=(0.0, 0.0),
+            max_speed: float = MAX_SPEED, max_acc: float = MAX_ACC,
+            tag=None) -> list:
+    """
+    Segmenti da (p0, v0, a0) a (p1, v1, a1). Se la distanza basta per
+    accelerare fino a max_speed e rallentare (rampe a minimo jerk in
+    velocità: durata 1.875 Δv / max_acc), tratto centrale a velocità
+    costante; altrimenti un solo segmento (fit).
+    """
+    dx, dy = p1[0] - p0[0], p1[1] - p0[1]
+    d  = math.hypot(dx, dy)
+    ux, uy = _unit(dx, dy)
+    vc  = max_speed
+    v0u = max(0.0, min(vc, v0[0] * ux + v0[1] * uy))
+    v1u = max(0.0, min(vc, v1[0] * ux + v1[1] * uy))
+    d_in  = 0.5 * (v0u + vc) * 1.875 * (vc - v0u) / max_acc
+    d_out = 0.5 * (v1u + vc) * 1.875 * (vc - v1u) / max_acc
+    cruise = d - d_in - d_out
+    if cruise < vc * MIN_DURATION:
+        return [fit(p0, v0, a0, p1, v1, a1, max_speed, max_acc, tag)]
+
+    q1 = (p0[0] + ux * d_in, p0[1] + uy * d_in)
+    q2 = (p1[0] - ux * d_out, p1[1] - uy * d_out)
+    vcr, zero = (ux * vc, uy * vc), (0.0, 0.0)
+    return [fit(p0, v0, a0, q1, vcr, zero, max_speed, max_acc, tag),
+            QuinticSegment(q1, vcr, zero, q2, vcr, zero, cruise / vc, tag),
+            fit(q2, vcr, zero, p1, v1, a1, max_speed, max_acc, tag)]
+
+
+class Plan:
+    """
+    Segmenti precalcolati attraverso points ([x, y] del controller).
+    Il tratto i va da points[i] a points[i+1] (in un piano chiuso l'ultimo
+    torna a points[0]): segments[leg_start[i]:leg_start[i+1]], con tag =
+    indice del punto di arrivo; via[i] è la velocità di passaggio in points[i].
+    """
+
+    def __init__(self, points, closed: bool, max_speed: float, max_acc: float):
+        self.points    = [tuple(p) for p in points]
+        self.closed    = closed
+        self.max_speed = max_speed
+        self.max_acc   = max_acc
+        n = len(self.points)
+        self.via = [self._via_velocity(i) for i in range(n)]
+        n_seg = n if closed else n - 1
+        zero = (0.0, 0.0)
+        self.segments:  list[QuinticSegment] = []
+        self.leg_start: list[int] = []
+        for i in range(max(0, n_seg)):
+            self.leg_start.append(len(self.segments))
+            self.segments += connect(self.points[i], self.via[i], zero,
+                                     self.points[(i + 1) % n], self.via[(i + 1) % n],
+                                     zero, max_speed, max_acc, tag=(i + 1) % n)
+        self.duration = sum(s.T for s in self.segments)
+
+    def _via_velocity(self, i: int) -> tuple:
+        n = len(self.points)
+        if n < 2 or (not self.closed and i in (0, n - 1)):
+            return (0.0, 0.0)
+        prev, cur, nxt = self.points[i - 1], self.points[i], self.points[(i + 1) % n]
+        u_in  = _unit(cur[0] - prev[0], cur[1] - prev[1])
+        u_out = _unit(nxt[0] - cur[0], nxt[1] - cur[1])
+        bx, by = (u_in[0] + u_out[0]) * 0.5, (u_in[1] + u_out[1]) * 0.5
+        s = self.max_speed * VIA_SPEED_RATIO
+        return (bx * s, by * s)            # |b| = cos(metà della curva): 0 in un'inversione
+
+
+def _unit(dx: float, dy: float) -> tuple:
+    d = math.hypot(dx, dy)
+    return (dx / d, dy / d) if d > 1e-9 else (0.0, 0.0)
+
+
+@functools.lru_cache(maxsize=PLAN_CACHE_SIZE)
+def _cached_plan(points: tuple, closed: bool, max_speed: float, max_acc: float) -> Plan:
+    return Plan(points, closed, max_speed, max_acc)
+
+
+def plan_path(points, closed: bool = False, max_speed: float = MAX_SPEED,
+              max_acc: float = MAX_ACC) -> Plan:
+    """Plan attraverso points, dalla cache se già calcolato con gli stessi parametri."""
+    return _cached_plan(tuple(tuple(p) for p in points), closed, max_speed, max_acc)
+
+
+class Follower:
+    """
+    Riferimento nel tempo: segmenti iniziali (raccordo) seguiti, se dato un
+    piano, dai suoi tratti a partire dal tratto leg, ciclando se il piano è
+    chiuso. Senza segmenti rimasti il riferimento resta nello stato finale
+    (fermo nell'ultimo punto).
+    """
+
+    def __init__(self):
+        self.active = False
+        self._seg   = None
+        self._t0    = 0.0
+        self._queue: list = []
+        self._qi    = 0
+        self._plan  = None
+        self._next  = 0
+
+    def start(self, t: float, segments: list, plan: Plan = None, leg: int = 0):
+        self._queue = segments
+        self._qi    = 1
+        self._seg   = segments[0]
+        self._t0    = t
+        self._plan  = plan
+        self._next  = plan.leg_start[leg] if plan is not None and plan.segments else 0
+        self.active = True
+
+    def stop(self):
+        self.active = False
+        self._seg   = None
+        self._queue = []
+        self._plan  = None
+
+    def _advance(self, t: float):
+        seg = self._seg
+        while t - self._t0 >= seg.T:
+            if self._qi < len(self._queue):
+                nxt = self._queue[self._qi]
+                self._qi += 1
+            else:
+                plan = self._plan
+                if plan is None or not plan.segments or \
+                        (not plan.closed and self._next >= len(plan.segments)):
+                    return
+                nxt = plan.segments[self._next]
+                self._next += 1
+                if plan.closed and self._next == len(plan.segments):
+                    self._next = 0
+            self._t0 += seg.T
+            seg = self._seg = nxt
+
+    def reference(self, t: float) -> tuple:
+        """(x, y, vx, vy, ax, ay) al tempo t (stessa base dei tempi di start)."""
+        self._advance(t)
+        return self._seg.eval(t - self._t0)
+
+    @property
+    def tag(self):
+        """Tag del segmento corrente (nel piano: indice del punto verso cui si va)."""
+        return self._seg.tag if self._seg is not None else None
+
+    def finished(self, t: float) -> bool:
+        self._advance(t)
+        return t - self._t0 >= self._seg.T
@@ -12,6 +12,10 @@
 ##   DDS.read("varname")       → float
 ##   DDS.publish("varname", DDS_TYPE_FLOAT, valore)
 ##   DDS.clear("varname")
+##
+## SUBSCRIBE_SNAPSHOT (0x83): come SUBSCRIBE, poi rimanda al client l'ultimo
+## valore di ogni topic già pubblicato con pacchetti SNAPSHOT (0x84, stesso
+## formato di PUBLISH). Un agente che si collega tardi è subito allineato.
 
 extends Node
 
@@ -21,6 +25,8 @@ extends Node
 const COMMAND_KEEP_ALIVE := 0x80
 const COMMAND_SUBSCRIBE  := 0x81
 const COMMAND_PUBLISH    := 0x82
+const COMMAND_SUBSCRIBE_SNAPSHOT := 0x83
+const COMMAND_SNAPSHOT           := 0x84
 
 const DDS_TYPE_UNKNOWN := 0
 const DDS_TYPE_INT     := 1
@@ -86,7 +92,9 @@ func _process(delta: float) -> void:
 			COMMAND_KEEP_ALIVE:
 				pass   # TTL già resettato sopra
 			COMMAND_SUBSCRIBE:
-				_handle_subscribe(key, pkt)
+				_handle_subscribe(key, pkt, false)
+			COMMAND_SUBSCRIBE_SNAPSHOT:
+				_handle_subscribe(key, pkt, true)
 			COMMAND_PUBLISH:
 				_handle_publish(pkt)
 
@@ -108,8 +116,10 @@ func _process(delta: float) -> void:
 # Gestione comandi
 # ---------------------------------------------------------------------------
 
-func _handle_subscribe(sender_key: String, pkt: PackedByteArray) -> void:
-	## Formato: [0x81, n_vars, len, name_bytes, len, name_bytes, ...]
+func _handle_subscribe(sender_key: String, pkt: PackedByteArray, snapshot: bool) -> void:
+	## Formato: [0x81|0x83, n_vars, len, name_bytes, len, name_bytes, ...]
+	## Con snapshot rimanda l'ultimo valore dei topic con tipo noto
+	## (DDS_TYPE_UNKNOWN = sottoscritto ma mai pubblicato).
 	var n   : int = pkt.decode_u8(1)
 	var idx : int = 2
 	for _i in n:
@@ -124,6 +134,11 @@ func _handle_subscribe(sender_key: String, pkt: PackedByteArray) -> void:
 		if sender_key not in subs:
 			subs.append(sender_key)
 
+		var v : Dictionary = _variables[_name]
+		if snapshot and v["type"] != DDS_TYPE_UNKNOWN:
+			_peers[sender_key]["peer"].put_packet(_build_publish_packet(
+				_name, v["type"], v["value"], COMMAND_SNAPSHOT))
+
 
 func _handle_publish(pkt: PackedByteArray) -> void:
 	## Formato: [0x82, type, name_len, name_bytes, value_4bytes]
@@ -164,11 +179,12 @@ func _broadcast(var_name: String) -> void:
 			_peers[key]["peer"].put_packet(pkt)
 
 
-func _build_publish_packet(var_name: String, dtype: int, value: float) -> PackedByteArray:
+func _build_publish_packet(var_name: String, dtype: int, value: float,
+		command: int = COMMAND_PUBLISH) -> PackedByteArray:
 	var name_bytes : PackedByteArray = var_name.to_utf8_buffer()
 	var pkt        : PackedByteArray = PackedByteArray()
 	pkt.resize(3 + name_bytes.size() + 4)
-	pkt.encode_u8(0, COMMAND_PUBLISH)
+	pkt.encode_u8(0, command)
 	pkt.encode_u8(1, dtype)
 	pkt.encode_u8(2, name_bytes.size())
 	for i in name_bytes.size():